@@ -0,0 +1,71 @@
+import os
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import List, Optional
+from django.conf import settings
+import redis
+import redis.asyncio
+
+
+@lru_cache(maxsize=None)
+def get_pool(decode_responses: bool = False) -> redis.ConnectionPool:
+    """
+    Pool de connexions Redis du processus (worker gunicorn ou Celery), créé au
+    premier appel.
+
+    Le pool est bloquant : au-delà de ``REDIS_MAX_CONNECTIONS`` connexions, un
+    appel attend qu'une connexion se libère (``REDIS_POOL_TIMEOUT`` secondes)
+    au lieu d'en ouvrir une nouvelle. Les connexions inactives depuis
+    ``REDIS_HEALTH_CHECK_INTERVAL`` secondes sont vérifiées avant d'être
+    réutilisées. redis-py recrée le pool après un fork.
+    """
+    return redis.BlockingConnectionPool(
+        host=os.environ.get("TASK_REDIS_HOST"),
+        port=int(os.environ.get("TASK_REDIS_PORT")),
+        max_connections=settings.REDIS_MAX_CONNECTIONS,
+        timeout=settings.REDIS_POOL_TIMEOUT,
+        socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=settings.REDIS_SOCKET_CONNECT_TIMEOUT,
+        socket_keepalive=True,
+        health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+        retry_on_timeout=True,
+        decode_responses=decode_responses,
+    )
+
+
+def get_redis(decode_responses: bool = False) -> redis.Redis:
+    """Client Redis utilisant le pool partagé (ne crée aucune connexion)."""
+    return redis.Redis(connection_pool=get_pool(decode_responses))
+
+
+def get_async_redis(decode_responses: bool = False) -> redis.asyncio.Redis:
+    """
+    Client Redis asynchrone, pour les vues ASGI. Son pool est lié à la boucle
+    d'évènements courante : il n'est pas partagé et l'appelant le ferme
+    (``aclose``) quand il n'en a plus besoin.
+    """
+    return redis.asyncio.Redis(
+        host=os.environ.get("TASK_REDIS_HOST"),
+        port=int(os.environ.get("TASK_REDIS_PORT")),
+        socket_connect_timeout=settings.REDIS_SOCKET_CONNECT_TIMEOUT,
+        socket_keepalive=True,
+        health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+        decode_responses=decode_responses,
+    )
+
+
+@contextmanager
+def pipeline(
+    client: redis.Redis, transaction: bool = True, replies: Optional[List] = None
+):
+    """
+    Envoie en un seul aller-retour les commandes ajoutées dans le bloc
+    ``with`` ; elles ne sont pas exécutées si le bloc lève une exception.
+    Les réponses sont ajoutées à ``replies`` s'il est fourni.
+    """
+    with client.pipeline(transaction=transaction) as pipe:
+        yield pipe
+        results = pipe.execute()
+
+    if replies is not None:
+        replies.extend(results)
@@ -1,14 +1,15 @@
 def preprocess_schema(endpoints, **kwargs):
     schemas = kwargs["components"]["schemas"]
 
-    # 1. First, define the nested schemas
+    # Lignes renvoyées par import/<id>/results/ suivant le type d'import
     schemas["UserImportItem"] = {
         "type": "object",
         "properties": {
             "first_name": {"type": "string"},
             "last_name": {"type": "string"},
             "email": {"type": "string", "format": "email"},
-            "temp_password": {"type": "string"},
+            "temp_password": {"type": "string", "nullable": True},
+            "action": {"type": "string", "enum": ["inserted", "updated"]},
         },
         "required": ["first_name", "last_name", "email", "temp_password"],
     }
@@ -21,6 +22,7 @@ def preprocess_schema(endpoints, **kwargs):
             "code": {"type": "string"},
             "email": {"type": "string", "format": "email"},
             "year_of_graduation": {"type": "integer"},
+            "action": {"type": "string", "enum": ["inserted", "updated"]},
         },
         "required": ["id", "name", "code", "email", "year_of_graduation"],
     }
@@ -33,27 +35,9 @@ def preprocess_schema(endpoints, **kwargs):
             "code": {"type": "string"},
             "professor": {"type": "string", "nullable": True},
             "professor_email": {"type": "string", "format": "email"},
+            "action": {"type": "string", "enum": ["inserted", "updated"]},
         },
         "required": ["id", "name", "code", "professor_email"],
     }
 
-    # 2. Update the ImportStatus schema
-    if "ImportStatus" in schemas:
-        schemas["ImportStatus"]["properties"]["results"] = {
-            "oneOf": [
-                {
-                    "type": "array",
-                    "items": {"$ref": "#/components/schemas/UserImportItem"},
-                },
-                {
-                    "type": "array",
-                    "items": {"$ref": "#/components/schemas/ClassImportItem"},
-                },
-                {
-                    "type": "array",
-                    "items": {"$ref": "#/components/schemas/CourseImportItem"},
-                },
-            ]
-        }
-
     return endpoints
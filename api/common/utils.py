@@ -7,57 +7,88 @@ import base64
 import hashlib
 import struct
 import os
+from functools import lru_cache
+from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.utils.translation import gettext as _
 
 
 class TOTP:
-    def __init__(self, interval=15):
+    def __init__(self, interval=15, window=None):
         self.interval = interval
+        # Nombre d'intervalles acceptés avant et après l'intervalle courant
+        self.window = settings.CHECKIN_TOTP_WINDOW if window is None else window
 
     def generate_secret(self):
         return base64.b32encode(os.urandom(20)).decode("utf-8")
 
-    def generate_token(self, secret):
+    def get_counter(self, at=None):
         # Calculate the time-based counter (T = Current Unix time / 15-second interval)
-        counter = int(time.time() / self.interval)
+        return int((time.time() if at is None else at) / self.interval)
 
-        # Convert counter to 8-byte big-endian representation (required by RFC 6238)
-        # '>Q' format: '>' means big-endian, 'Q' means unsigned long long (8 bytes)
-        counter_bytes = struct.pack(">Q", counter)
+    def get_expiry(self, counter):
+        """Instant (timestamp Unix) où le code de l'intervalle ``counter`` expire."""
+        return (counter + 1) * self.interval
 
-        # Decode the base32-encoded secret key
-        # TOTP secrets are usually stored in base32 format for user-friendliness
-        key = base64.b32decode(secret)
+    def generate_token(self, secret, counter=None):
+        if counter is None:
+            counter = self.get_counter()
 
-        # Calculate HMAC-SHA1 hash
-        # This creates a 20-byte (160-bit) hash value
-        hmac_obj = hmac.new(key, counter_bytes, hashlib.sha1)
-        hmac_result = hmac_obj.digest()
+        # Le code ne change qu'une fois par intervalle : il n'est calculé
+        # qu'une fois par secret et par intervalle
+        return _compute_token(secret, counter)
 
-        # Dynamic Truncation (DT) as defined in RFC 4226
-        # Get offset from last byte (last 4 bits)
-        offset = hmac_result[-1] & 0x0F  # 0x0F = 15 (get last 4 bits)
+    def verify_token(self, secret, token):
+        if not secret:
+            return False
 
-        # Take 4 bytes starting at offset
-        code_bytes = hmac_result[offset : offset + 4]
+        counter = self.get_counter()
+        # compare_digest n'accepte que des chaînes ASCII : les octets UTF-8
+        # d'un code quelconque peuvent toujours être comparés
+        token = str(token).encode()
 
-        # Convert 4 bytes to 32-bit integer
-        # '>I' format: '>' means big-endian, 'I' means unsigned int (4 bytes)
-        code = struct.unpack(">I", code_bytes)[0]
+        # Comparaison en temps constant, sur tous les intervalles acceptés
+        matches = [
+            hmac.compare_digest(token, self.generate_token(secret, candidate).encode())
+            for candidate in range(counter - self.window, counter + self.window + 1)
+        ]
 
-        # Remove the most significant bit (RFC 4226 section 5.4)
-        # 0x7FFFFFFF = 2147483647 (31-bit mask)
-        code = code & 0x7FFFFFFF
+        return any(matches)
 
-        # Get 6 digits by calculating modulus 1000000
-        # zfill(6) ensures the code is always 6 digits with leading zeros
-        return str(code % 1000000).zfill(6)
 
-    def verify_token(self, secret, token):
-        current_token = self.generate_token(secret)
+@lru_cache(maxsize=4096)
+def _compute_token(secret, counter):
+    # Convert counter to 8-byte big-endian representation (required by RFC 6238)
+    # '>Q' format: '>' means big-endian, 'Q' means unsigned long long (8 bytes)
+    counter_bytes = struct.pack(">Q", counter)
+
+    # Decode the base32-encoded secret key
+    # TOTP secrets are usually stored in base32 format for user-friendliness
+    key = base64.b32decode(secret)
+
+    # Calculate HMAC-SHA1 hash
+    # This creates a 20-byte (160-bit) hash value
+    hmac_obj = hmac.new(key, counter_bytes, hashlib.sha1)
+    hmac_result = hmac_obj.digest()
+
+    # Dynamic Truncation (DT) as defined in RFC 4226
+    # Get offset from last byte (last 4 bits)
+    offset = hmac_result[-1] & 0x0F  # 0x0F = 15 (get last 4 bits)
+
+    # Take 4 bytes starting at offset
+    code_bytes = hmac_result[offset : offset + 4]
+
+    # Convert 4 bytes to 32-bit integer
+    # '>I' format: '>' means big-endian, 'I' means unsigned int (4 bytes)
+    code = struct.unpack(">I", code_bytes)[0]
+
+    # Remove the most significant bit (RFC 4226 section 5.4)
+    # 0x7FFFFFFF = 2147483647 (31-bit mask)
+    code = code & 0x7FFFFFFF
 
-        return str(token) == current_token
+    # Get 6 digits by calculating modulus 1000000
+    # zfill(6) ensures the code is always 6 digits with leading zeros
+    return str(code % 1000000).zfill(6)
 
 
 def is_valid_uuid(uuid_to_test, version=4):
@@ -1,6 +1,6 @@
-from .attendance_admin import AttendanceAdmin
+from .attendance_admin import AttendanceAdmin, AttendanceSummaryAdmin
 from .checkin_session_admin import CheckinSessionAdmin
 from .class_admin import ClassAdmin, ClassSessionAdmin, ClassStudentAdmin
 from .course_admin import CourseAdmin, CourseClassEnrollment
-from .assessment_admin import AssessmentAdmin, StudentGradeAdmin
+from .assessment_admin import AssessmentAdmin, GradeSummaryAdmin, StudentGradeAdmin
 from .user_admin import UserAdmin
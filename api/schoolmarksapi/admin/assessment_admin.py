@@ -1,5 +1,6 @@
 from django.contrib import admin
-from schoolmarksapi.models import Assessment, StudentGrade
+from schoolmarksapi.models import Assessment, GradeSummary, StudentGrade
+from schoolmarksapi.services.grade_summary import refresh_grade_summaries
 
 
 @admin.register(Assessment)
@@ -8,9 +9,69 @@ class AssessmentAdmin(admin.ModelAdmin):
     search_fields = ("name", "course__name", "class_group__name")
     list_filter = ("course", "class_group", "created_at")
 
+    def save_model(self, request, obj, form, change):
+        previous_course_id = (
+            Assessment.objects.values_list("course_id", flat=True).get(pk=obj.pk)
+            if change
+            else None
+        )
+
+        super().save_model(request, obj, form, change)
+
+        # Barème ou cours modifié : les totaux de tous les élèves notés changent
+        if change and {"coef", "max_value", "course"} & set(form.changed_data):
+            student_ids = list(obj.student_grades.values_list("student_id", flat=True))
+            refresh_grade_summaries(obj.course_id, student_ids)
+
+            if previous_course_id != obj.course_id:
+                refresh_grade_summaries(previous_course_id, student_ids)
+
 
 @admin.register(StudentGrade)
 class StudentGradeAdmin(admin.ModelAdmin):
     list_display = ("student", "assessment", "value", "created_at")
     search_fields = ("student__email", "assessment__name")
     list_filter = ("assessment", "created_at")
+
+    def save_model(self, request, obj, form, change):
+        # Les suppressions passent par le signal post_delete
+        previous = (
+            StudentGrade.objects.values_list("student_id", "assessment__course_id").get(
+                pk=obj.pk
+            )
+            if change
+            else None
+        )
+
+        super().save_model(request, obj, form, change)
+
+        refresh_grade_summaries(obj.assessment.course_id, [obj.student_id])
+
+        if previous is not None and previous != (
+            obj.student_id,
+            obj.assessment.course_id,
+        ):
+            student_id, course_id = previous
+            refresh_grade_summaries(course_id, [student_id])
+
+
+@admin.register(GradeSummary)
+class GradeSummaryAdmin(admin.ModelAdmin):
+    list_display = (
+        "student",
+        "course",
+        "average",
+        "grades_count",
+        "min_grade",
+        "max_grade",
+        "updated_at",
+    )
+    search_fields = ("student__email", "course__name", "course__code")
+    list_filter = ("course",)
+
+    # Totaux calculés : modifiés uniquement avec les notes
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
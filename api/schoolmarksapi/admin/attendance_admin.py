@@ -1,5 +1,6 @@
 from django.contrib import admin
-from schoolmarksapi.models import Attendance
+from schoolmarksapi.models import Attendance, AttendanceSummary
+from schoolmarksapi.services.attendance_summary import update_attendance_summaries
 
 
 @admin.register(Attendance)
@@ -16,3 +17,40 @@ class AttendanceAdmin(admin.ModelAdmin):
     @admin.display(description="Student")
     def get_student_fullname(self, obj):
         return f"{obj.student.first_name} {obj.student.last_name}"
+
+    def save_model(self, request, obj, form, change):
+        # Corrections manuelles : l'ancienne version est retirée des totaux
+        # et la nouvelle ajoutée, dans la transaction de l'admin. Les
+        # suppressions passent par le signal post_delete.
+        previous = (
+            Attendance.objects.select_for_update().get(pk=obj.pk) if change else None
+        )
+
+        super().save_model(request, obj, form, change)
+
+        if previous is not None:
+            update_attendance_summaries([previous], sign=-1)
+
+        update_attendance_summaries([obj])
+
+
+@admin.register(AttendanceSummary)
+class AttendanceSummaryAdmin(admin.ModelAdmin):
+    list_display = (
+        "student",
+        "course",
+        "present_count",
+        "late_count",
+        "absent_count",
+        "minutes_late",
+        "updated_at",
+    )
+    search_fields = ("student__email", "course__name", "course__code")
+    list_filter = ("course",)
+
+    # Totaux calculés : modifiés uniquement avec les enregistrements
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class SchoolmarksapiConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "schoolmarksapi"
+
+    def ready(self):
+        from schoolmarksapi import signals  # noqa: F401
@@ -0,0 +1,127 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+
+from schoolmarksapi.serializers.import_serializer import (
+    CLASS_CSV_ROW_VALIDATOR,
+    COURSE_CSV_ROW_VALIDATOR,
+    USER_CSV_ROW_VALIDATOR,
+    ClassCSVRowSerializer,
+    CourseCSVRowSerializer,
+    UserCSVRowSerializer,
+)
+
+IMPORT_TYPES = {
+    "users": (UserCSVRowSerializer, USER_CSV_ROW_VALIDATOR),
+    "classes": (ClassCSVRowSerializer, CLASS_CSV_ROW_VALIDATOR),
+    "courses": (CourseCSVRowSerializer, COURSE_CSV_ROW_VALIDATOR),
+}
+
+# Une ligne sur INVALID_EVERY contient une erreur
+INVALID_EVERY = 50
+
+
+def generate_row(type, index):
+    if type == "users":
+        row = {
+            "email": f"eleve{index}@schoolmarks.local",
+            "first_name": f" Prénom{index} ",
+            "last_name": f"Nom{index}",
+            "role": ("student", "teacher", "admin")[index % 3],
+        }
+        invalid = {"email": "pas-un-email", "role": "parent", "first_name": "  "}
+    elif type == "classes":
+        row = {
+            "name": f"Classe {index}",
+            "code": f"CL{index}",
+            "year_of_graduation": str(2025 + index % 5),
+        }
+        invalid = {"year_of_graduation": "deux-mille", "code": "X" * 60}
+    else:
+        row = {
+            "name": f"Cours {index}",
+            "code": f"CO{index}",
+            "teacher_email": f"prof{index % 40}@schoolmarks.local",
+        }
+        invalid = {"teacher_email": "", "name": None}
+
+    if index % INVALID_EVERY == 0:
+        field = list(invalid)[(index // INVALID_EVERY) % len(invalid)]
+        row[field] = invalid[field]
+
+    return row
+
+
+def validate_with_serializer(serializer_class, rows):
+    results = []
+
+    for row in rows:
+        serializer = serializer_class(data=row)
+
+        if serializer.is_valid():
+            results.append((dict(serializer.validated_data), None))
+        else:
+            results.append(
+                (
+                    None,
+                    {
+                        field: [str(error) for error in errors]
+                        for field, errors in serializer.errors.items()
+                    },
+                )
+            )
+
+    return results
+
+
+def validate_with_compiled(validator, rows):
+    return [validator.validate(row) for row in rows]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare le débit (lignes/s) de la validation des lignes CSV par les "
+        "serializers DRF et par le validateur compilé, et vérifie que les "
+        "deux produisent les mêmes données et les mêmes erreurs."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=50000)
+        parser.add_argument(
+            "--type", choices=list(IMPORT_TYPES), action="append", dest="types"
+        )
+
+    def measure(self, label, func, *args):
+        start = time.perf_counter()
+        results = func(*args)
+        elapsed = time.perf_counter() - start
+
+        rows = len(results)
+        rate = rows / elapsed if elapsed else float("inf")
+        self.stdout.write(f"  {label:<12} {elapsed:8.2f}s {rate:12.1f} lignes/s")
+
+        return results, rate
+
+    def handle(self, *args, **options):
+        for type in options["types"] or list(IMPORT_TYPES):
+            serializer_class, validator = IMPORT_TYPES[type]
+            rows = [generate_row(type, index) for index in range(options["rows"])]
+
+            self.stdout.write(f"Validation de {len(rows)} lignes ({type})")
+
+            expected, serializer_rate = self.measure(
+                "serializer", validate_with_serializer, serializer_class, rows
+            )
+            results, compiled_rate = self.measure(
+                "compilé", validate_with_compiled, validator, rows
+            )
+
+            if results != expected:
+                raise CommandError(
+                    f"Le validateur compilé diffère du serializer ({type})"
+                )
+
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"  Accélération : x{compiled_rate / serializer_rate:.1f}"
+                )
+            )
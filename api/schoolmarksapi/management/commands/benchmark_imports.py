@@ -0,0 +1,269 @@
+import json
+import platform
+import time
+import tracemalloc
+import uuid
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+import django
+
+from common.redis_pool import get_redis
+from schoolmarksapi.serializers.import_serializer import (
+    CLASS_CSV_ROW_VALIDATOR,
+    COURSE_CSV_ROW_VALIDATOR,
+    USER_CSV_ROW_VALIDATOR,
+)
+from schoolmarksapi.services.import_state import (
+    delete_import_state,
+    read_import_state,
+)
+from schoolmarksapi.services.import_storage import delete_payload
+from schoolmarksapi.tasks.import_classes import process_classes
+from schoolmarksapi.tasks.import_courses import process_courses
+from schoolmarksapi.tasks.import_users import process_users
+from schoolmarksapi.views.import_view import spool_csv
+
+IMPORT_TYPES = {
+    "users": (USER_CSV_ROW_VALIDATOR, process_users),
+    "classes": (CLASS_CSV_ROW_VALIDATOR, process_classes),
+    "courses": (COURSE_CSV_ROW_VALIDATOR, process_courses),
+}
+
+# Nombre de professeurs créés pour l'import de cours
+TEACHER_COUNT = 50
+
+
+class _Rollback(Exception):
+    pass
+
+
+def generate_csv(type: str, rows: int, run_id: str) -> str:
+    """CSV synthétique valide de ``rows`` lignes pour un type d'import."""
+    if type == "users":
+        roles = ("student",) * 18 + ("teacher", "admin")
+        lines = ["email,first_name,last_name,role"]
+        lines.extend(
+            f"bench-{run_id}-{index}@schoolmarks.local,Prénom{index},Nom{index},"
+            f"{roles[index % len(roles)]}"
+            for index in range(rows)
+        )
+    elif type == "classes":
+        lines = ["name,code,year_of_graduation"]
+        lines.extend(
+            f"Classe {index},B{run_id}-{index},{2025 + index % 5}"
+            for index in range(rows)
+        )
+    else:
+        lines = ["name,code,teacher_email"]
+        lines.extend(
+            f"Cours {index},B{run_id}-{index},"
+            f"bench-{run_id}-teacher{index % TEACHER_COUNT}@schoolmarks.local"
+            for index in range(rows)
+        )
+
+    return "\n".join(lines) + "\n"
+
+
+def count_redis_commands():
+    """Nombre total de commandes exécutées par Redis (None si indisponible)."""
+    try:
+        stats = get_redis().info("commandstats")
+    except Exception:
+        return None
+
+    return sum(command["calls"] for command in stats.values())
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure le débit des imports CSV (lignes/s, requêtes SQL, commandes "
+        "Redis, pic mémoire) sur des fichiers synthétiques traités par les "
+        "vraies tâches en mode synchrone. Les données créées sont annulées. "
+        "Le résultat est écrit en JSON pour comparer les exécutions."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--type",
+            choices=list(IMPORT_TYPES),
+            action="append",
+            dest="types",
+            help="Type d'import (répétable, tous par défaut)",
+        )
+        parser.add_argument(
+            "--rows",
+            type=int,
+            action="append",
+            help="Nombre de lignes (répétable, 1000 par défaut)",
+        )
+        parser.add_argument(
+            "--commit-mode", choices=["atomic", "chunked"], default="atomic"
+        )
+        parser.add_argument("--chunk-size", type=int, default=None)
+        parser.add_argument(
+            "--fast-hasher",
+            action="store_true",
+            help="Hash MD5 des mots de passe pour mesurer l'import hors PBKDF2",
+        )
+        parser.add_argument(
+            "--no-memory",
+            action="store_true",
+            help="Ne mesure pas le pic mémoire (tracemalloc ralentit l'import)",
+        )
+        parser.add_argument("--output", help="Fichier JSON de résultats")
+        parser.add_argument(
+            "--baseline", help="Fichier JSON d'une exécution précédente à comparer"
+        )
+
+    def create_teachers(self, run_id: str):
+        User = get_user_model()
+        User.objects.bulk_create(
+            [
+                User(
+                    username=f"bench-{run_id}-teacher{index}",
+                    email=f"bench-{run_id}-teacher{index}@schoolmarks.local",
+                    is_staff=True,
+                )
+                for index in range(TEACHER_COUNT)
+            ]
+        )
+
+    def run_benchmark(self, type: str, rows: int, options) -> dict:
+        validator, task = IMPORT_TYPES[type]
+        run_id = uuid.uuid4().hex[:8]
+        import_id = str(uuid.uuid4())
+        chunk_size = options["chunk_size"] or settings.IMPORT_CHUNK_SIZE
+
+        uploaded_file = SimpleUploadedFile(
+            f"{type}.csv", generate_csv(type, rows, run_id).encode("utf-8")
+        )
+
+        start = time.perf_counter()
+        total_rows, errors = spool_csv(uploaded_file, validator, import_id, chunk_size)
+        spool_seconds = time.perf_counter() - start
+
+        if errors:
+            raise CommandError(f"CSV synthétique invalide ({type}) : {errors[:3]}")
+
+        result = {"type": type, "rows": total_rows}
+
+        try:
+            with transaction.atomic():
+                if type == "courses":
+                    self.create_teachers(run_id)
+
+                redis_commands = count_redis_commands()
+
+                if not options["no_memory"]:
+                    tracemalloc.start()
+
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.perf_counter()
+                    task.apply(
+                        args=(import_id, total_rows, "benchmark"),
+                        kwargs={
+                            "commit_mode": options["commit_mode"],
+                            "chunk_size": chunk_size,
+                        },
+                    )
+                    seconds = time.perf_counter() - start
+
+                if not options["no_memory"]:
+                    result["peak_memory_bytes"] = tracemalloc.get_traced_memory()[1]
+                    tracemalloc.stop()
+
+                if redis_commands is not None:
+                    # - 1 : la commande INFO elle-même
+                    redis_commands = count_redis_commands() - redis_commands - 1
+
+                import_state = read_import_state(import_id)
+                raise _Rollback()
+        except _Rollback:
+            pass
+        finally:
+            delete_payload(import_id)
+            delete_import_state(import_id, type)
+
+        result.update(
+            {
+                "status": import_state["status"] if import_state else None,
+                "error": import_state["error"] if import_state else None,
+                "spool_seconds": round(spool_seconds, 4),
+                "seconds": round(seconds, 4),
+                "rows_per_second": round(total_rows / seconds, 1) if seconds else None,
+                "queries": len(queries.captured_queries),
+                "redis_commands": redis_commands,
+            }
+        )
+
+        return result
+
+    def print_result(self, result: dict, baseline: dict):
+        line = (
+            f"{result['type']:<8} {result['rows']:>7} lignes "
+            f"{result['seconds']:8.2f}s {result['rows_per_second'] or 0:10.1f} lignes/s "
+            f"{result['queries']:>6} requêtes "
+            f"{result['redis_commands'] if result['redis_commands'] is not None else '-':>6} cmd Redis"
+        )
+
+        if "peak_memory_bytes" in result:
+            line += f" {result['peak_memory_bytes'] / 1024 / 1024:8.1f} Mo"
+
+        previous = baseline.get((result["type"], result["rows"]))
+
+        if previous and previous.get("rows_per_second") and result["rows_per_second"]:
+            ratio = result["rows_per_second"] / previous["rows_per_second"]
+            line += f"  ({ratio:.2f}x)"
+
+        if result["status"] != "completed":
+            self.stdout.write(self.style.ERROR(f"{line}  {result['error']}"))
+        else:
+            self.stdout.write(line)
+
+    def handle(self, *args, **options):
+        baseline = {}
+
+        if options["baseline"]:
+            with open(options["baseline"]) as baseline_file:
+                baseline = {
+                    (result["type"], result["rows"]): result
+                    for result in json.load(baseline_file)["results"]
+                }
+
+        hashers = (
+            ["django.contrib.auth.hashers.MD5PasswordHasher"]
+            if options["fast_hasher"]
+            else settings.PASSWORD_HASHERS
+        )
+        results = []
+
+        with override_settings(PASSWORD_HASHERS=hashers):
+            for type in options["types"] or list(IMPORT_TYPES):
+                for rows in options["rows"] or [1000]:
+                    result = self.run_benchmark(type, rows, options)
+                    self.print_result(result, baseline)
+                    results.append(result)
+
+        report = {
+            "meta": {
+                "date": timezone.now().isoformat(),
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "database": connection.vendor,
+                "commit_mode": options["commit_mode"],
+                "chunk_size": options["chunk_size"] or settings.IMPORT_CHUNK_SIZE,
+                "fast_hasher": options["fast_hasher"],
+            },
+            "results": results,
+        }
+
+        if options["output"]:
+            with open(options["output"], "w") as output_file:
+                json.dump(report, output_file, indent=2)
+        else:
+            self.stdout.write(json.dumps(report, indent=2))
@@ -0,0 +1,103 @@
+import time
+import uuid
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from schoolmarksapi.tasks.import_users import (
+    create_users,
+    generate_password,
+    get_default_username,
+)
+
+
+class _Rollback(Exception):
+    pass
+
+
+def create_users_per_row(users_to_create):
+    """Reproduit l'ancien chemin d'import : un create_user + save par ligne."""
+    User = get_user_model()
+
+    with transaction.atomic():
+        for user_data in users_to_create:
+            user_data = dict(user_data)
+            user_role = user_data.pop("role")
+            username = user_data.pop("username", None) or get_default_username(
+                user_data["email"]
+            )
+
+            user = User.objects.create_user(
+                username=username,
+                password=generate_password(),
+                has_changed_password=False,
+                **user_data,
+            )
+
+            if user_role == "admin":
+                user.is_staff = True
+                user.is_superuser = True
+            elif user_role == "teacher":
+                user.is_staff = True
+                user.is_superuser = False
+
+            user.save()
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare le débit (lignes/s) de l'import d'utilisateurs ligne par ligne "
+        "et de l'import par lots. Les utilisateurs créés sont annulés."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000)
+        parser.add_argument(
+            "--skip-per-row",
+            action="store_true",
+            help="Ne mesure que l'import par lots",
+        )
+
+    def generate_rows(self, count):
+        run_id = uuid.uuid4().hex[:8]
+        roles = ("student",) * 18 + ("teacher", "admin")
+
+        return [
+            {
+                "email": f"bench-{run_id}-{index}@schoolmarks.local",
+                "first_name": f"Prénom{index}",
+                "last_name": f"Nom{index}",
+                "role": roles[index % len(roles)],
+            }
+            for index in range(count)
+        ]
+
+    def measure(self, label, func, rows):
+        start = time.perf_counter()
+
+        try:
+            with transaction.atomic():
+                func(rows)
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+        elapsed = time.perf_counter() - start
+        rate = len(rows) / elapsed if elapsed else float("inf")
+        self.stdout.write(f"{label:<10} {elapsed:8.2f}s {rate:10.1f} lignes/s")
+
+        return rate
+
+    def handle(self, *args, **options):
+        rows = self.generate_rows(options["rows"])
+        self.stdout.write(f"Import de {len(rows)} utilisateurs")
+
+        bulk_rate = self.measure("par lots", create_users, rows)
+
+        if options["skip_per_row"]:
+            return
+
+        per_row_rate = self.measure("par ligne", create_users_per_row, rows)
+        self.stdout.write(
+            self.style.SUCCESS(f"Accélération : x{bulk_rate / per_row_rate:.1f}")
+        )
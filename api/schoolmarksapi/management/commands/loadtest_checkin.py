@@ -0,0 +1,364 @@
+import json
+import statistics
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import time as day_time, timedelta
+from importlib import import_module
+from django.conf import settings
+from django.contrib.auth import (
+    BACKEND_SESSION_KEY,
+    HASH_SESSION_KEY,
+    SESSION_KEY,
+    get_user_model,
+)
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import (
+    ThreadedWSGIServer,
+    WSGIRequestHandler,
+    get_internal_wsgi_application,
+)
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+import requests
+
+from common.utils import TOTP
+from schoolmarksapi.models import (
+    CheckinSession,
+    Class,
+    ClassSession,
+    ClassStudent,
+    Course,
+    CourseClassEnrollment,
+)
+from schoolmarksapi.services import attendance_buffer, attendance_feed, checkin_cache
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class QueryCountingApplication:
+    """Application WSGI qui compte les requêtes SQL de chaque requête HTTP."""
+
+    def __init__(self, application):
+        self.application = application
+        self.lock = threading.Lock()
+        self.queries = []
+
+    def __call__(self, environ, start_response):
+        count = 0
+
+        def count_query(execute, sql, params, many, context):
+            nonlocal count
+            count += 1
+            return execute(sql, params, many, context)
+
+        # La connexion est propre au thread qui traite la requête
+        with connection.execute_wrapper(count_query):
+            response = self.application(environ, start_response)
+
+        with self.lock:
+            self.queries.append(count)
+
+        return response
+
+
+def percentile(latencies, rank: int) -> float:
+    if len(latencies) < 2:
+        return latencies[0] if latencies else 0.0
+
+    return statistics.quantiles(latencies, n=100, method="inclusive")[rank - 1]
+
+
+class Command(BaseCommand):
+    help = (
+        "Simule un afflux d'élèves qui s'enregistrent à un appel : crée une "
+        "classe de N élèves et un appel ouvert, démarre un serveur WSGI local "
+        "et envoie les enregistrements en parallèle. Affiche le débit, les "
+        "latences (p50/p95/p99), les erreurs et le nombre de requêtes SQL. Les "
+        "données créées sont supprimées à la fin."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--students", type=int, default=200)
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=50,
+            help="Nombre de requêtes envoyées en parallèle",
+        )
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument(
+            "--port", type=int, default=0, help="Port du serveur (0 = libre)"
+        )
+        parser.add_argument(
+            "--write-behind",
+            action="store_true",
+            help="Active CHECKIN_WRITE_BEHIND pendant le test",
+        )
+        parser.add_argument(
+            "--fake-redis",
+            action="store_true",
+            help="Utilise fakeredis (en mémoire) pour le cache des appels",
+        )
+        parser.add_argument(
+            "--keep", action="store_true", help="Conserve les données créées"
+        )
+        parser.add_argument("--output", help="Fichier JSON de résultats")
+
+    def use_fake_redis(self):
+        try:
+            import fakeredis
+        except ImportError:
+            raise CommandError("--fake-redis nécessite le paquet fakeredis")
+
+        fake_redis = fakeredis.FakeRedis(decode_responses=True)
+        checkin_cache.redis_client = fake_redis
+        attendance_buffer.redis_client = fake_redis
+        attendance_feed.redis_client = fake_redis
+
+    def seed(self, run_id: str, students: int):
+        User = get_user_model()
+        password = make_password(None)
+
+        teacher = User.objects.create(
+            username=f"loadtest-{run_id}-teacher",
+            email=f"loadtest-{run_id}-teacher@schoolmarks.local",
+            password=password,
+            is_staff=True,
+        )
+        users = User.objects.bulk_create(
+            [
+                User(
+                    username=f"loadtest-{run_id}-{index}",
+                    email=f"loadtest-{run_id}-{index}@schoolmarks.local",
+                    password=password,
+                )
+                for index in range(students)
+            ]
+        )
+
+        course = Course.objects.create(
+            name=f"Load test {run_id}", code=f"LT{run_id}", professor=teacher
+        )
+        class_group = Class.objects.create(
+            name=f"Load test {run_id}",
+            code=f"LT{run_id}",
+            year_of_graduation=timezone.now().year,
+        )
+        ClassStudent.objects.bulk_create(
+            [ClassStudent(class_group=class_group, student=user) for user in users]
+        )
+        enrollment = CourseClassEnrollment.objects.create(
+            course=course, class_group=class_group
+        )
+        class_session = ClassSession.objects.create(
+            course=course,
+            class_group=class_group,
+            course_class_enrollment=enrollment,
+            date=timezone.now().date(),
+            start_time=day_time(8),
+            end_time=day_time(10),
+            room="LT",
+        )
+
+        now = timezone.now()
+        checkin_session = CheckinSession.objects.create(
+            class_session=class_session,
+            started_at=now + timedelta(minutes=10),
+            closed_at=now + timedelta(hours=1),
+            created_by=teacher,
+            status="active",
+            secret=TOTP().generate_secret(),
+        )
+        checkin_cache.cache_checkin_session(checkin_session.id)
+
+        return teacher, users, course, class_group, checkin_session
+
+    def create_sessions(self, users):
+        """Cookie de session authentifiée de chaque élève."""
+        SessionStore = import_module(settings.SESSION_ENGINE).SessionStore
+        session_keys = {}
+
+        for user in users:
+            session = SessionStore()
+            session[SESSION_KEY] = str(user.pk)
+            session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+            session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+            session.create()
+            session_keys[user.pk] = session.session_key
+
+        return session_keys
+
+    def cleanup(
+        self, teacher, users, course, class_group, checkin_session, session_keys
+    ):
+        SessionStore = import_module(settings.SESSION_ENGINE).SessionStore
+        class_session_id = checkin_session.class_session_id
+        class_id = class_group.id
+
+        for session_key in session_keys.values():
+            SessionStore(session_key).delete()
+
+        # Les séances, appels et présences suivent la classe et le cours
+        class_group.delete()
+        course.delete()
+        get_user_model().objects.filter(
+            pk__in=[teacher.pk, *[user.pk for user in users]]
+        ).delete()
+
+        attendance_buffer.redis_client.delete(
+            checkin_cache.get_session_key(checkin_session.id),
+            checkin_cache.get_roster_key(checkin_session.id),
+            attendance_buffer.get_buffer_key(class_session_id),
+            attendance_buffer.get_registered_key(class_session_id),
+            checkin_cache.get_class_index_key(class_id),
+        )
+        attendance_buffer.redis_client.srem(
+            attendance_buffer.BUFFERED_INDEX_KEY, str(class_session_id)
+        )
+
+    def register(self, url: str, session_key: str, secret: str):
+        start = time.perf_counter()
+
+        try:
+            response = requests.post(
+                url,
+                json={"totp_code": TOTP().generate_token(secret)},
+                cookies={settings.SESSION_COOKIE_NAME: session_key},
+                timeout=60,
+            )
+        except requests.RequestException as e:
+            return time.perf_counter() - start, type(e).__name__
+
+        latency = time.perf_counter() - start
+
+        if response.status_code == 200:
+            return latency, "200"
+
+        try:
+            body = response.json()
+            message = body.get("message") or body.get("detail") or ""
+        except ValueError:
+            message = ""
+
+        return latency, f"{response.status_code} {message}".strip()
+
+    def handle(self, *args, **options):
+        if options["fake_redis"]:
+            self.use_fake_redis()
+
+        if options["write_behind"]:
+            settings.CHECKIN_WRITE_BEHIND = True
+
+        run_id = uuid.uuid4().hex[:8]
+        teacher, users, course, class_group, checkin_session = self.seed(
+            run_id, options["students"]
+        )
+        session_keys = {}
+
+        try:
+            session_keys = self.create_sessions(users)
+
+            application = QueryCountingApplication(get_internal_wsgi_application())
+            server = ThreadedWSGIServer(
+                (options["host"], options["port"]),
+                QuietRequestHandler,
+                allow_reuse_address=False,
+            )
+            server.set_app(application)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+
+            host, port = server.server_address[:2]
+            url = (
+                f"http://{host}:{port}"
+                f"{reverse('checkinsession-register', args=[checkin_session.id])}"
+            )
+
+            try:
+                start = time.perf_counter()
+
+                with ThreadPoolExecutor(max_workers=options["concurrency"]) as executor:
+                    outcomes = list(
+                        executor.map(
+                            lambda user: self.register(
+                                url, session_keys[user.pk], checkin_session.secret
+                            ),
+                            users,
+                        )
+                    )
+
+                seconds = time.perf_counter() - start
+            finally:
+                server.shutdown()
+                server.server_close()
+
+            flush_seconds = None
+
+            if settings.CHECKIN_WRITE_BEHIND:
+                start = time.perf_counter()
+                attendance_buffer.flush_attendance_buffer(
+                    checkin_session.class_session_id
+                )
+                flush_seconds = round(time.perf_counter() - start, 4)
+
+            attendances = checkin_session.class_session.attendances.count()
+        finally:
+            if not options["keep"]:
+                self.cleanup(
+                    teacher, users, course, class_group, checkin_session, session_keys
+                )
+
+        latencies = sorted(latency * 1000 for latency, _ in outcomes)
+        queries = application.queries
+        report = {
+            "meta": {
+                "date": timezone.now().isoformat(),
+                "database": connection.vendor,
+                "students": len(users),
+                "concurrency": options["concurrency"],
+                "write_behind": settings.CHECKIN_WRITE_BEHIND,
+                "fake_redis": options["fake_redis"],
+            },
+            "seconds": round(seconds, 4),
+            "requests_per_second": round(len(outcomes) / seconds, 1),
+            "latency_ms": {
+                "p50": round(percentile(latencies, 50), 2),
+                "p95": round(percentile(latencies, 95), 2),
+                "p99": round(percentile(latencies, 99), 2),
+                "max": round(latencies[-1], 2) if latencies else 0.0,
+            },
+            "responses": dict(Counter(outcome for _, outcome in outcomes)),
+            "queries": {
+                "total": sum(queries),
+                "per_request": round(sum(queries) / len(queries), 2) if queries else 0,
+                "max": max(queries, default=0),
+            },
+            "attendances": attendances,
+            "flush_seconds": flush_seconds,
+        }
+
+        self.stdout.write(
+            f"{len(outcomes)} requêtes en {report['seconds']:.2f}s "
+            f"({report['requests_per_second']} req/s), "
+            f"p50 {report['latency_ms']['p50']} ms, "
+            f"p95 {report['latency_ms']['p95']} ms, "
+            f"p99 {report['latency_ms']['p99']} ms, "
+            f"{report['queries']['per_request']} requêtes SQL par appel"
+        )
+
+        for outcome, count in report["responses"].items():
+            style = self.style.SUCCESS if outcome == "200" else self.style.ERROR
+            self.stdout.write(style(f"  {count:>6}  {outcome}"))
+
+        if options["output"]:
+            with open(options["output"], "w") as output_file:
+                json.dump(report, output_file, indent=2)
+        else:
+            self.stdout.write(json.dumps(report, indent=2))
@@ -0,0 +1,31 @@
+import time
+from django.core.management.base import BaseCommand
+
+from schoolmarksapi.services.attendance_summary import rebuild_attendance_summaries
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcule les totaux de présences par élève et par cours "
+        "(AttendanceSummary) à partir des enregistrements. À lancer après la "
+        "création de la table ou une modification des enregistrements hors "
+        "de l'application."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--course",
+            action="append",
+            dest="courses",
+            help="Identifiant d'un cours à recalculer (répétable, tous par défaut)",
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        count = rebuild_attendance_summaries(options["courses"])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{count} totaux recalculés en {time.perf_counter() - start:.2f}s"
+            )
+        )
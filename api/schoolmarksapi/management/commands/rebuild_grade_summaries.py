@@ -0,0 +1,36 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from schoolmarksapi.services.grade_summary import refresh_grade_summaries
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcule les totaux de notes par élève et par cours (GradeSummary) "
+        "à partir des notes. À lancer après la création de la table ou une "
+        "modification des notes hors de l'application."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--course",
+            action="append",
+            dest="courses",
+            help="Identifiant d'un cours à recalculer (répétable, tous par défaut)",
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+
+        with transaction.atomic():
+            count = sum(
+                refresh_grade_summaries(course_id)
+                for course_id in options["courses"] or [None]
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{count} totaux recalculés en {time.perf_counter() - start:.2f}s"
+            )
+        )
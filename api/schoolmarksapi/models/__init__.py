@@ -8,3 +8,5 @@ from .class_student import ClassStudent
 from .assessment import Assessment
 from .student_grade import StudentGrade
 from .course_class_enrollment import CourseClassEnrollment
+from .attendance_summary import AttendanceSummary
+from .grade_summary import GradeSummary
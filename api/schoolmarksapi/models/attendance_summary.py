@@ -0,0 +1,35 @@
+from django.db import models
+from schoolmarksapi.models import User, Course
+import uuid
+
+
+class AttendanceSummary(models.Model):
+    """
+    Totaux des enregistrements d'un élève dans un cours, tenus à jour dans la
+    transaction qui écrit les enregistrements (voir
+    ``services.attendance_summary``).
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    student = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="attendance_summaries"
+    )
+    course = models.ForeignKey(
+        Course, on_delete=models.CASCADE, related_name="attendance_summaries"
+    )
+    present_count = models.IntegerField(default=0)
+    late_count = models.IntegerField(default=0)
+    absent_count = models.IntegerField(default=0)
+    minutes_late = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["student", "course"], name="unique_attendance_summary"
+            )
+        ]
+        verbose_name_plural = "Attendance summaries"
+
+    def __str__(self):
+        return f"{self.student.username} in {self.course.code}"
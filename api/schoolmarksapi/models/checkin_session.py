@@ -15,3 +15,11 @@ class CheckinSession(models.Model):
     )
     status = models.CharField(max_length=50)
     secret = models.CharField(max_length=32, null=True, blank=True, db_index=True)
+
+    class Meta:
+        # Appels à fermer : status = "active" et closed_at passé
+        indexes = [
+            models.Index(
+                fields=["status", "closed_at"], name="checkin_status_closed_at_idx"
+            )
+        ]
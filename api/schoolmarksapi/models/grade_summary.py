@@ -0,0 +1,42 @@
+from django.db import models
+from schoolmarksapi.models import User, Course
+import uuid
+
+
+class GradeSummary(models.Model):
+    """
+    Totaux des notes d'un élève dans un cours, recalculés pour les élèves
+    concernés à chaque écriture de notes (voir ``services.grade_summary``).
+    Les notes minimale, maximale et la moyenne sont ramenées sur 20.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    student = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="grade_summaries"
+    )
+    course = models.ForeignKey(
+        Course, on_delete=models.CASCADE, related_name="grade_summaries"
+    )
+    # Somme des value / max_value × coef
+    weighted_sum = models.FloatField()
+    coef_total = models.FloatField()
+    grades_count = models.PositiveIntegerField()
+    min_grade = models.FloatField()
+    max_grade = models.FloatField()
+    average = models.FloatField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["student", "course"], name="unique_grade_summary"
+            )
+        ]
+        # Classement des élèves d'un cours
+        indexes = [
+            models.Index(fields=["course", "-average"], name="grade_summary_rank_idx")
+        ]
+        verbose_name_plural = "Grade summaries"
+
+    def __str__(self):
+        return f"{self.student.username} in {self.course.code}"
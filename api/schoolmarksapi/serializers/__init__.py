@@ -2,9 +2,11 @@ from .assessment_serializer import AssessmentSerializer, AssessmentInputSerializ
 from .attendance_serializer import (
     AttendanceSerializer,
 )
+from .attendance_summary_serializer import AttendanceSummarySerializer
 from .checkin_session_serializer import (
     CheckinSessionSerializer,
     CheckinSessionInputSerializer,
+    CheckinSessionRegisterSerializer,
 )
 from .course_serializer import (
     CourseSerializer,
@@ -18,6 +20,7 @@ from .user_serializer import UserSerializer, UserInputSerializer
 from .class_session_serializer import (
     ClassSessionSerializer,
     ClassSessionInputSerializer,
+    GenerateClassSessionsSerializer,
 )
 from .class_serializer import (
     ClassSerializer,
@@ -30,3 +33,4 @@ from .class_serializer import (
 )
 from .course_class_enrollment_serializer import CourseClassEnrollmentSerializer
 from .class_student_serializer import ClassStudentSerializer
+from .grade_summary_serializer import GradeSummarySerializer
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from django.db import transaction
+from django.utils import timezone
 from schoolmarksapi.models import Assessment, StudentGrade, Course, Class
 from schoolmarksapi.serializers.class_serializer import ClassSerializer
 from schoolmarksapi.serializers.course_serializer import CourseSerializer
@@ -7,6 +8,7 @@ from schoolmarksapi.serializers.student_grade_serializer import (
     StudentGradeSerializer,
     StudentGradeInputSerializer,
 )
+from schoolmarksapi.services.grade_summary import refresh_grade_summaries
 
 
 class AssessmentSerializer(serializers.ModelSerializer):
@@ -97,8 +99,11 @@ class AssessmentInputSerializer(serializers.Serializer):
                 {"max_value": "Maximum value must be positive"}
             )
 
-        # Validate student grades if provided
+        # Validate student grades if provided. Les notes sont écrites en masse
+        # sans StudentGrade.clean() : elles sont entièrement validées ici
         if "student_grades" in data and data["student_grades"]:
+            student_ids = set()
+
             for grade in data["student_grades"]:
                 if grade["value"] > data["max_value"]:
                     raise serializers.ValidationError(
@@ -107,6 +112,15 @@ class AssessmentInputSerializer(serializers.Serializer):
                         }
                     )
 
+                if grade["student_id"] in student_ids:
+                    raise serializers.ValidationError(
+                        {
+                            "student_grades": f"Student {grade['student_id']} has more than one grade"
+                        }
+                    )
+
+                student_ids.add(grade["student_id"])
+
         return data
 
     @transaction.atomic
@@ -127,13 +141,22 @@ class AssessmentInputSerializer(serializers.Serializer):
         )
 
         # Create student grades
-        for grade_data in student_grades_data:
-            StudentGrade.objects.create(
-                assessment=assessment,
-                student_id=grade_data["student_id"],
-                value=grade_data["value"],
-                comment=grade_data.get("comment", ""),
-            )
+        StudentGrade.objects.bulk_create(
+            [
+                StudentGrade(
+                    assessment=assessment,
+                    student_id=grade_data["student_id"],
+                    value=grade_data["value"],
+                    comment=grade_data.get("comment", ""),
+                )
+                for grade_data in student_grades_data
+            ]
+        )
+
+        refresh_grade_summaries(
+            assessment.course_id,
+            [grade_data["student_id"] for grade_data in student_grades_data],
+        )
 
         # Only return the assessment
         return assessment
@@ -150,6 +173,18 @@ class AssessmentInputSerializer(serializers.Serializer):
         validated_data.pop("course_id", None)
         validated_data.pop("class_id", None)
 
+        # Un changement de barème modifie les totaux de tous les élèves notés
+        student_ids = set()
+        scale = (
+            validated_data.get("coef", instance.coef),
+            validated_data.get("max_value", instance.max_value),
+        )
+
+        if scale != (instance.coef, instance.max_value):
+            student_ids.update(
+                instance.student_grades.values_list("student_id", flat=True)
+            )
+
         # Update assessment fields
         instance.name = validated_data.get("name", instance.name)
         instance.coef = validated_data.get("coef", instance.coef)
@@ -157,31 +192,54 @@ class AssessmentInputSerializer(serializers.Serializer):
         instance.description = validated_data.get("description", instance.description)
         instance.save()
 
-        # Update or create student grades
+        # Notes existantes chargées en une requête
+        grade_ids = [
+            grade_data["grade_id"]
+            for grade_data in student_grades_data
+            if grade_data.get("grade_id")
+        ]
+        existing_grades = StudentGrade.objects.filter(
+            pk__in=grade_ids, assessment=instance
+        ).in_bulk()
+
+        updated_grades = []
+        new_grades = []
+        now = timezone.now()
+
         for grade_data in student_grades_data:
-            grade_id = grade_data.get("grade_id")
-            if grade_id:
+            grade = existing_grades.get(grade_data.get("grade_id"))
+
+            if grade is not None:
                 # Update existing grade
-                try:
-                    grade = StudentGrade.objects.get(pk=grade_id, assessment=instance)
-                    grade.value = grade_data["value"]
-                    grade.comment = grade_data.get("comment", grade.comment)
-                    grade.save()
-                except StudentGrade.DoesNotExist:
-                    # If grade with this ID doesn't exist, create a new one
-                    StudentGrade.objects.create(
+                grade.value = grade_data["value"]
+                grade.comment = grade_data.get("comment", grade.comment)
+                grade.updated_at = now
+                updated_grades.append(grade)
+                student_ids.add(grade.student_id)
+            else:
+                # If grade with this ID doesn't exist, create a new one
+                new_grades.append(
+                    StudentGrade(
                         assessment=instance,
                         student_id=grade_data["student_id"],
                         value=grade_data["value"],
                         comment=grade_data.get("comment", ""),
                     )
-            else:
-                # Create new grade
-                StudentGrade.objects.create(
-                    assessment=instance,
-                    student_id=grade_data["student_id"],
-                    value=grade_data["value"],
-                    comment=grade_data.get("comment", ""),
                 )
+                student_ids.add(grade_data["student_id"])
+
+        StudentGrade.objects.bulk_update(
+            updated_grades, ["value", "comment", "updated_at"]
+        )
+        # Un élève déjà noté sans grade_id : la contrainte unique
+        # (assessment, student) transforme l'insertion en mise à jour
+        StudentGrade.objects.bulk_create(
+            new_grades,
+            update_conflicts=True,
+            unique_fields=["assessment", "student"],
+            update_fields=["value", "comment", "updated_at"],
+        )
+
+        refresh_grade_summaries(instance.course_id, student_ids)
 
         return instance
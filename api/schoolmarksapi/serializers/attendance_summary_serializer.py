@@ -0,0 +1,20 @@
+from rest_framework import serializers
+from schoolmarksapi.models import AttendanceSummary
+from .user_serializer import UserSerializer
+
+
+class AttendanceSummarySerializer(serializers.ModelSerializer):
+    student = UserSerializer(read_only=True)
+
+    class Meta:
+        model = AttendanceSummary
+        fields = [
+            "id",
+            "student",
+            "course",
+            "present_count",
+            "late_count",
+            "absent_count",
+            "minutes_late",
+            "updated_at",
+        ]
@@ -25,3 +25,8 @@ class CheckinSessionInputSerializer(serializers.ModelSerializer):
             "created_by",
             "status",
         ]
+
+
+class CheckinSessionRegisterSerializer(serializers.Serializer):
+    # Code TOTP à 6 chiffres ASCII (\d accepterait d'autres chiffres Unicode)
+    totp_code = serializers.RegexField(r"^[0-9]{6}$", min_length=6, max_length=6)
@@ -7,6 +7,7 @@ from schoolmarksapi.models import (
     CourseClassEnrollment,
 )
 from schoolmarksapi.serializers.user_serializer import UserSerializer
+from schoolmarksapi.services.checkin_cache import invalidate_class_checkin_sessions
 from drf_spectacular.utils import extend_schema_field
 from django.db import transaction
 
@@ -156,6 +157,7 @@ class ClassCreateWithStudentsSerializer(serializers.Serializer):
                 ]
 
                 ClassStudent.objects.bulk_create(new_enrollments)
+                invalidate_class_checkin_sessions([instance.id])
 
         # Update courses if provided
         if (
@@ -185,6 +187,7 @@ class ClassCreateWithStudentsSerializer(serializers.Serializer):
                 ]
 
                 CourseClassEnrollment.objects.bulk_create(new_enrollments)
+                invalidate_class_checkin_sessions([instance.id])
 
         # Return the updated instance and information about the changes
         return {
@@ -41,3 +41,48 @@ class ClassSessionInputSerializer(serializers.ModelSerializer):
     class Meta:
         model = ClassSession
         fields = ["course_id", "class_id", "date", "start_time", "end_time", "room"]
+
+
+class ClassSessionRecurrenceSerializer(serializers.Serializer):
+    """Séances hebdomadaires d'un cours pour une classe"""
+
+    course_id = serializers.UUIDField()
+    class_id = serializers.UUIDField()
+    weekday = serializers.IntegerField(
+        min_value=0, max_value=6, help_text="0 = lundi ... 6 = dimanche"
+    )
+    start_time = serializers.TimeField()
+    end_time = serializers.TimeField()
+    room = serializers.CharField(max_length=50)
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    exclusions = serializers.ListField(
+        child=serializers.DateField(),
+        required=False,
+        default=list,
+        help_text="Dates sans séance pour cette règle",
+    )
+
+    def validate(self, data):
+        if data["end_time"] <= data["start_time"]:
+            raise serializers.ValidationError(
+                {"end_time": "L'heure de fin doit être après l'heure de début"}
+            )
+
+        if data["end_date"] < data["start_date"]:
+            raise serializers.ValidationError(
+                {"end_date": "La date de fin doit être après la date de début"}
+            )
+
+        return data
+
+
+class GenerateClassSessionsSerializer(serializers.Serializer):
+    rules = ClassSessionRecurrenceSerializer(many=True, allow_empty=False)
+    exclusions = serializers.ListField(
+        child=serializers.DateField(),
+        required=False,
+        default=list,
+        help_text="Dates sans séance pour toutes les règles (jours fériés, vacances...)",
+    )
+    dry_run = serializers.BooleanField(default=False)
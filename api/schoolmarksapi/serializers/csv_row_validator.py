@@ -0,0 +1,160 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from django.core.exceptions import ImproperlyConfigured
+from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework import serializers
+
+
+class RowFieldError(Exception):
+    def __init__(self, messages: List[str]):
+        self.messages = messages
+
+
+def _fail(field: serializers.Field, key: str, **kwargs):
+    raise RowFieldError([str(field.error_messages[key]).format(**kwargs)])
+
+
+def _run_validators(field: serializers.Field, value: Any):
+    messages = []
+
+    for validator in field.validators:
+        try:
+            if getattr(validator, "requires_context", False):
+                validator(value, field)
+            else:
+                validator(value)
+        except DjangoValidationError as e:
+            messages.extend(e.messages)
+        except serializers.ValidationError as e:
+            messages.extend(str(detail) for detail in e.detail)
+
+    if messages:
+        raise RowFieldError(messages)
+
+
+def _compile_char_field(field: serializers.CharField) -> Callable[[Any], Any]:
+    allow_blank = field.allow_blank
+    trim_whitespace = field.trim_whitespace
+
+    def check(value):
+        if value == "" or (trim_whitespace and str(value).strip() == ""):
+            if not allow_blank:
+                _fail(field, "blank")
+            return ""
+
+        if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+            _fail(field, "invalid")
+
+        value = str(value)
+        if trim_whitespace:
+            value = value.strip()
+
+        _run_validators(field, value)
+        return value
+
+    return check
+
+
+def _compile_integer_field(field: serializers.IntegerField) -> Callable[[Any], Any]:
+    re_decimal = field.re_decimal
+    max_string_length = field.MAX_STRING_LENGTH
+
+    def check(value):
+        if isinstance(value, str) and len(value) > max_string_length:
+            _fail(field, "max_string_length")
+
+        try:
+            value = int(re_decimal.sub("", str(value)))
+        except (ValueError, TypeError):
+            _fail(field, "invalid")
+
+        if field.validators:
+            _run_validators(field, value)
+        return value
+
+    return check
+
+
+def _compile_choice_field(field: serializers.ChoiceField) -> Callable[[Any], Any]:
+    choices = dict(field.choice_strings_to_values)
+    allow_blank = field.allow_blank
+
+    def check(value):
+        if value == "" and allow_blank:
+            return ""
+
+        try:
+            return choices[str(value)]
+        except KeyError:
+            _fail(field, "invalid_choice", input=value)
+
+    return check
+
+
+class CompiledRowValidator:
+    """
+    Valide des lignes CSV (dict de chaînes) comme le ferait le serializer
+    ``serializer_class``, sans instancier de serializer par ligne.
+
+    Les champs du serializer sont lus une seule fois et transformés en
+    fonctions de validation (email, entier, choix...) qui réutilisent leurs
+    validateurs et leurs messages d'erreur : les données validées et les
+    erreurs sont identiques à celles de DRF. Seuls les champs ``CharField``
+    (dont ``EmailField``), ``IntegerField`` et ``ChoiceField`` sont pris en
+    charge.
+    """
+
+    def __init__(self, serializer_class):
+        if serializer_class.validate is not serializers.Serializer.validate or any(
+            name.startswith("validate_") for name in vars(serializer_class)
+        ):
+            raise ImproperlyConfigured(
+                f"{serializer_class.__name__} définit des validations personnalisées"
+            )
+
+        self._fields = [
+            (name, field, self._compile_field(field))
+            for name, field in serializer_class().fields.items()
+            if not field.read_only
+        ]
+
+    def _compile_field(self, field: serializers.Field) -> Callable[[Any], Any]:
+        if isinstance(field, serializers.ChoiceField):
+            return _compile_choice_field(field)
+        if isinstance(field, serializers.CharField):
+            return _compile_char_field(field)
+        if isinstance(field, serializers.IntegerField):
+            return _compile_integer_field(field)
+
+        raise ImproperlyConfigured(
+            f"Type de champ non pris en charge : {type(field).__name__}"
+        )
+
+    def validate(self, row: Dict) -> Tuple[Optional[Dict], Optional[Dict]]:
+        """Retourne ``(validated_data, None)`` ou ``(None, errors)``."""
+        data = {}
+        errors = {}
+
+        for name, field, check in self._fields:
+            if name not in row:
+                if field.required:
+                    errors[name] = [str(field.error_messages["required"])]
+                continue
+
+            value = row[name]
+
+            if value is None:
+                if field.allow_null:
+                    data[name] = None
+                else:
+                    errors[name] = [str(field.error_messages["null"])]
+                continue
+
+            try:
+                data[name] = check(value)
+            except RowFieldError as e:
+                errors[name] = e.messages
+
+        if errors:
+            return None, errors
+
+        return data, None
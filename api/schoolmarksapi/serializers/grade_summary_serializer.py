@@ -0,0 +1,23 @@
+from rest_framework import serializers
+from schoolmarksapi.models import GradeSummary
+from .user_serializer import UserSerializer
+
+
+class GradeSummarySerializer(serializers.ModelSerializer):
+    student = UserSerializer(read_only=True)
+    rank = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = GradeSummary
+        fields = [
+            "id",
+            "student",
+            "course",
+            "average",
+            "rank",
+            "grades_count",
+            "coef_total",
+            "min_grade",
+            "max_grade",
+            "updated_at",
+        ]
@@ -1,19 +1,36 @@
 from rest_framework import serializers
-from drf_spectacular.utils import (
-    extend_schema_field,
-)
+from schoolmarksapi.serializers.csv_row_validator import CompiledRowValidator
 
 
 STATUS_CHOICES = ("processing", "completed", "failed")
+COMMIT_MODE_CHOICES = ("atomic", "chunked")
+RESULTS_OUTPUT_CHOICES = ("csv", "ndjson")
+# sync : import des élèves des classes, qui remplace la composition des classes
+WRITE_MODE_CHOICES = ("insert", "upsert", "sync")
 
 
 class ImportSerializer(serializers.Serializer):
     file = serializers.FileField()
-
-
-@extend_schema_field({"type": "array", "items": {"type": "object"}})
-class JSONArrayField(serializers.JSONField):
-    pass
+    commit_mode = serializers.ChoiceField(
+        choices=COMMIT_MODE_CHOICES,
+        default="atomic",
+        help_text="atomic : tout ou rien. chunked : les lignes sont commitées par paquets et l'import peut reprendre au dernier paquet commité.",
+    )
+    chunk_size = serializers.IntegerField(
+        min_value=1,
+        max_value=10000,
+        required=False,
+        help_text="Nombre de lignes par paquet",
+    )
+    write_mode = serializers.ChoiceField(
+        choices=("insert", "upsert"),
+        default="insert",
+        help_text="insert : une ligne déjà existante fait échouer l'import. upsert : les lignes existantes (même code ou email) sont mises à jour.",
+    )
+    dry_run = serializers.BooleanField(
+        default=False,
+        help_text="Calcule les lignes à insérer, mettre à jour et inchangées sans rien écrire",
+    )
 
 
 class ImportResultsField(serializers.JSONField):
@@ -30,16 +47,46 @@ class ImportResultsField(serializers.JSONField):
         }
 
 
+class ClassStudentsImportSerializer(serializers.Serializer):
+    file = serializers.FileField()
+    chunk_size = serializers.IntegerField(
+        min_value=1,
+        max_value=10000,
+        required=False,
+        help_text="Nombre de lignes par paquet",
+    )
+    dry_run = serializers.BooleanField(
+        default=False,
+        help_text="Calcule les élèves à ajouter et à retirer sans rien écrire",
+    )
+
+
+class ImportDiffSerializer(serializers.Serializer):
+    inserted = serializers.IntegerField()
+    updated = serializers.IntegerField()
+    unchanged = serializers.IntegerField()
+    deleted = serializers.IntegerField()
+
+
 class ImportStatusSerializer(serializers.Serializer):
-    TYPE_CHOICES = ("users", "classes", "courses")
+    TYPE_CHOICES = ("users", "classes", "courses", "class_students", "class_sessions")
 
     import_id = serializers.CharField()
     type = serializers.ChoiceField(choices=TYPE_CHOICES)
     status = serializers.ChoiceField(choices=STATUS_CHOICES)
     progress = serializers.IntegerField()
+    commit_mode = serializers.ChoiceField(choices=COMMIT_MODE_CHOICES)
+    checkpoint = serializers.IntegerField(
+        help_text="Nombre de lignes commitées", required=False
+    )
+    write_mode = serializers.ChoiceField(choices=WRITE_MODE_CHOICES, required=False)
+    dry_run = serializers.BooleanField(required=False)
+    diff = ImportDiffSerializer(required=False)
     imported_by = serializers.CharField()
 
-    results = JSONArrayField()
+    results_count = serializers.IntegerField(
+        help_text="Nombre de lignes dans les résultats (import/<id>/results/)"
+    )
 
     error = serializers.CharField(required=False, allow_null=True)
     warnings = serializers.ListField(
@@ -72,6 +119,18 @@ class CourseCSVRowSerializer(serializers.Serializer):
     teacher_email = serializers.EmailField()
 
 
+class ClassStudentCSVRowSerializer(serializers.Serializer):
+    class_code = serializers.CharField(max_length=50)
+    student_email = serializers.EmailField()
+
+
+# Validateurs construits une seule fois à partir des serializers de lignes
+USER_CSV_ROW_VALIDATOR = CompiledRowValidator(UserCSVRowSerializer)
+CLASS_CSV_ROW_VALIDATOR = CompiledRowValidator(ClassCSVRowSerializer)
+COURSE_CSV_ROW_VALIDATOR = CompiledRowValidator(CourseCSVRowSerializer)
+CLASS_STUDENT_CSV_ROW_VALIDATOR = CompiledRowValidator(ClassStudentCSVRowSerializer)
+
+
 class CreateImportResponse(serializers.Serializer):
     import_id = serializers.UUIDField()
     status = serializers.ChoiceField(choices=STATUS_CHOICES)
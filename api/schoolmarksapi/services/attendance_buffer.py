@@ -0,0 +1,216 @@
+from datetime import datetime
+from functools import partial
+from typing import Dict, Iterable, List
+from uuid import UUID
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from redis.exceptions import RedisError, WatchError
+
+from common.redis_pool import get_redis, pipeline
+from schoolmarksapi.models import Attendance, ClassSession
+from schoolmarksapi.services.attendance_summary import update_attendance_summaries
+
+redis_client = get_redis(decode_responses=True)
+
+# Séances dont le tampon contient des enregistrements à écrire en base
+BUFFERED_INDEX_KEY = "attendances:buffered"
+
+
+def get_buffer_key(class_session_id) -> str:
+    return f"attendances_{class_session_id}:buffer"
+
+
+# Élèves déjà enregistrés à une séance (en base ou dans le tampon)
+def get_registered_key(class_session_id) -> str:
+    return f"attendances_{class_session_id}:students"
+
+
+def get_checkin_ttl(closed_at: datetime) -> int:
+    """Durée de vie des clés d'un appel : ``CHECKIN_CACHE_GRACE`` secondes après sa fermeture."""
+    return settings.CHECKIN_CACHE_GRACE + max(
+        int((closed_at - timezone.now()).total_seconds()), 0
+    )
+
+
+def buffer_attendance(attendance: Attendance, closed_at: datetime) -> bool:
+    """
+    Ajoute un enregistrement au tampon de sa séance (un flux Redis). Retourne
+    False si l'élève est déjà enregistré à la séance.
+
+    L'ensemble des élèves enregistrés tient lieu de contrainte unique
+    (student, class_session) tant que l'enregistrement n'est pas en base.
+    Les deux clés expirent avec le cache de l'appel (``closed_at``). Si
+    l'écriture dans le flux échoue, l'élève est retiré de l'ensemble : il
+    peut s'enregistrer à nouveau.
+    """
+    class_session_id = attendance.class_session_id
+    registered_key = get_registered_key(class_session_id)
+    buffer_key = get_buffer_key(class_session_id)
+    ttl = get_checkin_ttl(closed_at)
+
+    replies = []
+
+    with pipeline(redis_client, replies=replies) as pipe:
+        pipe.sadd(registered_key, attendance.student_id)
+        pipe.expire(registered_key, ttl)
+
+    if not replies[0]:
+        return False
+
+    try:
+        with pipeline(redis_client) as pipe:
+            pipe.xadd(
+                buffer_key,
+                {
+                    "id": str(attendance.id),
+                    "student_id": attendance.student_id,
+                    "status": attendance.status,
+                    "minutes_late": attendance.minutes_late,
+                    "checked_in_at": attendance.checked_in_at.isoformat(),
+                },
+            )
+            pipe.expire(buffer_key, ttl)
+            pipe.sadd(BUFFERED_INDEX_KEY, str(class_session_id))
+    except RedisError:
+        forget_registered_student(class_session_id, attendance.student_id)
+        raise
+
+    return True
+
+
+def _build_attendance(class_session_id, fields: Dict[str, str]) -> Attendance:
+    return Attendance(
+        id=UUID(fields["id"]),
+        class_session_id=class_session_id,
+        student_id=int(fields["student_id"]),
+        status=fields["status"],
+        minutes_late=int(fields["minutes_late"]),
+        checked_in_at=datetime.fromisoformat(fields["checked_in_at"]),
+    )
+
+
+def read_buffered_attendances(class_session_id) -> List[Attendance]:
+    """Enregistrements d'une séance pas encore écrits en base (non sauvegardés)."""
+    return [
+        _build_attendance(class_session_id, fields)
+        for _, fields in redis_client.xrange(get_buffer_key(class_session_id))
+    ]
+
+
+def forget_registered_student(class_session_id, student_id):
+    """Permet à un élève dont l'enregistrement a été supprimé de s'enregistrer à nouveau."""
+    redis_client.srem(get_registered_key(class_session_id), student_id)
+
+
+def _remove_flushed_entries(class_session_id, entry_ids: List[str]):
+    redis_client.xdel(get_buffer_key(class_session_id), *entry_ids)
+
+
+def _remove_empty_buffer(class_session_id):
+    key = get_buffer_key(class_session_id)
+
+    # Supprime le flux vide et retire la séance de l'index, sauf si un
+    # enregistrement vient d'arriver
+    with redis_client.pipeline() as pipe:
+        try:
+            pipe.watch(key)
+
+            if pipe.xlen(key) == 0:
+                pipe.multi()
+                pipe.delete(key)
+                pipe.srem(BUFFERED_INDEX_KEY, str(class_session_id))
+                pipe.execute()
+        except WatchError:
+            pass
+
+
+def flush_attendance_buffer(class_session_id) -> int:
+    """
+    Écrit en base les enregistrements du tampon d'une séance, par paquets de
+    ``CHECKIN_FLUSH_BATCH_SIZE``, et retourne leur nombre.
+
+    Les entrées ne sont retirées du flux qu'après le commit de leur paquet :
+    appelée dans une transaction (fermeture d'un appel), elles restent dans
+    le tampon si cette transaction est annulée. Si deux vidages se
+    chevauchent, ``ignore_conflicts`` écarte les doublons. Seuls les
+    enregistrements réellement insérés sont ajoutés aux totaux par élève.
+    """
+    key = get_buffer_key(class_session_id)
+    last_entry_id = None
+    flushed = 0
+
+    while True:
+        # Les entrées lues restent dans le flux jusqu'au commit : la lecture
+        # reprend après la dernière (borne exclusive)
+        entries = redis_client.xrange(
+            key,
+            min=f"({last_entry_id}" if last_entry_id else "-",
+            count=settings.CHECKIN_FLUSH_BATCH_SIZE,
+        )
+
+        if not entries:
+            break
+
+        attendances = [
+            _build_attendance(class_session_id, fields) for _, fields in entries
+        ]
+
+        with transaction.atomic():
+            # Verrouille la séance : deux vidages simultanés ne comptent pas
+            # deux fois les mêmes enregistrements dans les totaux
+            course_id = (
+                ClassSession.objects.select_for_update(no_key=True)
+                .filter(id=class_session_id)
+                .values_list("course_id", flat=True)
+                .first()
+            )
+
+            # Séance supprimée entre-temps : ses enregistrements sont abandonnés
+            if course_id is None:
+                redis_client.delete(key)
+                break
+
+            attendance_ids = [attendance.id for attendance in attendances]
+            existing_ids = set(
+                Attendance.objects.filter(id__in=attendance_ids).values_list(
+                    "id", flat=True
+                )
+            )
+
+            Attendance.objects.bulk_create(attendances, ignore_conflicts=True)
+
+            inserted_ids = (
+                set(
+                    Attendance.objects.filter(id__in=attendance_ids).values_list(
+                        "id", flat=True
+                    )
+                )
+                - existing_ids
+            )
+            update_attendance_summaries(
+                [
+                    attendance
+                    for attendance in attendances
+                    if attendance.id in inserted_ids
+                ],
+                {str(class_session_id): course_id},
+            )
+            transaction.on_commit(
+                partial(
+                    _remove_flushed_entries,
+                    class_session_id,
+                    [entry_id for entry_id, _ in entries],
+                )
+            )
+
+        last_entry_id = entries[-1][0]
+        flushed += len(entries)
+
+    transaction.on_commit(partial(_remove_empty_buffer, class_session_id))
+
+    return flushed
+
+
+def get_buffered_class_sessions() -> Iterable[str]:
+    return redis_client.smembers(BUFFERED_INDEX_KEY)
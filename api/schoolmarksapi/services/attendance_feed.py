@@ -0,0 +1,41 @@
+import json
+import logging
+from functools import partial
+from typing import Dict
+from django.db import transaction
+from redis import RedisError
+from rest_framework.utils.encoders import JSONEncoder
+
+from common.redis_pool import get_redis
+
+logger = logging.getLogger(__name__)
+
+redis_client = get_redis(decode_responses=True)
+
+
+def get_feed_channel(class_session_id) -> str:
+    return f"attendances_{class_session_id}:feed"
+
+
+def _publish(channel: str, message: str):
+    try:
+        redis_client.publish(channel, message)
+    except RedisError as e:
+        logger.warning(f"Diffusion sur {channel} impossible ({e})")
+
+
+def publish_attendance(class_session_id, attendance: Dict):
+    """
+    Diffuse un enregistrement (``AttendanceSerializer``) aux flux ouverts sur
+    la séance, quel que soit le processus qui les sert.
+
+    La diffusion a lieu après le commit et n'échoue jamais : l'enregistrement
+    est déjà accepté, les flux se resynchronisent à leur reconnexion.
+    """
+    transaction.on_commit(
+        partial(
+            _publish,
+            get_feed_channel(class_session_id),
+            json.dumps(attendance, cls=JSONEncoder),
+        )
+    )
@@ -0,0 +1,143 @@
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from schoolmarksapi.models import Attendance, AttendanceSummary, ClassSession
+
+# Compteur de chaque statut d'enregistrement
+STATUS_FIELDS = {
+    "present": "present_count",
+    "late": "late_count",
+    "absent": "absent_count",
+}
+SUMMARY_FIELDS = (*STATUS_FIELDS.values(), "minutes_late")
+
+
+def update_attendance_summaries(
+    attendances: Iterable[Attendance],
+    course_ids: Optional[Dict[str, str]] = None,
+    sign: int = 1,
+):
+    """
+    Ajoute (``sign=1``) ou retire (``sign=-1``) des enregistrements des totaux
+    de leurs élèves. Doit être appelé dans la transaction qui écrit les
+    enregistrements, avec uniquement ceux réellement insérés ou supprimés.
+
+    ``course_ids`` associe l'identifiant d'une séance (en chaîne) à celui de
+    son cours ; les séances absentes sont lues en une requête. Les élèves qui
+    reçoivent la même variation dans un cours sont mis à jour en une seule
+    requête (``F() + n``) ; les lignes manquantes sont d'abord créées à zéro
+    avec ``ignore_conflicts``, ce qui reste exact si deux transactions les
+    créent en même temps.
+    """
+    attendances = list(attendances)
+
+    if not attendances:
+        return
+
+    course_ids = dict(course_ids or {})
+    missing_sessions = {
+        str(attendance.class_session_id) for attendance in attendances
+    } - course_ids.keys()
+
+    if missing_sessions:
+        course_ids.update(
+            (str(class_session_id), course_id)
+            for class_session_id, course_id in ClassSession.objects.filter(
+                id__in=missing_sessions
+            ).values_list("id", "course_id")
+        )
+
+    deltas = defaultdict(lambda: dict.fromkeys(SUMMARY_FIELDS, 0))
+
+    for attendance in attendances:
+        course_id = course_ids.get(str(attendance.class_session_id))
+
+        if course_id is None or attendance.status not in STATUS_FIELDS:
+            continue
+
+        delta = deltas[(attendance.student_id, course_id)]
+        delta[STATUS_FIELDS[attendance.status]] += sign
+        delta["minutes_late"] += sign * (attendance.minutes_late or 0)
+
+    students_by_delta = defaultdict(list)
+
+    for (student_id, course_id), delta in deltas.items():
+        changes = tuple((field, value) for field, value in delta.items() if value)
+
+        if changes:
+            students_by_delta[(course_id, changes)].append(student_id)
+
+    now = timezone.now()
+
+    for (course_id, changes), student_ids in students_by_delta.items():
+        summaries = AttendanceSummary.objects.filter(
+            course_id=course_id, student_id__in=student_ids
+        )
+        updates = {field: F(field) + value for field, value in changes}
+        updated = summaries.update(**updates, updated_at=now)
+
+        # Une ligne absente alors que des enregistrements sont retirés sera
+        # recalculée par rebuild_attendance_summaries
+        if updated == len(student_ids) or any(value < 0 for _, value in changes):
+            continue
+
+        # Premier enregistrement de ces élèves dans le cours
+        missing_ids = set(student_ids) - set(
+            summaries.values_list("student_id", flat=True)
+        )
+        AttendanceSummary.objects.bulk_create(
+            [
+                AttendanceSummary(student_id=student_id, course_id=course_id)
+                for student_id in missing_ids
+            ],
+            ignore_conflicts=True,
+        )
+        AttendanceSummary.objects.filter(
+            course_id=course_id, student_id__in=missing_ids
+        ).update(**updates, updated_at=now)
+
+
+def rebuild_attendance_summaries(course_ids: Optional[List] = None) -> int:
+    """
+    Recalcule les totaux à partir de tous les enregistrements (ou de ceux des
+    cours ``course_ids``) et retourne le nombre de lignes écrites.
+    """
+    attendances = Attendance.objects.all()
+    summaries = AttendanceSummary.objects.all()
+
+    if course_ids is not None:
+        attendances = attendances.filter(class_session__course_id__in=course_ids)
+        summaries = summaries.filter(course_id__in=course_ids)
+
+    totals = (
+        attendances.values("student_id", course_id=F("class_session__course_id"))
+        .annotate(
+            **{
+                field: Count("id", filter=Q(status=status))
+                for status, field in STATUS_FIELDS.items()
+            },
+            minutes_late_total=Sum("minutes_late", default=0),
+        )
+        .order_by()
+    )
+
+    with transaction.atomic():
+        summaries.delete()
+        created = AttendanceSummary.objects.bulk_create(
+            (
+                AttendanceSummary(
+                    student_id=total["student_id"],
+                    course_id=total["course_id"],
+                    minutes_late=total["minutes_late_total"],
+                    **{field: total[field] for field in STATUS_FIELDS.values()},
+                )
+                for total in totals.iterator()
+            ),
+            batch_size=settings.IMPORT_BULK_BATCH_SIZE,
+        )
+
+    return len(created)
@@ -0,0 +1,242 @@
+from datetime import datetime
+from functools import partial
+from typing import Dict, Iterable, Optional
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef
+from redis.exceptions import WatchError
+
+from common.redis_pool import get_redis, pipeline
+from schoolmarksapi.models import (
+    Attendance,
+    CheckinSession,
+    ClassStudent,
+    CourseClassEnrollment,
+)
+from schoolmarksapi.services.attendance_buffer import (
+    get_checkin_ttl,
+    get_registered_key,
+)
+
+redis_client = get_redis(decode_responses=True)
+
+# Durée de vie des compteurs d'invalidation : ils n'ont à survivre qu'au
+# recalcul d'un appel
+CACHE_VERSION_TTL = 60 * 60
+
+
+def get_session_key(checkin_session_id) -> str:
+    return f"checkin_{checkin_session_id}"
+
+
+def get_roster_key(checkin_session_id) -> str:
+    return f"checkin_{checkin_session_id}:roster"
+
+
+# Appels dont le cache dépend des élèves et des cours d'une classe
+def get_class_index_key(class_id) -> str:
+    return f"checkins:class:{class_id}"
+
+
+# Compteurs incrémentés à chaque invalidation d'un appel ou d'une classe
+def get_session_version_key(checkin_session_id) -> str:
+    return f"checkin_{checkin_session_id}:version"
+
+
+def get_class_version_key(class_id) -> str:
+    return f"checkins:class:{class_id}:version"
+
+
+def _parse_session(state: Dict[str, str], is_in_class: bool) -> Dict:
+    return {
+        "class_session_id": state["class_session_id"],
+        # Absent des entrées écrites avant l'ajout du champ
+        "course_id": state.get("course_id"),
+        "started_at": datetime.fromisoformat(state["started_at"]),
+        "closed_at": datetime.fromisoformat(state["closed_at"]),
+        "status": state["status"],
+        "secret": state["secret"] or None,
+        "is_class_enrolled": state["is_class_enrolled"] == "1",
+        "is_in_class": is_in_class,
+    }
+
+
+def cache_checkin_session(checkin_session_id, student_id=None) -> Optional[Dict]:
+    """Met en cache un appel et ses élèves ; retourne l'appel pour ``student_id`` ou None."""
+    session_version_key = get_session_version_key(checkin_session_id)
+    session_version = redis_client.get(session_version_key)
+    checkin_session = (
+        CheckinSession.objects.filter(pk=checkin_session_id)
+        .annotate(
+            class_group_id=F("class_session__class_group_id"),
+            course_id=F("class_session__course_id"),
+            is_class_enrolled=Exists(
+                CourseClassEnrollment.objects.filter(
+                    course_id=OuterRef("class_session__course_id"),
+                    class_group_id=OuterRef("class_session__class_group_id"),
+                )
+            ),
+        )
+        .values(
+            "class_session_id",
+            "class_group_id",
+            "course_id",
+            "started_at",
+            "closed_at",
+            "status",
+            "secret",
+            "is_class_enrolled",
+        )
+        .first()
+    )
+
+    if checkin_session is None:
+        return None
+
+    class_id = checkin_session["class_group_id"]
+    class_version_key = get_class_version_key(class_id)
+    class_version = redis_client.get(class_version_key)
+    roster = list(
+        ClassStudent.objects.filter(class_group_id=class_id).values_list(
+            "student_id", flat=True
+        )
+    )
+    state = {
+        "class_session_id": str(checkin_session["class_session_id"]),
+        "course_id": str(checkin_session["course_id"]),
+        "started_at": checkin_session["started_at"].isoformat(),
+        "closed_at": checkin_session["closed_at"].isoformat(),
+        "status": checkin_session["status"],
+        "secret": checkin_session["secret"] or "",
+        "is_class_enrolled": "1" if checkin_session["is_class_enrolled"] else "0",
+    }
+    ttl = get_checkin_ttl(checkin_session["closed_at"])
+    session_key = get_session_key(checkin_session_id)
+    roster_key = get_roster_key(checkin_session_id)
+    class_index_key = get_class_index_key(class_id)
+    registered = []
+
+    if settings.CHECKIN_WRITE_BEHIND:
+        registered = list(
+            Attendance.objects.filter(
+                class_session_id=checkin_session["class_session_id"]
+            ).values_list("student_id", flat=True)
+        )
+        registered_key = get_registered_key(checkin_session["class_session_id"])
+
+    with redis_client.pipeline() as pipe:
+        try:
+            pipe.watch(session_version_key, class_version_key)
+
+            # Un appel invalidé pendant le recalcul n'est pas mis en cache : les
+            # données lues peuvent être antérieures à la modification
+            if pipe.mget(session_version_key, class_version_key) == [
+                session_version,
+                class_version,
+            ]:
+                pipe.multi()
+                pipe.delete(session_key, roster_key)
+                pipe.hset(session_key, mapping=state)
+                pipe.expire(session_key, ttl)
+
+                if roster:
+                    pipe.sadd(roster_key, *roster)
+                    pipe.expire(roster_key, ttl)
+
+                # L'ensemble n'est pas supprimé à l'invalidation : il contient
+                # aussi les enregistrements du tampon. Sinon, il est créé avec sa
+                # durée de vie par buffer_attendance
+                if registered:
+                    pipe.sadd(registered_key, *registered)
+                    pipe.expire(registered_key, ttl)
+
+                # L'index vit aussi longtemps que le plus long des appels de la
+                # classe
+                pipe.sadd(class_index_key, str(checkin_session_id))
+                pipe.expire(class_index_key, ttl, nx=True)
+                pipe.expire(class_index_key, ttl, gt=True)
+                pipe.execute()
+        except WatchError:
+            pass
+
+    return _parse_session(state, student_id in roster)
+
+
+def read_checkin_session(checkin_session_id, student_id) -> Optional[Dict]:
+    """
+    Lit un appel en cache et l'appartenance d'un élève à sa liste en un seul
+    aller-retour Redis. Retourne None si l'appel n'est pas en cache.
+    """
+    with redis_client.pipeline(transaction=False) as pipe:
+        pipe.hgetall(get_session_key(checkin_session_id))
+        pipe.sismember(get_roster_key(checkin_session_id), student_id)
+        state, is_in_class = pipe.execute()
+
+    if not state:
+        return None
+
+    return _parse_session(state, bool(is_in_class))
+
+
+def get_checkin_session(checkin_session_id, student_id) -> Optional[Dict]:
+    """Appel en cache, recalculé depuis la base s'il n'y est plus."""
+    return read_checkin_session(
+        checkin_session_id, student_id
+    ) or cache_checkin_session(checkin_session_id, student_id)
+
+
+def _delete_checkin_sessions(checkin_session_ids: Iterable[str], version_keys=()):
+    """
+    Supprime les appels du cache et incrémente les compteurs de version des
+    appels et de ``version_keys`` : un recalcul en cours ne les réécrit pas.
+    """
+    version_keys = [
+        *version_keys,
+        *map(get_session_version_key, checkin_session_ids),
+    ]
+    keys = [
+        key
+        for checkin_session_id in checkin_session_ids
+        for key in (
+            get_session_key(checkin_session_id),
+            get_roster_key(checkin_session_id),
+        )
+    ]
+
+    if not version_keys:
+        return
+
+    with pipeline(redis_client) as pipe:
+        for version_key in version_keys:
+            pipe.incr(version_key)
+            pipe.expire(version_key, CACHE_VERSION_TTL)
+
+        if keys:
+            pipe.delete(*keys)
+
+
+def _delete_class_checkin_sessions(class_ids: Iterable[str]):
+    with redis_client.pipeline(transaction=False) as pipe:
+        for class_id in class_ids:
+            pipe.smembers(get_class_index_key(class_id))
+        replies = pipe.execute()
+
+    _delete_checkin_sessions(
+        set().union(*replies),
+        [get_class_version_key(class_id) for class_id in class_ids],
+    )
+
+
+# Les caches sont supprimés après le commit : un enregistrement concurrent ne
+# peut pas les recalculer à partir de données pas encore écrites. Le prochain
+# enregistrement à l'appel les recalcule.
+def invalidate_checkin_session(checkin_session_id):
+    transaction.on_commit(partial(_delete_checkin_sessions, [checkin_session_id]))
+
+
+def invalidate_class_checkin_sessions(class_ids: Iterable):
+    """Invalide le cache des appels des classes dont les élèves ou les cours changent."""
+    class_ids = {str(class_id) for class_id in class_ids}
+
+    if class_ids:
+        transaction.on_commit(partial(_delete_class_checkin_sessions, class_ids))
@@ -0,0 +1,92 @@
+from typing import Dict, List, Tuple
+from django.db.models import Count, F, FloatField, Sum
+from django.db.models.functions import Cast, Round
+
+# Les moyennes sont ramenées sur 20
+GRADE_SCALE = 20
+
+
+def get_weighted_grade():
+    """Expression ``value / max_value × coef`` d'une note (StudentGrade)."""
+    return (
+        Cast("value", FloatField())
+        * Cast("assessment__coef", FloatField())
+        / Cast("assessment__max_value", FloatField())
+    )
+
+
+def get_scaled_grade():
+    """Expression d'une note ramenée sur ``GRADE_SCALE``."""
+    return (
+        Cast("value", FloatField())
+        * GRADE_SCALE
+        / Cast("assessment__max_value", FloatField())
+    )
+
+
+def get_student_averages(grades) -> List[Dict]:
+    """
+    Moyenne pondérée de chaque élève par cours et par classe, calculée en
+    une requête d'agrégation sur ``grades`` (un queryset de StudentGrade) :
+    somme des ``value / max_value × coef`` divisée par la somme des
+    coefficients, sur ``GRADE_SCALE``.
+
+    Les valeurs sont converties en flottants : SQLite peut stocker les
+    décimaux sous forme d'entiers, la division serait alors entière.
+    """
+    coef = Cast("assessment__coef", FloatField())
+
+    return list(
+        grades.filter(assessment__max_value__gt=0)
+        .values(
+            "student_id",
+            course_id=F("assessment__course_id"),
+            class_id=F("assessment__class_group_id"),
+        )
+        .annotate(
+            average=Round(Sum(get_weighted_grade()) * GRADE_SCALE / Sum(coef), 2),
+            grades_count=Count("id"),
+        )
+        .order_by("course_id", "class_id", "student_id")
+    )
+
+
+def get_class_averages(grades) -> List[Dict]:
+    """
+    Moyenne des moyennes des élèves de chaque classe, par cours.
+
+    Une requête d'agrégation sur ``grades`` donne, pour chaque élève, la somme
+    de ses notes pondérées et de ses coefficients dans le cours et la classe ;
+    la moyenne de la classe est calculée à partir de ces totaux.
+    """
+    student_totals = (
+        grades.filter(assessment__max_value__gt=0)
+        .values(
+            "student_id",
+            course_id=F("assessment__course_id"),
+            class_id=F("assessment__class_group_id"),
+        )
+        .annotate(
+            weighted_total=Sum(get_weighted_grade()),
+            coef_total=Sum(Cast("assessment__coef", FloatField())),
+        )
+        .order_by("course_id", "class_id")
+    )
+
+    class_averages: Dict[Tuple, List[float]] = {}
+
+    for totals in student_totals.iterator():
+        key = (totals["course_id"], totals["class_id"])
+        class_averages.setdefault(key, []).append(
+            totals["weighted_total"] * GRADE_SCALE / totals["coef_total"]
+        )
+
+    return [
+        {
+            "course_id": course_id,
+            "class_id": class_id,
+            "average": round(sum(averages) / len(averages), 2),
+            "students_count": len(averages),
+        }
+        for (course_id, class_id), averages in class_averages.items()
+    ]
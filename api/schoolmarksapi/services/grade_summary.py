@@ -0,0 +1,136 @@
+from typing import Iterable, List, Optional
+from django.db.models import (
+    Count,
+    Exists,
+    F,
+    FloatField,
+    Max,
+    Min,
+    OuterRef,
+    Sum,
+    Window,
+)
+from django.db.models.functions import Cast, Rank
+from django.utils import timezone
+
+from schoolmarksapi.models import GradeSummary, StudentGrade
+from schoolmarksapi.services.grade_averages import (
+    GRADE_SCALE,
+    get_scaled_grade,
+    get_weighted_grade,
+)
+
+SUMMARY_FIELDS = (
+    "weighted_sum",
+    "coef_total",
+    "grades_count",
+    "min_grade",
+    "max_grade",
+    "average",
+)
+
+
+def refresh_grade_summaries(
+    course_id=None, student_ids: Optional[Iterable] = None
+) -> int:
+    """
+    Recalcule les totaux de notes des élèves ``student_ids`` (tous par
+    défaut) dans le cours ``course_id`` (tous par défaut), et retourne le
+    nombre de lignes écrites.
+
+    Les totaux sont calculés en une requête d'agrégation limitée aux élèves
+    concernés puis écrits en un upsert ; les lignes des élèves qui n'ont
+    plus de note sont supprimées. Les notes minimale et maximale ne pouvant
+    pas être retirées d'un total, les lignes sont recalculées plutôt
+    qu'incrémentées. À appeler dans la transaction qui écrit les notes.
+    """
+    grades = StudentGrade.objects.filter(assessment__max_value__gt=0)
+    summaries = GradeSummary.objects.all()
+
+    if course_id is not None:
+        grades = grades.filter(assessment__course_id=course_id)
+        summaries = summaries.filter(course_id=course_id)
+
+    if student_ids is not None:
+        student_ids = set(student_ids)
+
+        if not student_ids:
+            return 0
+
+        grades = grades.filter(student_id__in=student_ids)
+        summaries = summaries.filter(student_id__in=student_ids)
+
+    totals = (
+        grades.values("student_id", course_id=F("assessment__course_id"))
+        .annotate(
+            weighted_sum=Sum(get_weighted_grade()),
+            coef_total=Sum(Cast("assessment__coef", FloatField())),
+            grades_count=Count("id"),
+            min_grade=Min(get_scaled_grade()),
+            max_grade=Max(get_scaled_grade()),
+        )
+        .order_by()
+    )
+    now = timezone.now()
+
+    created = GradeSummary.objects.bulk_create(
+        [
+            GradeSummary(
+                student_id=total["student_id"],
+                course_id=total["course_id"],
+                weighted_sum=total["weighted_sum"],
+                coef_total=total["coef_total"],
+                grades_count=total["grades_count"],
+                min_grade=round(total["min_grade"], 2),
+                max_grade=round(total["max_grade"], 2),
+                average=round(
+                    total["weighted_sum"] * GRADE_SCALE / total["coef_total"], 2
+                ),
+                updated_at=now,
+            )
+            for total in totals
+        ],
+        update_conflicts=True,
+        unique_fields=["student", "course"],
+        update_fields=[*SUMMARY_FIELDS, "updated_at"],
+    )
+
+    summaries.filter(
+        ~Exists(
+            grades.filter(
+                student_id=OuterRef("student_id"),
+                assessment__course_id=OuterRef("course_id"),
+            )
+        )
+    ).delete()
+
+    return len(created)
+
+
+def add_course_ranks(summaries: List[GradeSummary]) -> List[GradeSummary]:
+    """
+    Ajoute à chaque ligne son rang (``rank``) parmi tous les élèves de son
+    cours, calculé en une requête avec une fonction de fenêtre (index
+    (course, -average)).
+
+    Les lignes peuvent être un sous-ensemble de leurs cours (les notes d'un
+    élève) : le rang est calculé sur les cours entiers, puis reporté.
+    """
+    ranks = dict(
+        GradeSummary.objects.filter(
+            course_id__in={summary.course_id for summary in summaries}
+        )
+        .annotate(
+            rank=Window(
+                expression=Rank(),
+                partition_by=F("course"),
+                order_by=F("average").desc(),
+            )
+        )
+        .values_list("id", "rank")
+    )
+
+    for summary in summaries:
+        summary.rank = ranks.get(summary.id)
+
+    return summaries
@@ -0,0 +1,114 @@
+from typing import Dict, List
+from django.conf import settings
+from django.utils import timezone
+
+WRITE_MODES = ("insert", "upsert")
+
+
+class ImportDiff:
+    """
+    Répartition des lignes d'un paquet par rapport aux lignes existantes :
+    objets à créer, objets existants modifiés et objets inchangés.
+    """
+
+    def __init__(self, fields: List[str]):
+        self.fields = fields
+        self.to_create = []
+        self.to_update = []
+        self.unchanged = []
+        self.update_fields = set()
+
+    @property
+    def counts(self) -> Dict[str, int]:
+        return {
+            "inserted": len(self.to_create),
+            "updated": len(self.to_update),
+            "unchanged": len(self.unchanged),
+        }
+
+
+def diff_rows(model, key_field: str, rows: List[Dict], fields: List[str]) -> ImportDiff:
+    """
+    Compare des lignes (valeurs des champs du modèle, indexées par nom de
+    champ) aux objets existants de même clé, chargés en une seule requête.
+
+    Seuls les champs de ``fields`` présents dans une ligne sont comparés et
+    mis à jour. Si la même clé apparaît plusieurs fois, la dernière ligne
+    l'emporte.
+    """
+    rows_by_key = {row[key_field]: row for row in rows}
+
+    existing = {
+        getattr(obj, key_field): obj
+        for obj in model.objects.filter(**{f"{key_field}__in": rows_by_key}).only(
+            "pk", key_field, *fields
+        )
+    }
+
+    diff = ImportDiff(fields)
+
+    for key, row in rows_by_key.items():
+        obj = existing.get(key)
+
+        if obj is None:
+            diff.to_create.append(row)
+            continue
+
+        changed_fields = [
+            field
+            for field in fields
+            if field in row and getattr(obj, field) != row[field]
+        ]
+
+        if not changed_fields:
+            diff.unchanged.append(obj)
+            continue
+
+        for field in changed_fields:
+            setattr(obj, field, row[field])
+
+        diff.to_update.append(obj)
+        diff.update_fields.update(changed_fields)
+
+    return diff
+
+
+def apply_diff(model, key_field: str, new_objects: List, diff: ImportDiff):
+    """
+    Écrit un ``ImportDiff``. ``new_objects`` (construits à partir de
+    ``diff.to_create``) sont insérés avec ``bulk_create(update_conflicts=True)``
+    : une ligne créée entre-temps par un autre import est mise à jour plutôt
+    que de faire échouer la transaction. Les objets modifiés sont écrits avec
+    ``bulk_update``, limité aux champs qui ont changé.
+
+    ``bulk_update`` ignore ``auto_now`` : le champ ``updated_at`` du modèle,
+    s'il existe, est renseigné ici.
+    """
+    batch_size = settings.IMPORT_BULK_BATCH_SIZE
+    timestamp_fields = [
+        field.name
+        for field in model._meta.concrete_fields
+        if field.name == "updated_at"
+    ]
+
+    if new_objects:
+        model.objects.bulk_create(
+            new_objects,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=[key_field],
+            update_fields=[*diff.fields, *timestamp_fields],
+        )
+
+    if diff.to_update:
+        if timestamp_fields:
+            now = timezone.now()
+
+            for obj in diff.to_update:
+                obj.updated_at = now
+
+        model.objects.bulk_update(
+            diff.to_update,
+            sorted(diff.update_fields) + timestamp_fields,
+            batch_size=batch_size,
+        )
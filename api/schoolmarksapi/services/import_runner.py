@@ -0,0 +1,141 @@
+import logging
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from django.conf import settings
+from django.db import InterfaceError, OperationalError, transaction
+
+from schoolmarksapi.services.import_state import ImportStateWriter
+from schoolmarksapi.services.import_storage import (
+    delete_payload,
+    delete_prepared_chunks,
+    iter_payload_chunks,
+    iter_prepared_chunks,
+    store_prepared_chunk,
+)
+
+logger = logging.getLogger(__name__)
+
+COMMIT_MODES = ("atomic", "chunked")
+
+# Erreurs passagères (connexion perdue, base indisponible...) pour lesquelles la
+# tâche est relancée plutôt que marquée en échec
+RETRYABLE_ERRORS = (OperationalError, InterfaceError)
+
+# Options communes aux tâches d'import. Avec acks_late et reject_on_worker_lost,
+# une tâche interrompue par l'arrêt d'un worker est redistribuée par le broker
+# et reprend depuis son checkpoint.
+IMPORT_TASK_OPTIONS = {
+    "bind": True,
+    "acks_late": True,
+    "reject_on_worker_lost": True,
+    "autoretry_for": RETRYABLE_ERRORS,
+    "retry_backoff": True,
+    "max_retries": settings.IMPORT_TASK_MAX_RETRIES,
+}
+
+ChunkResult = Tuple[List[Dict], Optional[List[str]], Dict[str, int]]
+ChunkProcessor = Callable[[Any], ChunkResult]
+ChunkPreparer = Callable[[List[Dict]], Any]
+
+
+def run_import(
+    task,
+    import_state: ImportStateWriter,
+    process_chunk: ChunkProcessor,
+    chunk_size: Optional[int] = None,
+    finalize: Optional[Callable[[], ChunkResult]] = None,
+    prepare_chunk: Optional[ChunkPreparer] = None,
+):
+    """
+    Exécute un import à partir des paquets stockés par la vue.
+
+    ``process_chunk`` écrit les lignes d'un paquet et retourne ses résultats,
+    ses avertissements et le nombre de lignes insérées, mises à jour et
+    inchangées. En mode ``atomic`` tout le fichier est importé dans une
+    seule transaction. En mode ``chunked`` chaque paquet est commité dans sa
+    propre transaction, puis le checkpoint est enregistré : une tâche relancée
+    reprend au premier paquet non commité. Une ligne invalide annule son
+    paquet et arrête l'import : les paquets précédents restent commités et le
+    fichier est conservé jusqu'à l'expiration de ``IMPORT_PAYLOAD_TTL``.
+
+    ``finalize`` est appelé une fois tous les paquets traités, dans la même
+    transaction, pour les imports qui doivent comparer le fichier entier aux
+    données existantes. Il retourne les mêmes valeurs que ``process_chunk`` et
+    n'est possible qu'en mode ``atomic``.
+
+    ``prepare_chunk`` fait hors transaction le travail coûteux d'un paquet
+    (hash des mots de passe...) et ce qu'il retourne est passé à
+    ``process_chunk`` à la place du paquet. En mode ``atomic``, chaque paquet
+    est préparé puis stocké dans Redis (le résultat doit donc être
+    sérialisable en JSON) avant d'ouvrir la transaction, qui les relit un par
+    un.
+    """
+    import_id = import_state.import_id
+    chunk_size = chunk_size or settings.IMPORT_CHUNK_SIZE
+    chunked = import_state.commit_mode == "chunked"
+
+    if chunked and finalize is not None:
+        raise ValueError("finalize n'est pas compatible avec le mode chunked")
+
+    try:
+        checkpoint = import_state.start(resume=chunked)
+
+        if chunked:
+            for chunk in iter_payload_chunks(import_id, start=checkpoint // chunk_size):
+                prepared = prepare_chunk(chunk) if prepare_chunk else chunk
+
+                with transaction.atomic():
+                    results, warnings, counts = process_chunk(prepared)
+
+                checkpoint += len(chunk)
+                import_state.commit(checkpoint, results, warnings, counts)
+        else:
+            all_results: List[Dict] = []
+            all_warnings: List[str] = []
+            all_counts: Counter = Counter()
+
+            if prepare_chunk is None:
+                chunks = ((chunk, chunk) for chunk in iter_payload_chunks(import_id))
+            else:
+                # Une tentative précédente a pu stocker une partie des paquets
+                delete_prepared_chunks(import_id)
+
+                for chunk in iter_payload_chunks(import_id):
+                    store_prepared_chunk(import_id, prepare_chunk(chunk))
+
+                chunks = zip(
+                    iter_payload_chunks(import_id), iter_prepared_chunks(import_id)
+                )
+
+            with transaction.atomic():
+                for chunk, prepared in chunks:
+                    results, warnings, counts = process_chunk(prepared)
+                    all_results.extend(results)
+                    all_warnings.extend(warnings or [])
+                    all_counts.update(counts)
+
+                    checkpoint += len(chunk)
+                    import_state.progress(checkpoint)
+
+                if finalize is not None:
+                    results, warnings, counts = finalize()
+                    all_results.extend(results)
+                    all_warnings.extend(warnings or [])
+                    all_counts.update(counts)
+
+            import_state.commit(checkpoint, all_results, all_warnings, all_counts)
+
+        import_state.complete()
+    except Exception as e:
+        if isinstance(e, RETRYABLE_ERRORS) and task.request.retries < task.max_retries:
+            logger.warning(f"Import {import_id} interrompu ({e}), nouvelle tentative")
+            raise
+
+        import_state.fail(str(e))
+
+        # En mode chunked, le fichier est gardé jusqu'à l'expiration de
+        # ``IMPORT_PAYLOAD_TTL`` pour pouvoir reprendre l'import
+        if chunked:
+            return
+
+    delete_payload(import_id)
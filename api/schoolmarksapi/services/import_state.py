@@ -0,0 +1,332 @@
+import json
+import time
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+from django.conf import settings
+from django.utils import timezone
+
+from common.redis_pool import get_redis, pipeline
+
+redis_client = get_redis(decode_responses=True)
+
+
+def get_state_key(import_id: str) -> str:
+    return f"import_{import_id}"
+
+
+def get_results_key(import_id: str) -> str:
+    return f"import_{import_id}:results"
+
+
+def get_warnings_key(import_id: str) -> str:
+    return f"import_{import_id}:warnings"
+
+
+# Index par type d'import : les imports en cours triés par date de début et les
+# imports terminés (ou en échec) triés par date de fin.
+def get_processing_index_key(type: str) -> str:
+    return f"imports:{type}:processing"
+
+
+def get_finished_index_key(type: str) -> str:
+    return f"imports:{type}:finished"
+
+
+# Compteurs des lignes insérées, mises à jour, inchangées et supprimées
+DIFF_COUNT_FIELDS = ("inserted", "updated", "unchanged", "deleted")
+# Compteurs remis à zéro quand un import repart du début
+COUNT_FIELDS = (*DIFF_COUNT_FIELDS, "results_count")
+
+
+def _to_score(isoformat: str) -> float:
+    return datetime.fromisoformat(isoformat).timestamp()
+
+
+class ImportStateWriter:
+    """
+    Écrit l'état d'un import dans un hash Redis (``import_<id>``).
+
+    Les mises à jour de progression ne modifient que le champ ``progress`` et
+    sont limitées à une écriture toutes les ``IMPORT_PROGRESS_INTERVAL``
+    secondes ou ``IMPORT_PROGRESS_ROWS`` lignes. Les résultats et les
+    avertissements sont ajoutés sous des clés séparées uniquement lorsque les
+    lignes correspondantes ont été commitées, avec le ``checkpoint`` (nombre
+    de lignes commitées) qui permet de reprendre l'import. Les résultats
+    (une liste de paquets JSON) ne sont pas lus par le statut, qui n'expose que
+    leur nombre, et expirent après ``IMPORT_RESULTS_TTL`` secondes.
+    """
+
+    def __init__(
+        self,
+        import_id: str,
+        type: str,
+        imported_by: str,
+        total_rows: int,
+        commit_mode: str = "atomic",
+        write_mode: str = "insert",
+        dry_run: bool = False,
+    ):
+        self.import_id = import_id
+        self.key = get_state_key(import_id)
+        self.type = type
+        self.imported_by = imported_by
+        self.total_rows = total_rows
+        self.commit_mode = commit_mode
+        self.write_mode = write_mode
+        self.dry_run = dry_run
+        self.started_at = timezone.now().isoformat()
+
+        self._progress = 0
+        self._last_write_at = 0.0
+        self._last_write_rows = 0
+
+    def start(self, resume: bool = False) -> int:
+        """
+        Initialise l'état de l'import et retourne le checkpoint à partir duquel
+        reprendre. Avec ``resume``, l'état d'une exécution précédente (tâche
+        relancée ou worker redémarré) est conservé ; sinon il est remis à zéro.
+        """
+        checkpoint = 0
+        started_at, previous_checkpoint = redis_client.hmget(
+            self.key, "started_at", "checkpoint"
+        )
+
+        with pipeline(redis_client) as pipe:
+            if resume and started_at:
+                self.started_at = started_at
+                checkpoint = int(previous_checkpoint or 0)
+            else:
+                pipe.delete(
+                    get_results_key(self.import_id), get_warnings_key(self.import_id)
+                )
+
+            self._progress = self._get_progress(checkpoint)
+            self._last_write_rows = checkpoint
+
+            fields_to_reset = ["error", "finished_at"]
+            if not checkpoint:
+                fields_to_reset.extend(COUNT_FIELDS)
+
+            pipe.hdel(self.key, *fields_to_reset)
+            pipe.hset(
+                self.key,
+                mapping={
+                    "type": self.type,
+                    "status": "processing",
+                    "progress": self._progress,
+                    "checkpoint": checkpoint,
+                    "commit_mode": self.commit_mode,
+                    "write_mode": self.write_mode,
+                    "dry_run": int(self.dry_run),
+                    "imported_by": self.imported_by,
+                    "started_at": self.started_at,
+                },
+            )
+            pipe.zrem(get_finished_index_key(self.type), self.import_id)
+            pipe.zadd(
+                get_processing_index_key(self.type),
+                {self.import_id: _to_score(self.started_at)},
+            )
+
+        self._last_write_at = time.monotonic()
+
+        return checkpoint
+
+    def _get_progress(self, processed_rows: int) -> int:
+        if not self.total_rows:
+            return 0
+
+        return int((processed_rows / self.total_rows) * 100)
+
+    def progress(self, processed_rows: int):
+        progress = self._get_progress(processed_rows)
+        now = time.monotonic()
+
+        if progress == self._progress:
+            return
+
+        if (
+            now - self._last_write_at < settings.IMPORT_PROGRESS_INTERVAL
+            and processed_rows - self._last_write_rows < settings.IMPORT_PROGRESS_ROWS
+        ):
+            return
+
+        redis_client.hset(self.key, "progress", progress)
+
+        self._progress = progress
+        self._last_write_at = now
+        self._last_write_rows = processed_rows
+
+    def commit(
+        self,
+        checkpoint: int,
+        results: List[Dict],
+        warnings: Optional[List[str]] = None,
+        counts: Optional[Dict[str, int]] = None,
+    ):
+        """
+        Enregistre les résultats de lignes commitées, ajoute ``counts`` (lignes
+        insérées, mises à jour, inchangées) aux compteurs de l'import et avance
+        le checkpoint.
+        """
+        self._progress = self._get_progress(checkpoint)
+
+        with pipeline(redis_client) as pipe:
+            if results:
+                results_key = get_results_key(self.import_id)
+                pipe.rpush(results_key, json.dumps(results))
+                pipe.expire(results_key, settings.IMPORT_RESULTS_TTL)
+                pipe.hincrby(self.key, "results_count", len(results))
+
+            if warnings:
+                pipe.rpush(get_warnings_key(self.import_id), *warnings)
+
+            for field, count in (counts or {}).items():
+                pipe.hincrby(self.key, field, count)
+
+            pipe.hset(
+                self.key, mapping={"checkpoint": checkpoint, "progress": self._progress}
+            )
+
+        self._last_write_at = time.monotonic()
+        self._last_write_rows = checkpoint
+
+    def complete(self):
+        with pipeline(redis_client) as pipe:
+            self._finish(pipe, {"status": "completed", "progress": 100})
+
+    def fail(self, error: str):
+        with pipeline(redis_client) as pipe:
+            self._finish(pipe, {"status": "failed", "error": error})
+
+    def _finish(self, pipe, fields: Dict):
+        finished_at = timezone.now().isoformat()
+
+        pipe.hset(self.key, mapping={**fields, "finished_at": finished_at})
+        pipe.zrem(get_processing_index_key(self.type), self.import_id)
+        pipe.zadd(
+            get_finished_index_key(self.type),
+            {self.import_id: _to_score(finished_at)},
+        )
+
+
+def _queue_state_reads(pipe, import_id: str):
+    pipe.hgetall(get_state_key(import_id))
+    pipe.lrange(get_warnings_key(import_id), 0, -1)
+
+
+def _parse_state(state: Dict, warnings: List[str]):
+    if not state:
+        return None
+
+    return {
+        "type": state["type"],
+        "status": state["status"],
+        "progress": int(state.get("progress", 0)),
+        "checkpoint": int(state.get("checkpoint", 0)),
+        "commit_mode": state.get("commit_mode", "atomic"),
+        "write_mode": state.get("write_mode", "insert"),
+        "dry_run": state.get("dry_run") == "1",
+        "diff": {field: int(state.get(field, 0)) for field in DIFF_COUNT_FIELDS},
+        "imported_by": state.get("imported_by"),
+        "started_at": state.get("started_at"),
+        "finished_at": state.get("finished_at"),
+        "error": state.get("error"),
+        "results_count": int(state.get("results_count", 0)),
+        "warnings": warnings or None,
+    }
+
+
+def read_import_state(import_id: str) -> Optional[Dict]:
+    pipe = redis_client.pipeline()
+    _queue_state_reads(pipe, import_id)
+
+    return _parse_state(*pipe.execute())
+
+
+def list_import_states(
+    type: str, page: Optional[int] = None, per_page: Optional[int] = None
+) -> Tuple[List[Dict], int]:
+    """
+    Liste les imports d'un type : ceux en cours d'abord (les plus récents en
+    premier), puis ceux terminés. Seuls les imports de la page demandée sont
+    lus.
+    """
+    processing_key = get_processing_index_key(type)
+    finished_key = get_finished_index_key(type)
+
+    pipe = redis_client.pipeline()
+    pipe.zcard(processing_key)
+    pipe.zcard(finished_key)
+    processing_count, finished_count = pipe.execute()
+
+    total = processing_count + finished_count
+
+    if page is not None and per_page is not None:
+        start = max(page - 1, 0) * per_page
+        end = start + per_page
+    else:
+        start, end = 0, total
+
+    pipe = redis_client.pipeline()
+
+    if start < processing_count:
+        pipe.zrevrange(processing_key, start, min(end, processing_count) - 1)
+
+    if end > processing_count:
+        pipe.zrevrange(
+            finished_key,
+            max(start - processing_count, 0),
+            end - processing_count - 1,
+        )
+
+    import_ids = [import_id for ids in pipe.execute() for import_id in ids]
+
+    pipe = redis_client.pipeline()
+    for import_id in import_ids:
+        _queue_state_reads(pipe, import_id)
+    replies = pipe.execute()
+
+    imports = []
+
+    for index, import_id in enumerate(import_ids):
+        import_data = _parse_state(*replies[index * 2 : index * 2 + 2])
+
+        if import_data:
+            imports.append({**import_data, "import_id": import_id})
+
+    return imports, total
+
+
+def delete_import_state(import_id: str, type: str):
+    """Supprime l'état, les résultats et l'entrée dans l'historique d'un import."""
+    with pipeline(redis_client) as pipe:
+        pipe.delete(
+            get_state_key(import_id),
+            get_results_key(import_id),
+            get_warnings_key(import_id),
+        )
+        pipe.zrem(get_processing_index_key(type), import_id)
+        pipe.zrem(get_finished_index_key(type), import_id)
+
+
+def results_expired(import_id: str, import_state: Dict) -> bool:
+    """Vrai si l'import a produit des résultats qui ont depuis expiré."""
+    return bool(import_state["results_count"]) and not redis_client.exists(
+        get_results_key(import_id)
+    )
+
+
+def iter_import_results(import_id: str) -> Iterator[Dict]:
+    """Relit les résultats d'un import paquet par paquet."""
+    key = get_results_key(import_id)
+    index = 0
+
+    while True:
+        chunk = redis_client.lindex(key, index)
+
+        if chunk is None:
+            break
+
+        yield from json.loads(chunk)
+        index += 1
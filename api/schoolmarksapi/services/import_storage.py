@@ -0,0 +1,108 @@
+import json
+import zlib
+from typing import Any, Dict, Iterator, List, Optional
+from django.conf import settings
+
+from common.redis_pool import get_redis, pipeline
+
+redis_client = get_redis()
+
+
+def get_payload_key(import_id: str) -> str:
+    return f"csv_payload:{import_id}"
+
+
+def get_prepared_key(import_id: str) -> str:
+    return f"csv_prepared:{import_id}"
+
+
+def _dump_chunk(chunk) -> bytes:
+    return zlib.compress(json.dumps(chunk).encode("utf-8"))
+
+
+class ImportPayloadWriter:
+    """
+    Stocke les lignes validées d'un CSV dans Redis.
+
+    Les lignes sont regroupées par paquets de ``chunk_size``, sérialisées en
+    JSON et compressées. Chaque paquet est un élément d'une liste Redis : la
+    tâche Celery ne reçoit que l'identifiant de l'import et relit les paquets
+    un par un.
+    """
+
+    def __init__(self, import_id: str, chunk_size: Optional[int] = None):
+        self.key = get_payload_key(import_id)
+        self.chunk_size = chunk_size or settings.IMPORT_CHUNK_SIZE
+        self.total_rows = 0
+        self._buffer: List[Dict] = []
+
+    def append(self, row: Dict):
+        self._buffer.append(row)
+        self.total_rows += 1
+
+        if len(self._buffer) >= self.chunk_size:
+            self._flush()
+
+    def _flush(self):
+        if not self._buffer:
+            return
+
+        with pipeline(redis_client) as pipe:
+            pipe.rpush(self.key, _dump_chunk(self._buffer))
+            pipe.expire(self.key, settings.IMPORT_PAYLOAD_TTL)
+
+        self._buffer = []
+
+    def close(self) -> int:
+        """Écrit le dernier paquet et retourne le nombre total de lignes."""
+        self._flush()
+        return self.total_rows
+
+    def discard(self):
+        self._buffer = []
+        redis_client.delete(self.key)
+
+
+def _iter_chunks(key: str, start: int = 0) -> Iterator:
+    index = start
+
+    while True:
+        chunk = redis_client.lindex(key, index)
+
+        if chunk is None:
+            break
+
+        yield json.loads(zlib.decompress(chunk))
+        index += 1
+
+
+def iter_payload_chunks(import_id: str, start: int = 0) -> Iterator[List[Dict]]:
+    """
+    Relit les paquets d'un import à partir du paquet ``start``, sans jamais
+    charger le fichier entier.
+    """
+    return _iter_chunks(get_payload_key(import_id), start)
+
+
+def store_prepared_chunk(import_id: str, prepared: Any):
+    """
+    Stocke à la suite des précédents le résultat (sérialisable en JSON) de la
+    préparation d'un paquet, pour le relire pendant la transaction.
+    """
+    key = get_prepared_key(import_id)
+
+    with pipeline(redis_client) as pipe:
+        pipe.rpush(key, _dump_chunk(prepared))
+        pipe.expire(key, settings.IMPORT_PAYLOAD_TTL)
+
+
+def iter_prepared_chunks(import_id: str) -> Iterator[Any]:
+    return _iter_chunks(get_prepared_key(import_id))
+
+
+def delete_prepared_chunks(import_id: str):
+    redis_client.delete(get_prepared_key(import_id))
+
+
+def delete_payload(import_id: str):
+    redis_client.delete(get_payload_key(import_id), get_prepared_key(import_id))
@@ -119,3 +119,62 @@ CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_TIMEZONE = "UTC"
+# Tâches périodiques : aucune vue ne les importe
+CELERY_IMPORTS = [
+    "schoolmarksapi.tasks.attendance_buffer",
+    "schoolmarksapi.tasks.checkin_sessions",
+]
+CELERY_BEAT_SCHEDULE = {
+    "flush-attendance-buffers": {
+        "task": "schoolmarksapi.tasks.attendance_buffer.flush_attendance_buffers",
+        "schedule": float(os.getenv("CHECKIN_FLUSH_INTERVAL", "2")),
+    },
+    # Fermeture des appels dont l'heure de fin est passée
+    "close-expired-checkin-sessions": {
+        "task": "schoolmarksapi.tasks.checkin_sessions.close_expired_checkin_sessions",
+        "schedule": float(os.getenv("CHECKIN_CLOSE_INTERVAL", "5")),
+        # Une exécution non démarrée est remplacée par la suivante
+        "options": {"expires": float(os.getenv("CHECKIN_CLOSE_INTERVAL", "5"))},
+    },
+}
+
+# Import CSV
+IMPORT_BULK_BATCH_SIZE = int(os.getenv("IMPORT_BULK_BATCH_SIZE", "500"))
+# Nombre de threads utilisés pour hasher les mots de passe (0 = tous les coeurs)
+IMPORT_HASH_WORKERS = int(os.getenv("IMPORT_HASH_WORKERS", "0"))
+# Nombre de lignes par paquet compressé lors de la mise en file d'un CSV
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "1000"))
+# Durée de conservation (en secondes) d'un CSV en attente de traitement
+IMPORT_PAYLOAD_TTL = int(os.getenv("IMPORT_PAYLOAD_TTL", str(60 * 60 * 24)))
+# Limite les écritures de progression d'un import (secondes / lignes)
+IMPORT_PROGRESS_INTERVAL = float(os.getenv("IMPORT_PROGRESS_INTERVAL", "1"))
+IMPORT_PROGRESS_ROWS = int(os.getenv("IMPORT_PROGRESS_ROWS", "500"))
+# Nombre de relances d'une tâche d'import après une erreur de base de données
+IMPORT_TASK_MAX_RETRIES = int(os.getenv("IMPORT_TASK_MAX_RETRIES", "3"))
+# Durée de conservation (en secondes) des résultats d'un import (mots de passe temporaires...)
+IMPORT_RESULTS_TTL = int(os.getenv("IMPORT_RESULTS_TTL", str(60 * 60 * 24 * 7)))
+
+# Pool de connexions Redis partagé par le code d'import, par processus
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "20"))
+# Attente maximale (en secondes) d'une connexion libre dans le pool
+REDIS_POOL_TIMEOUT = float(os.getenv("REDIS_POOL_TIMEOUT", "5"))
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", "5"))
+REDIS_SOCKET_CONNECT_TIMEOUT = float(os.getenv("REDIS_SOCKET_CONNECT_TIMEOUT", "2"))
+# Vérifie les connexions inactives depuis plus de N secondes avant de les réutiliser
+REDIS_HEALTH_CHECK_INTERVAL = int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL", "30"))
+
+# Nombre d'intervalles de 15 secondes acceptés avant et après le code TOTP courant
+CHECKIN_TOTP_WINDOW = int(os.getenv("CHECKIN_TOTP_WINDOW", "1"))
+# Délai (en secondes) de conservation du cache Redis d'un appel après sa fermeture
+CHECKIN_CACHE_GRACE = int(os.getenv("CHECKIN_CACHE_GRACE", "300"))
+# Les enregistrements à un appel sont mis en tampon dans Redis puis écrits en base
+# par paquets (tâche périodique flush_attendance_buffers, CHECKIN_FLUSH_INTERVAL)
+CHECKIN_WRITE_BEHIND = os.getenv("CHECKIN_WRITE_BEHIND", "false").lower() == "true"
+CHECKIN_FLUSH_BATCH_SIZE = int(os.getenv("CHECKIN_FLUSH_BATCH_SIZE", "500"))
+# Nombre maximal d'appels fermés par exécution de close_expired_checkin_sessions
+CHECKIN_CLOSE_BATCH_SIZE = int(os.getenv("CHECKIN_CLOSE_BATCH_SIZE", "100"))
+# Durée maximale (en secondes) d'un flux /attendances/stream/ servi en WSGI :
+# inférieure au timeout des workers gunicorn (30 secondes par défaut)
+ATTENDANCE_STREAM_WSGI_DURATION = float(
+    os.getenv("ATTENDANCE_STREAM_WSGI_DURATION", "25")
+)
@@ -0,0 +1,70 @@
+from functools import partial
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from schoolmarksapi.models import (
+    Assessment,
+    Attendance,
+    CheckinSession,
+    ClassStudent,
+    CourseClassEnrollment,
+    StudentGrade,
+)
+from schoolmarksapi.services.attendance_buffer import forget_registered_student
+from schoolmarksapi.services.attendance_summary import update_attendance_summaries
+from schoolmarksapi.services.checkin_cache import (
+    invalidate_checkin_session,
+    invalidate_class_checkin_sessions,
+)
+from schoolmarksapi.services.grade_summary import refresh_grade_summaries
+
+
+# Les écritures en masse (bulk_create) n'envoient pas de signal : elles
+# invalident le cache explicitement.
+@receiver([post_save, post_delete], sender=CheckinSession)
+def checkin_session_changed(sender, instance, **kwargs):
+    invalidate_checkin_session(instance.id)
+
+
+@receiver([post_save, post_delete], sender=ClassStudent)
+@receiver([post_save, post_delete], sender=CourseClassEnrollment)
+def class_members_changed(sender, instance, **kwargs):
+    invalidate_class_checkin_sessions([instance.class_group_id])
+
+
+@receiver(post_delete, sender=Attendance)
+def attendance_deleted(sender, instance, **kwargs):
+    update_attendance_summaries([instance], sign=-1)
+    transaction.on_commit(
+        partial(
+            forget_registered_student, instance.class_session_id, instance.student_id
+        )
+    )
+
+
+# Suppression d'une évaluation (directe ou en cascade) : les totaux de ses
+# élèves sont recalculés une fois les notes supprimées
+@receiver(pre_delete, sender=Assessment)
+def assessment_deleting(sender, instance, **kwargs):
+    instance._graded_student_ids = list(
+        instance.student_grades.values_list("student_id", flat=True)
+    )
+
+
+@receiver(post_delete, sender=Assessment)
+def assessment_deleted(sender, instance, **kwargs):
+    refresh_grade_summaries(instance.course_id, instance._graded_student_ids)
+
+
+@receiver(post_delete, sender=StudentGrade)
+def student_grade_deleted(sender, instance, origin=None, **kwargs):
+    # Notes supprimées avec leur évaluation, leur élève ou leur cours : les
+    # totaux sont recalculés par assessment_deleted ou supprimés en cascade
+    if (
+        not isinstance(origin, StudentGrade)
+        and getattr(origin, "model", None) is not StudentGrade
+    ):
+        return
+
+    refresh_grade_summaries(instance.assessment.course_id, [instance.student_id])
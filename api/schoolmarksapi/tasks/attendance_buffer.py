@@ -0,0 +1,21 @@
+from celery import shared_task
+from schoolmarksapi.services.attendance_buffer import (
+    flush_attendance_buffer,
+    get_buffered_class_sessions,
+)
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def flush_attendance_buffers():
+    """Écrit en base les enregistrements en attente de toutes les séances."""
+    for class_session_id in get_buffered_class_sessions():
+        flushed = flush_attendance_buffer(class_session_id)
+
+        if flushed:
+            logger.info(
+                f"{flushed} enregistrements écrits pour la séance {class_session_id}"
+            )
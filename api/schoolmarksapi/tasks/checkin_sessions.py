@@ -1,9 +1,15 @@
+from collections import defaultdict
+from typing import List
 from celery import shared_task
+from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
 from schoolmarksapi.models.checkin_session import CheckinSession
-from schoolmarksapi.models.course_class_enrollment import CourseClassEnrollment
 from schoolmarksapi.models.attendance import Attendance
 from schoolmarksapi.models.class_student import ClassStudent
+from schoolmarksapi.services.attendance_buffer import flush_attendance_buffer
+from schoolmarksapi.services.attendance_summary import update_attendance_summaries
+from schoolmarksapi.services.checkin_cache import invalidate_checkin_session
 import logging
 
 
@@ -16,67 +22,171 @@ class AttendanceStatus:
     LATE = "late"
 
 
-@shared_task
-def close_checkin_session(checkin_session_id: str):
-    logger.info(f"Fermeture de l'appel {checkin_session_id}")
+class CheckinSessionStatus:
+    ACTIVE = "active"
+    CLOSED = "closed"
 
-    try:
-        checkin_session = CheckinSession.objects.select_related("class_session").get(
-            id=checkin_session_id
-        )
 
-        if checkin_session.status == "closed":
-            logger.warning(f"L'appel {checkin_session_id} est déjà fermé")
-            return
+def close_checkin_sessions(checkin_session_ids: List) -> List:
+    """
+    Ferme un lot d'appels et note absents les élèves de la classe de chaque
+    séance qui ne se sont pas enregistrés. Retourne les identifiants des
+    appels fermés.
 
-        # Récupère le cours correspondant à cet appel
-        course = checkin_session.class_session.course
+    Les appels sont verrouillés avec ``skip_locked`` : un appel en cours de
+    fermeture par un autre worker est ignoré, et un appel déjà fermé n'est
+    plus sélectionné. Le nombre de requêtes ne dépend pas de la taille du lot.
+    """
+    with transaction.atomic():
+        checkin_sessions = list(
+            CheckinSession.objects.select_for_update(of=("self",), skip_locked=True)
+            .select_related("class_session")
+            .filter(id__in=checkin_session_ids, status=CheckinSessionStatus.ACTIVE)
+        )
 
-        # Récupère les étudiants inscrit à ce cours
-        enrolled_class_groups = CourseClassEnrollment.objects.filter(
-            course=course
-        ).values_list("class_group_id", flat=True)
+        if not checkin_sessions:
+            return []
+
+        # Les enregistrements encore en tampon sont écrits en base dans la même
+        # transaction, une fois les appels verrouillés, avant de calculer les
+        # absents. Ils ne sont retirés du tampon qu'après le commit
+        for class_session_id in {
+            checkin_session.class_session_id for checkin_session in checkin_sessions
+        }:
+            flush_attendance_buffer(class_session_id)
+
+        class_groups = {
+            checkin_session.class_session_id: checkin_session.class_session.class_group_id
+            for checkin_session in checkin_sessions
+        }
+
+        # Élèves de la classe de chaque séance et élèves déjà enregistrés
+        students_by_class = defaultdict(list)
+        for class_group_id, student_id in ClassStudent.objects.filter(
+            class_group_id__in=set(class_groups.values())
+        ).values_list("class_group_id", "student_id"):
+            students_by_class[class_group_id].append(student_id)
+
+        registered = set(
+            Attendance.objects.filter(
+                class_session_id__in=class_groups.keys()
+            ).values_list("class_session_id", "student_id")
+        )
 
-        enrolled_students = ClassStudent.objects.filter(
-            class_group_id__in=enrolled_class_groups
-        ).select_related("student")
+        now = timezone.now()
+        absences = [
+            Attendance(
+                class_session_id=class_session_id,
+                student_id=student_id,
+                checked_in_at=now,
+                status=AttendanceStatus.ABSENT,
+                minutes_late=0,
+            )
+            for class_session_id, class_group_id in class_groups.items()
+            for student_id in students_by_class[class_group_id]
+            if (class_session_id, student_id) not in registered
+        ]
+
+        # ignore_conflicts : un élève enregistré entre-temps garde sa présence.
+        # Les identifiants sont générés ici : ceux retrouvés en base sont les
+        # absences réellement insérées
+        Attendance.objects.bulk_create(
+            absences,
+            batch_size=settings.CHECKIN_FLUSH_BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        inserted_ids = set(
+            Attendance.objects.filter(
+                id__in=[absence.id for absence in absences]
+            ).values_list("id", flat=True)
+        )
+        absences = [absence for absence in absences if absence.id in inserted_ids]
+        update_attendance_summaries(
+            absences,
+            {
+                str(
+                    checkin_session.class_session_id
+                ): checkin_session.class_session.course_id
+                for checkin_session in checkin_sessions
+            },
+        )
+        created_count = len(absences)
 
-        # Liste les étudiants déjà enregistré à cet appel
-        existing_records = Attendance.objects.filter(
-            class_session=checkin_session.class_session
-        ).values_list("student_id", flat=True)
+        closed_ids = [checkin_session.id for checkin_session in checkin_sessions]
+        CheckinSession.objects.filter(id__in=closed_ids).update(
+            status=CheckinSessionStatus.CLOSED
+        )
 
-        now = timezone.now()
+        # update() n'envoie pas post_save : le cache des appels est invalidé ici
+        for checkin_session_id in closed_ids:
+            invalidate_checkin_session(checkin_session_id)
 
-        absent_records = []
-
-        for class_student in enrolled_students:
-            if class_student.student_id not in existing_records:
-                absent_records.append(
-                    Attendance(
-                        class_session=checkin_session.class_session,
-                        student=class_student.student,
-                        checked_in_at=now,
-                        status=AttendanceStatus.ABSENT,
-                    )
-                )
+    if created_count:
+        logger.info(
+            f"{created_count} élèves ont été noté absent pour {len(closed_ids)} appel(s)"
+        )
 
-        if absent_records:
-            created_count = len(Attendance.objects.bulk_create(absent_records))
-            logger.info(
-                f"{created_count} élèves ont été noté absent pour l'appel {checkin_session_id}"
-            )
+    return closed_ids
 
-        checkin_session.status = "closed"
-        checkin_session.save()
 
-        logger.info(f"L'appel {checkin_session_id} a été fermé avec succès")
+@shared_task
+def close_checkin_session(checkin_session_id: str):
+    logger.info(f"Fermeture de l'appel {checkin_session_id}")
+
+    try:
+        if close_checkin_sessions([checkin_session_id]):
+            logger.info(f"L'appel {checkin_session_id} a été fermé avec succès")
+        elif CheckinSession.objects.filter(id=checkin_session_id).exists():
+            logger.warning(f"L'appel {checkin_session_id} est déjà fermé")
+        else:
+            logger.error(f"L'appel {checkin_session_id} n'a pas été trouvé")
 
-    except CheckinSession.DoesNotExist:
-        logger.error(f"L'appel {checkin_session_id} n'a pas été trouvé")
     except Exception as e:
         logger.error(
             f"Erreur lors de la fermeture de l'appel {checkin_session_id}: {str(e)}",
             exc_info=True,
         )
         raise
+
+
+@shared_task
+def close_expired_checkin_sessions():
+    """
+    Ferme les appels dont l'heure de fin est passée (tâche périodique,
+    CHECKIN_CLOSE_INTERVAL). Peut s'exécuter sur plusieurs workers à la fois.
+
+    Si le lot échoue, ses appels sont fermés un par un, chacun dans sa propre
+    transaction : un appel en erreur est journalisé et ignoré sans bloquer les
+    autres.
+    """
+    checkin_session_ids = list(
+        CheckinSession.objects.filter(
+            status=CheckinSessionStatus.ACTIVE, closed_at__lte=timezone.now()
+        )
+        .order_by("closed_at")
+        .values_list("id", flat=True)[: settings.CHECKIN_CLOSE_BATCH_SIZE]
+    )
+
+    if not checkin_session_ids:
+        return
+
+    try:
+        closed_ids = close_checkin_sessions(checkin_session_ids)
+    except Exception as e:
+        logger.warning(
+            f"Erreur lors de la fermeture d'un lot d'appels ({str(e)}), "
+            "fermeture appel par appel"
+        )
+        closed_ids = []
+
+        for checkin_session_id in checkin_session_ids:
+            try:
+                closed_ids.extend(close_checkin_sessions([checkin_session_id]))
+            except Exception as e:
+                logger.error(
+                    f"Erreur lors de la fermeture de l'appel {checkin_session_id}: {str(e)}",
+                    exc_info=True,
+                )
+
+    if closed_ids:
+        logger.info(f"{len(closed_ids)} appel(s) fermé(s)")
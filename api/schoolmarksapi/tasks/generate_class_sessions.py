@@ -0,0 +1,135 @@
+from datetime import date, time, timedelta
+from functools import partial
+from typing import Dict, Iterator, List
+from uuid import UUID
+from celery import shared_task
+from django.conf import settings
+
+from schoolmarksapi.models import ClassSession, CourseClassEnrollment
+from schoolmarksapi.services.import_runner import IMPORT_TASK_OPTIONS, run_import
+from schoolmarksapi.services.import_state import ImportStateWriter
+
+
+def expand_rule(rule: Dict) -> Iterator[date]:
+    """Dates des séances d'une règle, hors dates exclues."""
+    start_date = date.fromisoformat(rule["start_date"])
+    end_date = date.fromisoformat(rule["end_date"])
+    exclusions = {date.fromisoformat(day) for day in rule.get("exclusions", [])}
+
+    day = start_date + timedelta(days=(rule["weekday"] - start_date.weekday()) % 7)
+
+    while day <= end_date:
+        if day not in exclusions:
+            yield day
+        day += timedelta(weeks=1)
+
+
+def create_class_sessions(rules: List[Dict], dry_run: bool = False):
+    """
+    Crée les séances d'un paquet de règles de récurrence.
+
+    Les inscriptions cours/classe de toutes les règles sont résolues en une
+    requête et affectées directement aux séances (``ClassSession.save()``
+    n'est pas appelé). Les séances déjà existantes sont chargées en une
+    requête pour les compter, et ``ignore_conflicts`` couvre celles créées
+    entre-temps.
+    """
+    course_ids = {rule["course_id"] for rule in rules}
+    class_ids = {rule["class_id"] for rule in rules}
+
+    enrollments = {
+        (course_id, class_id): enrollment_id
+        for enrollment_id, course_id, class_id in CourseClassEnrollment.objects.filter(
+            course_id__in=course_ids, class_group_id__in=class_ids
+        ).values_list("id", "course_id", "class_group_id")
+    }
+
+    warnings = []
+    sessions = {}
+    results = []
+
+    for rule in rules:
+        course_id = UUID(rule["course_id"])
+        class_id = UUID(rule["class_id"])
+        enrollment_id = enrollments.get((course_id, class_id))
+
+        if enrollment_id is None:
+            warnings.append(
+                f"Course {rule['course_id']} is not taught to class {rule['class_id']}"
+            )
+            continue
+
+        start_time = time.fromisoformat(rule["start_time"])
+        dates = list(expand_rule(rule))
+
+        # Indexées par la contrainte unique : deux règles qui produisent la
+        # même séance n'en créent qu'une
+        for day in dates:
+            sessions[(course_id, class_id, day, start_time)] = ClassSession(
+                course_id=course_id,
+                class_group_id=class_id,
+                course_class_enrollment_id=enrollment_id,
+                date=day,
+                start_time=start_time,
+                end_time=time.fromisoformat(rule["end_time"]),
+                room=rule["room"],
+            )
+
+        results.append(
+            {
+                "course_id": rule["course_id"],
+                "class_id": rule["class_id"],
+                "weekday": rule["weekday"],
+                "start_time": rule["start_time"],
+                "sessions": len(dates),
+            }
+        )
+
+    if not sessions:
+        return results, warnings, {}
+
+    existing = set(
+        ClassSession.objects.filter(
+            course_id__in=course_ids,
+            class_group_id__in=class_ids,
+            date__gte=min(day for _, _, day, _ in sessions),
+            date__lte=max(day for _, _, day, _ in sessions),
+        ).values_list("course_id", "class_group_id", "date", "start_time")
+    )
+    new_sessions = [session for key, session in sessions.items() if key not in existing]
+
+    if not dry_run:
+        ClassSession.objects.bulk_create(
+            new_sessions,
+            batch_size=settings.IMPORT_BULK_BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+
+    return (
+        results,
+        warnings,
+        {
+            "inserted": len(new_sessions),
+            "unchanged": len(sessions) - len(new_sessions),
+        },
+    )
+
+
+@shared_task(**IMPORT_TASK_OPTIONS)
+def process_class_sessions(
+    self,
+    import_id,
+    total_rows: int,
+    imported_by: str,
+    dry_run: bool = False,
+):
+    import_state = ImportStateWriter(
+        import_id,
+        "class_sessions",
+        imported_by,
+        total_rows,
+        "atomic",
+        "insert",
+        dry_run,
+    )
+    run_import(self, import_state, partial(create_class_sessions, dry_run=dry_run))
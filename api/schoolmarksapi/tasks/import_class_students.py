@@ -0,0 +1,160 @@
+from collections import defaultdict
+from typing import Dict, List, Optional, Set
+from celery import shared_task
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+from schoolmarksapi.models import Class, ClassStudent
+from schoolmarksapi.services.checkin_cache import invalidate_class_checkin_sessions
+from schoolmarksapi.services.import_runner import IMPORT_TASK_OPTIONS, run_import
+from schoolmarksapi.services.import_state import ImportStateWriter
+
+User = get_user_model()
+
+
+class ClassStudentsSync:
+    """
+    Synchronise les élèves des classes à partir d'un CSV (code de classe,
+    email de l'élève).
+
+    Le fichier décrit la composition complète de chaque classe qu'il
+    mentionne : les élèves absents du fichier sont retirés de ces classes, les
+    autres classes ne sont pas modifiées. Les codes et les emails de chaque
+    paquet sont résolus en une requête chacun ; une fois le fichier lu, les
+    inscriptions actuelles de toutes les classes concernées sont chargées en
+    une requête, puis les ajouts sont écrits avec ``bulk_create`` et les
+    retraits avec un seul ``DELETE``.
+    """
+
+    def __init__(self, dry_run: bool = False):
+        self.dry_run = dry_run
+        self.classes: Dict[str, Class] = {}
+        self.student_ids: Dict[str, int] = {}
+        self.unknown_codes: Set[str] = set()
+        self.unknown_emails: Set[str] = set()
+        self.wanted: Dict[str, Set[int]] = defaultdict(set)
+
+    def process_chunk(self, rows: List[Dict]):
+        codes = {row["class_code"] for row in rows} - self.classes.keys()
+        emails = {
+            User.objects.normalize_email(row["student_email"]) for row in rows
+        } - self.student_ids.keys()
+
+        if codes:
+            for school_class in Class.objects.filter(code__in=codes).only("id", "code"):
+                self.classes[school_class.code] = school_class
+
+        if emails:
+            self.student_ids.update(
+                User.objects.filter(email__in=emails).values_list("email", "id")
+            )
+
+        warnings = []
+
+        for row in rows:
+            code = row["class_code"]
+            email = User.objects.normalize_email(row["student_email"])
+
+            if code not in self.classes:
+                if code not in self.unknown_codes:
+                    self.unknown_codes.add(code)
+                    warnings.append(f"Class with code {code} not found")
+                continue
+
+            if email not in self.student_ids:
+                if email not in self.unknown_emails:
+                    self.unknown_emails.add(email)
+                    warnings.append(f"Student with email {email} not found")
+                continue
+
+            self.wanted[code].add(self.student_ids[email])
+
+        return [], warnings, {}
+
+    def finalize(self):
+        classes = {self.classes[code].id: code for code in self.wanted}
+        current: Dict[str, Set[int]] = defaultdict(set)
+        to_remove = []
+
+        for membership_id, class_id, student_id in ClassStudent.objects.filter(
+            class_group_id__in=classes
+        ).values_list("id", "class_group_id", "student_id"):
+            code = classes[class_id]
+            current[code].add(student_id)
+
+            if student_id not in self.wanted[code]:
+                to_remove.append(membership_id)
+
+        to_add = []
+        changed_classes = set()
+        results = []
+
+        for class_id, code in classes.items():
+            added = self.wanted[code] - current[code]
+            removed = current[code] - self.wanted[code]
+
+            if added or removed:
+                changed_classes.add(class_id)
+
+            to_add.extend(
+                ClassStudent(class_group_id=class_id, student_id=student_id)
+                for student_id in added
+            )
+            results.append(
+                {
+                    "id": str(class_id),
+                    "code": code,
+                    "students": len(self.wanted[code]),
+                    "added": len(added),
+                    "removed": len(removed),
+                }
+            )
+
+        if not self.dry_run:
+            ClassStudent.objects.bulk_create(
+                to_add, batch_size=settings.IMPORT_BULK_BATCH_SIZE
+            )
+
+            if to_remove:
+                ClassStudent.objects.filter(id__in=to_remove).delete()
+
+            # Ajouts et retraits : bulk_create n'envoie pas de signal
+            invalidate_class_checkin_sessions(changed_classes)
+
+        unchanged = sum(len(students) for students in self.wanted.values()) - len(
+            to_add
+        )
+
+        return (
+            results,
+            None,
+            {
+                "inserted": len(to_add),
+                "deleted": len(to_remove),
+                "unchanged": unchanged,
+            },
+        )
+
+
+@shared_task(**IMPORT_TASK_OPTIONS)
+def process_class_students(
+    self,
+    import_id,
+    total_rows: int,
+    imported_by: str,
+    chunk_size: Optional[int] = None,
+    dry_run: bool = False,
+):
+    # La comparaison porte sur le fichier entier : toujours en mode atomic
+    import_state = ImportStateWriter(
+        import_id,
+        "class_students",
+        imported_by,
+        total_rows,
+        "atomic",
+        "sync",
+        dry_run,
+    )
+    sync = ClassStudentsSync(dry_run)
+
+    run_import(self, import_state, sync.process_chunk, chunk_size, sync.finalize)
@@ -1,70 +1,100 @@
-import json
-import os
-from django.db import transaction
-from django.utils import timezone
+from functools import partial
+from typing import Dict, List, Optional
 from celery import shared_task
-import redis
+from django.conf import settings
 
 from schoolmarksapi.models import Class
+from schoolmarksapi.services.import_diff import apply_diff, diff_rows
+from schoolmarksapi.services.import_runner import IMPORT_TASK_OPTIONS, run_import
+from schoolmarksapi.services.import_state import ImportStateWriter
 
-redis_client = redis.Redis(
-    host=os.environ.get("TASK_REDIS_HOST"),
-    port=int(os.environ.get("TASK_REDIS_PORT")),
-)
-
-
-@shared_task
-def process_classes(import_id, classes_to_create, imported_by: str):
-    started_at = timezone.now().isoformat()
-    total_rows = len(classes_to_create)
-
-    def update_import_state(
-        progress=0, status="processing", results=None, error=None, finished_at=None
-    ):
-        state = {
-            "type": "classes",
-            "progress": progress,
-            "status": status,
-            "results": results,
-            "error": error,
-            "imported_by": imported_by,
-            "started_at": started_at,
-            "finished_at": finished_at,
-        }
-        redis_client.set(f"import_{import_id}", json.dumps(state))
-
-    try:
-        update_import_state(progress=0, status="processing")
-
-        with transaction.atomic():
-            created_classes = []
-
-            for index, class_data in enumerate(classes_to_create, 1):
-                new_class = Class.objects.create(
-                    name=class_data["name"],
-                    code=class_data["code"],
-                    year_of_graduation=class_data["year_of_graduation"],
-                )
-
-                created_classes.append(
-                    {
-                        "id": str(new_class.id),
-                        "name": new_class.name,
-                        "code": new_class.code,
-                        "year_of_graduation": new_class.year_of_graduation,
-                    }
-                )
-
-                progress = int((index / total_rows) * 100)
-                update_import_state(progress=progress, status="processing")
-
-        finished_at = timezone.now().isoformat()
-
-        update_import_state(
-            progress=100,
-            status="completed",
-            results=json.dumps(created_classes),
-            finished_at=finished_at,
+CLASS_FIELDS = ["name", "year_of_graduation"]
+
+
+def serialize_class(school_class: Class, action: str) -> Dict:
+    return {
+        "id": str(school_class.id),
+        "name": school_class.name,
+        "code": school_class.code,
+        "year_of_graduation": school_class.year_of_graduation,
+        "action": action,
+    }
+
+
+def build_class(class_data: Dict) -> Class:
+    new_class = Class(
+        name=class_data["name"],
+        code=class_data["code"],
+        year_of_graduation=class_data["year_of_graduation"],
+    )
+    # bulk_create n'appelle pas save(), donc pas clean()
+    new_class.clean()
+
+    return new_class
+
+
+def create_classes(
+    classes_to_create: List[Dict],
+    write_mode: str = "insert",
+    dry_run: bool = False,
+):
+    """
+    Écrit les classes d'un paquet.
+
+    En mode ``insert`` les classes sont créées avec ``bulk_create`` et un code
+    déjà existant fait échouer l'import. En mode ``upsert`` les classes
+    existantes (même code) sont chargées en une requête : seules les classes
+    nouvelles ou modifiées sont écrites. Avec ``dry_run`` rien n'est écrit et
+    seuls les compteurs sont retournés.
+    """
+    if write_mode == "insert" and not dry_run:
+        new_classes = [build_class(class_data) for class_data in classes_to_create]
+        Class.objects.bulk_create(
+            new_classes, batch_size=settings.IMPORT_BULK_BATCH_SIZE
+        )
+
+        return (
+            [serialize_class(new_class, "inserted") for new_class in new_classes],
+            None,
+            {"inserted": len(new_classes)},
         )
-    except Exception as e:
-        update_import_state(status="failed", error=str(e))
+
+    diff = diff_rows(Class, "code", classes_to_create, CLASS_FIELDS)
+    new_classes = [build_class(class_data) for class_data in diff.to_create]
+
+    for school_class in diff.to_update:
+        school_class.clean()
+
+    if dry_run:
+        return [], None, diff.counts
+
+    apply_diff(Class, "code", new_classes, diff)
+
+    results = [serialize_class(new_class, "inserted") for new_class in new_classes]
+    results.extend(
+        serialize_class(school_class, "updated") for school_class in diff.to_update
+    )
+
+    return results, None, diff.counts
+
+
+@shared_task(**IMPORT_TASK_OPTIONS)
+def process_classes(
+    self,
+    import_id,
+    total_rows: int,
+    imported_by: str,
+    commit_mode: str = "atomic",
+    chunk_size: Optional[int] = None,
+    write_mode: str = "insert",
+    dry_run: bool = False,
+):
+    import_state = ImportStateWriter(
+        import_id, "classes", imported_by, total_rows, commit_mode, write_mode, dry_run
+    )
+    run_import(
+        self,
+        import_state,
+        partial(create_classes, write_mode=write_mode, dry_run=dry_run),
+        chunk_size,
+    )
@@ -1,100 +1,138 @@
-import json
-import os
-from django.db import transaction
-from django.utils import timezone
+from functools import partial
+from typing import Dict, List, Optional
 from celery import shared_task
-import redis
+from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.contrib.auth import get_user_model
 
 from schoolmarksapi.models import Course
+from schoolmarksapi.services.import_diff import apply_diff, diff_rows
+from schoolmarksapi.services.import_runner import IMPORT_TASK_OPTIONS, run_import
+from schoolmarksapi.services.import_state import ImportStateWriter
 
 User = get_user_model()
-redis_client = redis_client = redis.Redis(
-    host=os.environ.get("TASK_REDIS_HOST"),
-    port=int(os.environ.get("TASK_REDIS_PORT")),
-)
-
-
-@shared_task
-def process_courses(import_id, courses_to_create, imported_by: str):
-    started_at = timezone.now().isoformat()
-    total_rows = len(courses_to_create)
-
-    def update_import_state(
-        progress=0,
-        status="processing",
-        results=None,
-        error=None,
-        finished_at=None,
-        warnings=None,
-    ):
-        state = {
-            "type": "courses",
-            "progress": progress,
-            "status": status,
-            "results": results,
-            "error": error,
-            "warnings": warnings,
-            "imported_by": imported_by,
-            "started_at": started_at,
-            "finished_at": finished_at,
-        }
-        redis_client.set(f"import_{import_id}", json.dumps(state))
-
-    try:
-        update_import_state(progress=0, status="processing")
-        warnings = []
-
-        with transaction.atomic():
-            created_courses = []
-
-            for index, course_data in enumerate(courses_to_create, 1):
-                # Try to find professor if email is provided
-                professor = None
-                if professor_email := course_data.get("teacher_email"):
-                    try:
-                        professor = User.objects.get(email=professor_email)
-                    except User.DoesNotExist:
-                        warnings.append(
-                            f"Professor with email {professor_email} not found for course {course_data['code']}"
-                        )
-
-                new_course = Course.objects.create(
-                    name=course_data["name"],
-                    code=course_data["code"],
-                    professor=professor,
-                )
 
-                created_courses.append(
-                    {
-                        "id": str(new_course.id),
-                        "name": new_course.name,
-                        "code": new_course.code,
-                        "professor": (
-                            f"{professor.first_name} {professor.last_name}"
-                            if professor
-                            else None
-                        ),
-                        "professor_email": (professor_email if professor else None),
-                    }
-                )
 
-                progress = int((index / total_rows) * 100)
-                update_import_state(
-                    progress=progress,
-                    status="processing",
-                    warnings=warnings if warnings else None,
+COURSE_FIELDS = ["name", "professor_id"]
+
+
+def serialize_course(course: Course, professor, action: str) -> Dict:
+    return {
+        "id": str(course.id),
+        "name": course.name,
+        "code": course.code,
+        "professor": (
+            f"{professor.first_name} {professor.last_name}" if professor else None
+        ),
+        "professor_email": professor.email if professor else None,
+        "action": action,
+    }
+
+
+def create_courses(
+    courses_to_create: List[Dict],
+    write_mode: str = "insert",
+    dry_run: bool = False,
+):
+    """
+    Écrit les cours d'un paquet.
+
+    Les professeurs sont résolus en une requête pour tout le paquet. Comme
+    ``bulk_create`` n'appelle pas ``Course.clean()``, le rôle du professeur est
+    vérifié ici sur les utilisateurs déjà chargés. En mode ``upsert`` les cours
+    existants (même code) sont chargés en une requête et seuls les cours
+    nouveaux ou modifiés sont écrits ; avec ``dry_run`` rien n'est écrit.
+    """
+    professor_emails = {
+        course_data["teacher_email"]
+        for course_data in courses_to_create
+        if course_data.get("teacher_email")
+    }
+    professors = {
+        professor.email: professor
+        for professor in User.objects.filter(email__in=professor_emails).only(
+            "id", "email", "first_name", "last_name", "is_staff"
+        )
+    }
+    professors_by_id = {professor.id: professor for professor in professors.values()}
+
+    rows = []
+    warnings = []
+
+    for course_data in courses_to_create:
+        # Try to find professor if email is provided
+        professor = None
+        if professor_email := course_data.get("teacher_email"):
+            professor = professors.get(professor_email)
+
+            if professor is None:
+                warnings.append(
+                    f"Professor with email {professor_email} not found for course {course_data['code']}"
                 )
+            elif not professor.is_staff:
+                raise ValidationError(
+                    f"L'utilisateur assigné doit avoir le rôle de professeur ({course_data['code']})"
+                )
+
+        rows.append(
+            {
+                "name": course_data["name"],
+                "code": course_data["code"],
+                "professor_id": professor.id if professor else None,
+            }
+        )
 
-        finished_at = timezone.now().isoformat()
+    if write_mode == "insert" and not dry_run:
+        new_courses = [Course(**row) for row in rows]
+        Course.objects.bulk_create(
+            new_courses, batch_size=settings.IMPORT_BULK_BATCH_SIZE
+        )
 
-        update_import_state(
-            progress=100,
-            status="completed",
-            results=json.dumps(created_courses),
-            warnings=warnings if warnings else None,
-            finished_at=finished_at,
+        return (
+            [
+                serialize_course(
+                    course, professors_by_id.get(course.professor_id), "inserted"
+                )
+                for course in new_courses
+            ],
+            warnings,
+            {"inserted": len(new_courses)},
         )
 
-    except Exception as e:
-        update_import_state(status="failed", error=str(e))
+    diff = diff_rows(Course, "code", rows, COURSE_FIELDS)
+
+    if dry_run:
+        return [], warnings, diff.counts
+
+    new_courses = [Course(**row) for row in diff.to_create]
+    apply_diff(Course, "code", new_courses, diff)
+
+    results = [
+        serialize_course(course, professors_by_id.get(course.professor_id), action)
+        for courses, action in ((new_courses, "inserted"), (diff.to_update, "updated"))
+        for course in courses
+    ]
+
+    return results, warnings, diff.counts
+
+
+@shared_task(**IMPORT_TASK_OPTIONS)
+def process_courses(
+    self,
+    import_id,
+    total_rows: int,
+    imported_by: str,
+    commit_mode: str = "atomic",
+    chunk_size: Optional[int] = None,
+    write_mode: str = "insert",
+    dry_run: bool = False,
+):
+    import_state = ImportStateWriter(
+        import_id, "courses", imported_by, total_rows, commit_mode, write_mode, dry_run
+    )
+    run_import(
+        self,
+        import_state,
+        partial(create_courses, write_mode=write_mode, dry_run=dry_run),
+        chunk_size,
+    )
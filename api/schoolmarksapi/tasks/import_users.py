@@ -1,17 +1,35 @@
-import json
 import os
 import secrets
 import string
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, List, Optional, Tuple
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
 from django.db import transaction
-from django.utils import timezone
 from django.contrib.auth import get_user_model
 from celery import shared_task
-import redis
 
-redis_client = redis_client = redis.Redis(
-    host=os.environ.get("TASK_REDIS_HOST"),
-    port=int(os.environ.get("TASK_REDIS_PORT")),
-)
+from schoolmarksapi.services.import_diff import apply_diff, diff_rows
+from schoolmarksapi.services.import_runner import IMPORT_TASK_OPTIONS, run_import
+from schoolmarksapi.services.import_state import ImportStateWriter
+
+# (is_staff, is_superuser) suivant le rôle indiqué dans le CSV
+ROLE_FLAGS = {
+    "admin": (True, True),
+    "teacher": (True, False),
+    "student": (False, False),
+}
+
+# Champs comparés (et mis à jour) en mode upsert
+USER_FIELDS = [
+    "first_name",
+    "last_name",
+    "is_staff",
+    "is_superuser",
+    "username",
+    "birthday",
+]
 
 
 def generate_password(length=12):
@@ -23,76 +41,234 @@ def get_default_username(email: str):
     return email.split("@")[0]
 
 
-@shared_task
-def process_users(import_id, users_to_create, imported_by: str):
-    started_at = timezone.now().isoformat()
-    total_rows = len(users_to_create)
-
-    def update_import_state(
-        progress=0, status="processing", results=None, error=None, finished_at=None
-    ):
-        state = {
-            "type": "users",
-            "progress": progress,
-            "status": status,
-            "results": results,
-            "error": error,
-            "imported_by": imported_by,
-            "started_at": started_at,
-            "finished_at": finished_at,
-        }
-        redis_client.set(f"import_{import_id}", json.dumps(state))
-
-    try:
-        update_import_state(progress=0, status="processing")
-
-        with transaction.atomic():
-            User = get_user_model()
-            created_users = []
-
-            for index, user_data in enumerate(users_to_create, 1):
-                temp_password = generate_password()
-                username = user_data.get("username") or get_default_username(
-                    user_data["email"]
-                )
-                user_role = user_data.pop("role")
-
-                user = User.objects.create_user(
-                    username=username,
-                    password=temp_password,
-                    has_changed_password=False,
-                    **user_data,
-                )
-
-                # Assigne les permissions suivant le rôle
-                if user_role == "admin":
-                    user.is_staff = True
-                    user.is_superuser = True
-                elif user_role == "teacher":
-                    user.is_staff = True
-                    user.is_superuser = False
-
-                user.save()
-
-                created_users.append(
-                    {
-                        "first_name": user.first_name,
-                        "last_name": user.last_name,
-                        "email": user.email,
-                        "temp_password": temp_password,
-                    }
-                )
-
-                progress = int((index / total_rows) * 100)
-                update_import_state(progress=progress, status="processing")
-
-        finished_at = timezone.now().isoformat()
-
-        update_import_state(
-            progress=100,
-            status="completed",
-            results=json.dumps(created_users),
-            finished_at=finished_at,
+class PasswordHasher:
+    """
+    Hash des mots de passe sur plusieurs threads.
+
+    Le hash PBKDF2 est volontairement coûteux et représente l'essentiel du
+    temps d'un import d'utilisateurs. Il est réparti sur un pool de threads
+    (``IMPORT_HASH_WORKERS``, tous les coeurs par défaut) : ``hashlib``
+    libère le GIL pendant le calcul (comme argon2 et bcrypt), et un pool de
+    threads fonctionne dans un worker Celery prefork, dont les processus
+    enfants sont des daemons qui ne peuvent pas créer de sous-processus.
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = workers or settings.IMPORT_HASH_WORKERS or os.cpu_count() or 1
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def hash_many(self, passwords: List[str]) -> List[str]:
+        if self.workers < 2 or len(passwords) < 2:
+            return [make_password(password) for password in passwords]
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="password-hasher"
+            )
+
+        return list(self._executor.map(make_password, passwords))
+
+
+def get_user_values(User, user_data: Dict) -> Dict:
+    """Valeurs des champs du modèle (hors mot de passe) pour une ligne du CSV."""
+    values = dict(user_data)
+    values["is_staff"], values["is_superuser"] = ROLE_FLAGS[values.pop("role")]
+    values["email"] = User.objects.normalize_email(values["email"])
+
+    if values.get("birthday"):
+        values["birthday"] = User._meta.get_field("birthday").to_python(
+            values["birthday"]
+        )
+
+    return values
+
+
+def build_user(User, values: Dict, password_hash: str):
+    """Construit (sans l'enregistrer) un utilisateur à partir de ``get_user_values``."""
+    values = dict(values)
+    username = values.pop("username", None) or get_default_username(values["email"])
+
+    return User(
+        username=username,
+        password=password_hash,
+        has_changed_password=False,
+        **values,
+    )
+
+
+def serialize_user(user, temp_password: Optional[str], action: str) -> Dict:
+    return {
+        "first_name": user.first_name,
+        "last_name": user.last_name,
+        "email": user.email,
+        "temp_password": temp_password,
+        "action": action,
+    }
+
+
+def hash_passwords(
+    rows: List[Dict], hasher: PasswordHasher
+) -> Dict[str, Tuple[str, str]]:
+    """Génère et hash un mot de passe temporaire par ligne : email -> (mot de passe, hash)."""
+    temp_passwords = [generate_password() for _ in rows]
+    password_hashes = hasher.hash_many(temp_passwords)
+
+    return {
+        row["email"]: (temp_password, password_hash)
+        for row, temp_password, password_hash in zip(
+            rows, temp_passwords, password_hashes
+        )
+    }
+
+
+def get_compared_fields(rows: List[Dict]) -> List[str]:
+    # Les colonnes facultatives ne sont comparées que si elles sont dans le CSV
+    return [field for field in USER_FIELDS if not rows or field in rows[0]]
+
+
+def prepare_users(
+    users_to_create: List[Dict],
+    hasher: PasswordHasher,
+    write_mode: str = "insert",
+    dry_run: bool = False,
+) -> Dict:
+    """
+    Prépare un paquet hors transaction : hash en parallèle les mots de passe
+    temporaires des utilisateurs qui n'existent pas encore (tous en mode
+    ``insert``, aucun avec ``dry_run``).
+
+    Retourne les lignes du paquet (``users``) et les mots de passe indexés
+    par email (``passwords``), sérialisables en JSON.
+    """
+    User = get_user_model()
+    rows = [get_user_values(User, user_data) for user_data in users_to_create]
+
+    if dry_run:
+        new_rows = []
+    elif write_mode == "insert":
+        new_rows = rows
+    else:
+        new_rows = diff_rows(User, "email", rows, get_compared_fields(rows)).to_create
+
+    return {"users": users_to_create, "passwords": hash_passwords(new_rows, hasher)}
+
+
+def build_users(User, rows: List[Dict], prepared: Dict, hasher: PasswordHasher):
+    """Construit les nouveaux utilisateurs avec les mots de passe préparés."""
+    # Utilisateur supprimé depuis la préparation : son mot de passe est hashé ici
+    passwords = prepared["passwords"]
+    missing = [row for row in rows if row["email"] not in passwords]
+
+    if missing:
+        passwords.update(hash_passwords(missing, hasher))
+
+    temp_passwords = [passwords[row["email"]][0] for row in rows]
+    users = [build_user(User, row, passwords[row["email"]][1]) for row in rows]
+
+    return users, temp_passwords
+
+
+def write_users(
+    prepared: Dict,
+    hasher: PasswordHasher,
+    write_mode: str = "insert",
+    dry_run: bool = False,
+):
+    """
+    Écrit par lots les utilisateurs d'un paquet préparé par ``prepare_users``.
+
+    En mode ``upsert`` les utilisateurs existants (même email) sont chargés en
+    une requête et seuls les champs modifiés sont mis à jour : leur mot de
+    passe n'est jamais remplacé. Avec ``dry_run`` rien n'est écrit.
+    """
+    User = get_user_model()
+    rows = [get_user_values(User, user_data) for user_data in prepared["users"]]
+
+    if write_mode == "insert" and not dry_run:
+        users, temp_passwords = build_users(User, rows, prepared, hasher)
+        batch_size = settings.IMPORT_BULK_BATCH_SIZE
+
+        for start in range(0, len(users), batch_size):
+            User.objects.bulk_create(users[start : start + batch_size])
+
+        return (
+            [
+                serialize_user(user, temp_password, "inserted")
+                for user, temp_password in zip(users, temp_passwords)
+            ],
+            None,
+            {"inserted": len(users)},
+        )
+
+    diff = diff_rows(User, "email", rows, get_compared_fields(rows))
+
+    if dry_run:
+        return [], None, diff.counts
+
+    users, temp_passwords = build_users(User, diff.to_create, prepared, hasher)
+    apply_diff(User, "email", users, diff)
+
+    results = [
+        serialize_user(user, temp_password, "inserted")
+        for user, temp_password in zip(users, temp_passwords)
+    ]
+    results.extend(serialize_user(user, None, "updated") for user in diff.to_update)
+
+    return results, None, diff.counts
+
+
+def create_users(
+    users_to_create: List[Dict],
+    hasher: Optional[PasswordHasher] = None,
+    write_mode: str = "insert",
+    dry_run: bool = False,
+):
+    """
+    Importe un paquet d'utilisateurs : ``prepare_users`` puis ``write_users``
+    dans une transaction, qui ne contient donc pas le hash des mots de passe.
+    ``hasher`` permet de réutiliser le même pool d'un paquet à l'autre.
+    """
+    if hasher is None:
+        with PasswordHasher() as hasher:
+            return create_users(users_to_create, hasher, write_mode, dry_run)
+
+    prepared = prepare_users(users_to_create, hasher, write_mode, dry_run)
+
+    with transaction.atomic():
+        return write_users(prepared, hasher, write_mode, dry_run)
+
+
+@shared_task(**IMPORT_TASK_OPTIONS)
+def process_users(
+    self,
+    import_id,
+    total_rows: int,
+    imported_by: str,
+    commit_mode: str = "atomic",
+    chunk_size: Optional[int] = None,
+    write_mode: str = "insert",
+    dry_run: bool = False,
+):
+    import_state = ImportStateWriter(
+        import_id, "users", imported_by, total_rows, commit_mode, write_mode, dry_run
+    )
+
+    with PasswordHasher() as hasher:
+        # Les mots de passe sont hashés avant l'ouverture des transactions
+        run_import(
+            self,
+            import_state,
+            partial(write_users, hasher=hasher, write_mode=write_mode, dry_run=dry_run),
+            chunk_size,
+            prepare_chunk=partial(
+                prepare_users, hasher=hasher, write_mode=write_mode, dry_run=dry_run
+            ),
         )
-    except Exception as e:
-        update_import_state(status="failed", error=str(e))
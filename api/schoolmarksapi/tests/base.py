@@ -0,0 +1,30 @@
+import fakeredis
+from unittest import mock
+from django.test import TestCase
+
+from common.redis_pool import get_pool
+
+
+class RedisTestCase(TestCase):
+    """
+    Test dont les clients Redis (pools partagés de ``common.redis_pool``)
+    utilisent un serveur fakeredis vide, recréé pour chaque test.
+    """
+
+    def setUp(self):
+        super().setUp()
+        server = fakeredis.FakeServer()
+
+        for decode_responses in (False, True):
+            pool = get_pool(decode_responses)
+
+            for patcher in (
+                mock.patch.object(pool, "connection_class", fakeredis.FakeConnection),
+                mock.patch.dict(pool.connection_kwargs, server=server),
+            ):
+                patcher.start()
+                self.addCleanup(patcher.stop)
+
+            # Les connexions déjà ouvertes ne sont pas réutilisées
+            pool.reset()
+            self.addCleanup(pool.reset)
@@ -0,0 +1,96 @@
+from datetime import date, time, timedelta
+from django.utils import timezone
+
+from schoolmarksapi.models import (
+    Attendance,
+    AttendanceSummary,
+    Class,
+    ClassSession,
+    Course,
+    User,
+)
+from schoolmarksapi.services.attendance_buffer import (
+    buffer_attendance,
+    flush_attendance_buffer,
+    get_buffer_key,
+    redis_client,
+)
+from schoolmarksapi.tests.base import RedisTestCase
+
+
+class FlushAttendanceBufferTest(RedisTestCase):
+    def setUp(self):
+        super().setUp()
+        self.course = Course.objects.create(name="Mathématiques", code="MATH")
+        school_class = Class.objects.create(
+            name="Terminale A", code="TA", year_of_graduation=2026
+        )
+        self.class_session = ClassSession.objects.create(
+            course=self.course,
+            class_group=school_class,
+            date=date.today(),
+            start_time=time(8),
+            end_time=time(10),
+            room="A1",
+        )
+        self.students = [
+            User.objects.create_user(
+                username=f"eleve{index}", email=f"eleve{index}@example.com"
+            )
+            for index in range(2)
+        ]
+        self.closed_at = timezone.now() + timedelta(minutes=10)
+
+    def buffer(self, student, status="present", minutes_late=0):
+        return buffer_attendance(
+            Attendance(
+                class_session_id=self.class_session.id,
+                student_id=student.id,
+                status=status,
+                minutes_late=minutes_late,
+                checked_in_at=timezone.now(),
+            ),
+            self.closed_at,
+        )
+
+    def flush(self, commit=True):
+        with self.captureOnCommitCallbacks(execute=commit):
+            return flush_attendance_buffer(self.class_session.id)
+
+    def get_summary(self, student):
+        return AttendanceSummary.objects.get(student=student, course=self.course)
+
+    def test_student_is_buffered_once(self):
+        self.assertTrue(self.buffer(self.students[0]))
+        self.assertFalse(self.buffer(self.students[0]))
+        self.assertEqual(redis_client.xlen(get_buffer_key(self.class_session.id)), 1)
+
+    def test_flush_writes_attendances_and_empties_buffer(self):
+        self.buffer(self.students[0])
+        self.buffer(self.students[1], status="late", minutes_late=5)
+
+        self.assertEqual(self.flush(), 2)
+        self.assertEqual(Attendance.objects.count(), 2)
+        self.assertFalse(redis_client.exists(get_buffer_key(self.class_session.id)))
+        self.assertEqual(self.get_summary(self.students[1]).minutes_late, 5)
+
+        # Un second vidage n'a plus rien à écrire
+        self.assertEqual(self.flush(), 0)
+        self.assertEqual(Attendance.objects.count(), 2)
+
+    def test_flush_replayed_after_commit_does_not_count_twice(self):
+        self.buffer(self.students[0])
+        self.buffer(self.students[1], status="late", minutes_late=5)
+
+        # Entrées écrites en base mais pas retirées du flux (arrêt du worker
+        # avant les callbacks de commit) : le vidage suivant les relit
+        self.flush(commit=False)
+        self.assertEqual(redis_client.xlen(get_buffer_key(self.class_session.id)), 2)
+
+        self.flush()
+
+        self.assertEqual(Attendance.objects.count(), 2)
+        self.assertEqual(self.get_summary(self.students[0]).present_count, 1)
+        late = self.get_summary(self.students[1])
+        self.assertEqual((late.late_count, late.minutes_late), (1, 5))
+        self.assertFalse(redis_client.exists(get_buffer_key(self.class_session.id)))
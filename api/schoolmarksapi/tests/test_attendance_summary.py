@@ -0,0 +1,103 @@
+from datetime import date, time
+from django.test import TestCase
+from django.utils import timezone
+
+from schoolmarksapi.models import (
+    Attendance,
+    AttendanceSummary,
+    Class,
+    ClassSession,
+    Course,
+    User,
+)
+from schoolmarksapi.services.attendance_summary import (
+    rebuild_attendance_summaries,
+    update_attendance_summaries,
+)
+
+
+class AttendanceSummaryDeltasTest(TestCase):
+    def setUp(self):
+        self.course = Course.objects.create(name="Mathématiques", code="MATH")
+        school_class = Class.objects.create(
+            name="Terminale A", code="TA", year_of_graduation=2026
+        )
+        self.class_sessions = [
+            ClassSession.objects.create(
+                course=self.course,
+                class_group=school_class,
+                date=date.today(),
+                start_time=time(8 + hour),
+                end_time=time(9 + hour),
+                room="A1",
+            )
+            for hour in range(2)
+        ]
+        self.students = [
+            User.objects.create_user(
+                username=f"eleve{index}", email=f"eleve{index}@example.com"
+            )
+            for index in range(2)
+        ]
+
+    def create_attendance(self, class_session, student, status, minutes_late=0):
+        attendance = Attendance.objects.create(
+            class_session=class_session,
+            student=student,
+            status=status,
+            minutes_late=minutes_late,
+            checked_in_at=timezone.now(),
+        )
+        update_attendance_summaries([attendance])
+
+        return attendance
+
+    def get_totals(self):
+        return {
+            summary.student_id: (
+                summary.present_count,
+                summary.late_count,
+                summary.absent_count,
+                summary.minutes_late,
+            )
+            for summary in AttendanceSummary.objects.filter(course=self.course)
+        }
+
+    def test_deltas_are_added_per_student(self):
+        first, second = self.class_sessions
+        self.create_attendance(first, self.students[0], "present")
+        self.create_attendance(first, self.students[1], "late", minutes_late=7)
+        self.create_attendance(second, self.students[0], "late", minutes_late=3)
+        self.create_attendance(second, self.students[1], "absent")
+
+        self.assertEqual(
+            self.get_totals(),
+            {
+                self.students[0].id: (1, 1, 0, 3),
+                self.students[1].id: (0, 1, 1, 7),
+            },
+        )
+
+    def test_deleted_attendance_is_removed_from_totals(self):
+        first, second = self.class_sessions
+        self.create_attendance(first, self.students[0], "late", minutes_late=4)
+        late = self.create_attendance(second, self.students[0], "late", minutes_late=6)
+
+        # Le signal post_delete retire l'enregistrement des totaux
+        late.delete()
+
+        self.assertEqual(self.get_totals(), {self.students[0].id: (0, 1, 0, 4)})
+
+    def test_deltas_match_rebuilt_totals(self):
+        first, second = self.class_sessions
+        self.create_attendance(first, self.students[0], "present")
+        self.create_attendance(first, self.students[1], "late", minutes_late=2)
+        self.create_attendance(second, self.students[0], "absent")
+        self.create_attendance(
+            second, self.students[1], "late", minutes_late=9
+        ).delete()
+
+        totals = self.get_totals()
+        rebuild_attendance_summaries([self.course.id])
+
+        self.assertEqual(self.get_totals(), totals)
@@ -0,0 +1,87 @@
+import uuid
+from datetime import timedelta
+
+from schoolmarksapi.models import Class
+from schoolmarksapi.services.import_state import read_import_state
+from schoolmarksapi.services.import_storage import ImportPayloadWriter
+from schoolmarksapi.tasks.import_classes import process_classes
+from schoolmarksapi.tests.base import RedisTestCase
+
+
+class UpsertClassesTest(RedisTestCase):
+    def setUp(self):
+        super().setUp()
+        self.renamed = Class.objects.create(
+            name="Terminale A", code="TA", year_of_graduation=2026
+        )
+        self.unchanged = Class.objects.create(
+            name="Terminale B", code="TB", year_of_graduation=2026
+        )
+        # updated_at dans le passé : la mise à jour doit le faire avancer
+        self.updated_at = self.renamed.updated_at - timedelta(days=1)
+        Class.objects.filter(pk=self.renamed.pk).update(updated_at=self.updated_at)
+
+    def run_import(self, rows, commit_mode="atomic", dry_run=False):
+        import_id = str(uuid.uuid4())
+        writer = ImportPayloadWriter(import_id, chunk_size=2)
+
+        for row in rows:
+            writer.append(row)
+
+        process_classes(
+            import_id,
+            writer.close(),
+            "admin@example.com",
+            commit_mode=commit_mode,
+            chunk_size=2,
+            write_mode="upsert",
+            dry_run=dry_run,
+        )
+
+        return read_import_state(import_id)
+
+    def get_rows(self):
+        return [
+            {"name": "Terminale A bis", "code": "TA", "year_of_graduation": 2026},
+            {"name": "Terminale B", "code": "TB", "year_of_graduation": 2026},
+            {"name": "Première A", "code": "PA", "year_of_graduation": 2027},
+        ]
+
+    def test_counts_inserted_updated_and_unchanged_rows(self):
+        for commit_mode in ("atomic", "chunked"):
+            with self.subTest(commit_mode=commit_mode):
+                Class.objects.filter(code="PA").delete()
+                Class.objects.filter(pk=self.renamed.pk).update(name="Terminale A")
+
+                state = self.run_import(self.get_rows(), commit_mode)
+
+                self.assertEqual(state["status"], "completed")
+                self.assertEqual(
+                    state["diff"],
+                    {"inserted": 1, "updated": 1, "unchanged": 1, "deleted": 0},
+                )
+                self.assertEqual(state["results_count"], 2)
+                self.assertEqual(
+                    Class.objects.get(pk=self.renamed.pk).name, "Terminale A bis"
+                )
+                self.assertTrue(Class.objects.filter(code="PA").exists())
+
+    def test_updated_rows_refresh_updated_at(self):
+        self.run_import(self.get_rows())
+
+        self.assertGreater(
+            Class.objects.get(pk=self.renamed.pk).updated_at, self.updated_at
+        )
+        self.assertEqual(
+            Class.objects.get(pk=self.unchanged.pk).updated_at,
+            self.unchanged.updated_at,
+        )
+
+    def test_dry_run_counts_without_writing(self):
+        state = self.run_import(self.get_rows(), dry_run=True)
+
+        self.assertEqual(
+            state["diff"], {"inserted": 1, "updated": 1, "unchanged": 1, "deleted": 0}
+        )
+        self.assertEqual(Class.objects.get(pk=self.renamed.pk).name, "Terminale A")
+        self.assertFalse(Class.objects.filter(code="PA").exists())
@@ -0,0 +1,89 @@
+import uuid
+from types import SimpleNamespace
+from django.db import OperationalError
+
+from schoolmarksapi.services.import_runner import run_import
+from schoolmarksapi.services.import_state import ImportStateWriter, read_import_state
+from schoolmarksapi.services.import_storage import (
+    ImportPayloadWriter,
+    get_payload_key,
+    redis_client,
+)
+from schoolmarksapi.tests.base import RedisTestCase
+
+CHUNK_SIZE = 2
+
+
+class ChunkedImportTest(RedisTestCase):
+    def setUp(self):
+        super().setUp()
+        self.import_id = str(uuid.uuid4())
+        writer = ImportPayloadWriter(self.import_id, chunk_size=CHUNK_SIZE)
+
+        for index in range(5):
+            writer.append({"index": index})
+
+        self.total_rows = writer.close()
+        self.processed = []
+
+    def get_task(self, retries=0, max_retries=3):
+        return SimpleNamespace(
+            request=SimpleNamespace(retries=retries), max_retries=max_retries
+        )
+
+    def run_chunked(self, process_chunk, task):
+        import_state = ImportStateWriter(
+            self.import_id, "test", "admin@example.com", self.total_rows, "chunked"
+        )
+        run_import(task, import_state, process_chunk, CHUNK_SIZE)
+
+        return read_import_state(self.import_id)
+
+    def process_chunk(self, chunk):
+        self.processed.extend(row["index"] for row in chunk)
+
+        return [], None, {"inserted": len(chunk)}
+
+    def failing_on(self, index, error):
+        def process_chunk(chunk):
+            if any(row["index"] == index for row in chunk):
+                raise error
+
+            return self.process_chunk(chunk)
+
+        return process_chunk
+
+    def test_retried_import_resumes_from_checkpoint(self):
+        with self.assertRaises(OperationalError):
+            self.run_chunked(
+                self.failing_on(2, OperationalError("connexion perdue")),
+                self.get_task(),
+            )
+
+        state = read_import_state(self.import_id)
+        self.assertEqual(state["status"], "processing")
+        self.assertEqual(state["checkpoint"], 2)
+
+        state = self.run_chunked(self.process_chunk, self.get_task(retries=1))
+
+        # Le premier paquet, déjà commité, n'est pas traité une seconde fois
+        self.assertEqual(self.processed, [0, 1, 2, 3, 4])
+        self.assertEqual(state["status"], "completed")
+        self.assertEqual(state["checkpoint"], self.total_rows)
+        self.assertEqual(state["diff"]["inserted"], self.total_rows)
+        self.assertFalse(redis_client.exists(get_payload_key(self.import_id)))
+
+    def test_failed_import_keeps_its_payload(self):
+        state = self.run_chunked(
+            self.failing_on(2, ValueError("ligne invalide")), self.get_task()
+        )
+
+        self.assertEqual(state["status"], "failed")
+        self.assertEqual(state["checkpoint"], 2)
+        self.assertEqual(self.processed, [0, 1])
+        self.assertTrue(redis_client.exists(get_payload_key(self.import_id)))
+
+        state = self.run_chunked(self.process_chunk, self.get_task())
+
+        self.assertEqual(state["status"], "completed")
+        self.assertEqual(self.processed, [0, 1, 2, 3, 4])
@@ -10,10 +10,13 @@ from drf_spectacular.views import (
     SpectacularSwaggerView,
 )
 
+from schoolmarksapi.views.attendance_view import attendance_stream
 from schoolmarksapi.views.import_view import (
     ClassBulkImportView,
+    ClassStudentBulkImportView,
     CourseBulkImportView,
     ImportDetailView,
+    ImportResultsView,
     UserBulkImportView,
 )
 
@@ -24,8 +27,10 @@ from .views import (
     ClassSessionViewSet,
     CheckinSessionViewSet,
     AttendanceViewSet,
+    AttendanceSummaryViewSet,
     AssessmentViewSet,
     StudentGradeViewSet,
+    GradeSummaryViewSet,
     UserViewSet,
 )
 
@@ -56,9 +61,11 @@ router.register(r"courses", CourseViewSet)
 # Attendance management
 router.register(r"checkin_sessions", CheckinSessionViewSet)
 router.register(r"attendances", AttendanceViewSet)
+router.register(r"attendance_summaries", AttendanceSummaryViewSet)
 # Grades management
 router.register(r"assessments", AssessmentViewSet)
 router.register(r"student_grades", StudentGradeViewSet)
+router.register(r"grade_summaries", GradeSummaryViewSet)
 
 urlpatterns = [
     # Admin interface
@@ -80,7 +87,23 @@ urlpatterns = [
     path("import/users/", UserBulkImportView.as_view(), name="user-import"),
     path("import/classes/", ClassBulkImportView.as_view(), name="class-import"),
     path("import/courses/", CourseBulkImportView.as_view(), name="course-import"),
+    path(
+        "import/class-students/",
+        ClassStudentBulkImportView.as_view(),
+        name="class-student-import",
+    ),
     path("import/<str:import_id>/", ImportDetailView.as_view(), name="import-detail"),
+    path(
+        "import/<str:import_id>/results/",
+        ImportResultsView.as_view(),
+        name="import-results",
+    ),
+    # Flux des enregistrements d'une séance (Server-Sent Events)
+    path(
+        "attendances/stream/<uuid:class_session_id>/",
+        attendance_stream,
+        name="attendance-stream",
+    ),
     # API Routes
     path("", include(router.urls)),
 ]
@@ -1,9 +1,11 @@
 from .assessment_view import AssessmentViewSet
 from .attendance_view import AttendanceViewSet
+from .attendance_summary_view import AttendanceSummaryViewSet
 from .checkin_session_view import CheckinSessionViewSet
 from .class_view import ClassViewSet, ClassStudentViewSet
 from .class_session_view import ClassSessionViewSet
 from .course_view import CourseViewSet
+from .grade_summary_view import GradeSummaryViewSet
 from .student_grade_view import StudentGradeViewSet
 from .user_views import UserViewSet
 from common.celery import app as celery_app
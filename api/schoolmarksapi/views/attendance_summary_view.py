@@ -0,0 +1,52 @@
+from rest_framework import viewsets
+from common.users import get_user_role
+from schoolmarksapi.models import AttendanceSummary
+from schoolmarksapi.serializers import AttendanceSummarySerializer
+from drf_spectacular.utils import extend_schema, OpenApiParameter
+from drf_spectacular.types import OpenApiTypes
+
+
+class AttendanceSummaryViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Totaux de présences, retards, absences et minutes de retard par élève et
+    par cours, lus dans la table AttendanceSummary (une ligne par élève et par
+    cours) sans parcourir les enregistrements.
+    """
+
+    queryset = AttendanceSummary.objects.all()
+    serializer_class = AttendanceSummarySerializer
+
+    def get_queryset(self):
+        queryset = self._get_role_based_queryset().select_related("student")
+
+        course_id = self.request.query_params.get("course_id", None)
+        student_id = self.request.query_params.get("student_id", None)
+
+        if course_id:
+            queryset = queryset.filter(course_id=course_id)
+
+        if student_id:
+            queryset = queryset.filter(student_id=student_id)
+
+        return queryset.order_by("student__last_name", "student__first_name")
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter("course_id", OpenApiTypes.UUID, OpenApiParameter.QUERY),
+            OpenApiParameter("student_id", OpenApiTypes.INT, OpenApiParameter.QUERY),
+        ]
+    )
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    def _get_role_based_queryset(self):
+        user_role = get_user_role(self.request.user)
+
+        if user_role == "admin":
+            return AttendanceSummary.objects.all()
+
+        if user_role == "teacher":
+            return AttendanceSummary.objects.filter(course__professor=self.request.user)
+
+        if user_role == "student":
+            return AttendanceSummary.objects.filter(student=self.request.user)
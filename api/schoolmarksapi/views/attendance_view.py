@@ -1,12 +1,62 @@
+import json
+import time
+from typing import List, Optional
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
 from rest_framework import viewsets
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
 
+from common.redis_pool import get_async_redis, get_redis
 from common.users import get_user_role
 from schoolmarksapi.models import (
     Attendance,
+    ClassSession,
+    User,
 )
 from schoolmarksapi.serializers import (
     AttendanceSerializer,
 )
+from schoolmarksapi.services.attendance_buffer import read_buffered_attendances
+from schoolmarksapi.services.attendance_feed import get_feed_channel
+
+# Intervalle (en secondes) des commentaires envoyés pour garder le flux ouvert
+STREAM_KEEPALIVE = 15
+
+
+def get_class_session_attendances(queryset, class_session_id, user) -> List:
+    """
+    Enregistrements d'une séance, y compris ceux du tampon pas encore écrits
+    en base (mode ``CHECKIN_WRITE_BEHIND``).
+    """
+    attendances = list(
+        queryset.filter(class_session_id=class_session_id).select_related("student")
+    )
+
+    if not settings.CHECKIN_WRITE_BEHIND:
+        return attendances
+
+    registered = {attendance.student_id for attendance in attendances}
+    buffered = [
+        attendance
+        for attendance in read_buffered_attendances(class_session_id)
+        if attendance.student_id not in registered
+        and (get_user_role(user) != "student" or attendance.student_id == user.id)
+    ]
+
+    if buffered:
+        students = User.objects.in_bulk(
+            {attendance.student_id for attendance in buffered}
+        )
+
+        for attendance in buffered:
+            attendance.student = students.get(attendance.student_id)
+
+        attendances.extend(attendance for attendance in buffered if attendance.student)
+
+    return attendances
 
 
 class AttendanceViewSet(viewsets.ModelViewSet):
@@ -25,6 +75,18 @@ class AttendanceViewSet(viewsets.ModelViewSet):
 
         return queryset
 
+    def list(self, request, *args, **kwargs):
+        class_session_id = request.query_params.get("class_session_id")
+
+        if not settings.CHECKIN_WRITE_BEHIND or class_session_id is None:
+            return super().list(request, *args, **kwargs)
+
+        attendances = get_class_session_attendances(
+            self._get_role_based_queryset(), class_session_id, request.user
+        )
+        serializer = self.get_serializer(attendances, many=True)
+        return Response(serializer.data)
+
     def _get_role_based_queryset(self):
         user_role = get_user_role(self.request.user)
 
@@ -38,3 +100,156 @@ class AttendanceViewSet(viewsets.ModelViewSet):
 
         if user_role == "student":
             return Attendance.objects.filter(student_id=self.request.user)
+
+
+def format_event(event: str, data: str) -> str:
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+def get_snapshot(class_session_id, user) -> List:
+    return AttendanceSerializer(
+        get_class_session_attendances(Attendance.objects.all(), class_session_id, user),
+        many=True,
+    ).data
+
+
+class AttendanceFeed:
+    """
+    Évènements d'un flux : filtre les enregistrements déjà envoyés (reçus à la
+    fois dans l'état initial et par le canal) et les commentaires de maintien.
+    """
+
+    def __init__(self):
+        self.sent = set()
+        self.last_event = time.monotonic()
+
+    def start(self, snapshot) -> List[str]:
+        self.sent = {attendance["id"] for attendance in snapshot}
+        self.last_event = time.monotonic()
+
+        return [
+            "retry: 3000\n\n",
+            format_event("snapshot", json.dumps(snapshot, cls=JSONEncoder)),
+        ]
+
+    def handle(self, message) -> Optional[str]:
+        # None à l'expiration du délai, mais aussi pour la confirmation
+        # d'abonnement
+        if message is None:
+            if time.monotonic() - self.last_event < STREAM_KEEPALIVE:
+                return None
+
+            self.last_event = time.monotonic()
+            return ": keepalive\n\n"
+
+        attendance_id = json.loads(message["data"])["id"]
+
+        if attendance_id in self.sent:
+            return None
+
+        self.sent.add(attendance_id)
+        self.last_event = time.monotonic()
+        return format_event("attendance", message["data"])
+
+
+async def async_attendance_events(class_session_id, user):
+    client = get_async_redis(decode_responses=True)
+    pubsub = client.pubsub()
+    feed = AttendanceFeed()
+
+    try:
+        # Abonné avant de lire l'état initial : aucun enregistrement
+        # n'est perdu entre les deux
+        await pubsub.subscribe(get_feed_channel(class_session_id))
+        snapshot = await sync_to_async(get_snapshot)(class_session_id, user)
+
+        for event in feed.start(snapshot):
+            yield event
+
+        while True:
+            event = feed.handle(
+                await pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=STREAM_KEEPALIVE
+                )
+            )
+
+            if event is not None:
+                yield event
+    finally:
+        await pubsub.aclose()
+        await client.aclose()
+
+
+def attendance_events(class_session_id, user):
+    """
+    Version synchrone du flux, pour un déploiement WSGI : le flux occupe un
+    thread du worker, il est donc fermé après ``ATTENDANCE_STREAM_WSGI_DURATION``
+    secondes et le navigateur se reconnecte (``retry``).
+    """
+    pubsub = get_redis(decode_responses=True).pubsub()
+    feed = AttendanceFeed()
+    closes_at = time.monotonic() + settings.ATTENDANCE_STREAM_WSGI_DURATION
+
+    try:
+        pubsub.subscribe(get_feed_channel(class_session_id))
+
+        yield from feed.start(get_snapshot(class_session_id, user))
+
+        while (remaining := closes_at - time.monotonic()) > 0:
+            event = feed.handle(
+                pubsub.get_message(
+                    ignore_subscribe_messages=True,
+                    timeout=min(STREAM_KEEPALIVE, remaining),
+                )
+            )
+
+            if event is not None:
+                yield event
+    finally:
+        pubsub.close()
+
+
+async def attendance_stream(request, class_session_id):
+    """
+    Flux Server-Sent Events des enregistrements d'une séance, pour l'écran de
+    l'appel du professeur.
+
+    Le premier évènement (``snapshot``) contient les enregistrements déjà
+    reçus, les suivants (``attendance``) un enregistrement chacun, dès que
+    ``register`` l'accepte. Les enregistrements sont diffusés par Redis
+    pub/sub : le flux reçoit ceux de tous les processus.
+
+    En ASGI, le flux est asynchrone et reste ouvert. En WSGI (gunicorn,
+    runserver), Django lirait un itérateur asynchrone en entier avant de
+    répondre : le flux est alors synchrone et de durée limitée.
+    """
+    user = await request.auser()
+
+    if not user.is_authenticated:
+        return JsonResponse(
+            {"detail": "Authentication credentials were not provided."}, status=403
+        )
+
+    if get_user_role(user) == "student":
+        return JsonResponse(
+            {
+                "status": "error",
+                "message": "You are not authorized to perform this action.",
+            },
+            status=403,
+        )
+
+    if not await ClassSession.objects.filter(id=class_session_id).aexists():
+        return JsonResponse({"detail": "Not found."}, status=404)
+
+    if isinstance(request, ASGIRequest):
+        events = async_attendance_events(class_session_id, user)
+    else:
+        events = attendance_events(class_session_id, user)
+
+    response = StreamingHttpResponse(events, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # Désactive la mise en tampon des proxys (nginx)
+    response["X-Accel-Buffering"] = "no"
+
+    return response
@@ -1,52 +1,88 @@
-from rest_framework import viewsets, status, serializers
+import math
+import time
+from uuid import UUID
+from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import Http404, HttpResponseNotModified
 from django.utils import timezone
+from django.utils.http import http_date, parse_etags, quote_etag
 from rest_framework.response import Response
 from schoolmarksapi.models import (
     CheckinSession,
     Attendance,
-    CourseClassEnrollment,
     ClassSession,
-    ClassStudent,
 )
 from schoolmarksapi.serializers import (
     AttendanceSerializer,
     CheckinSessionSerializer,
     CheckinSessionInputSerializer,
+    CheckinSessionRegisterSerializer,
 )
 from common.users import get_user_role
 from common.utils import TOTP
-from drf_spectacular.utils import extend_schema, inline_serializer
-from schoolmarksapi.tasks.checkin_sessions import close_checkin_session
+from schoolmarksapi.services.attendance_buffer import buffer_attendance
+from schoolmarksapi.services.attendance_feed import publish_attendance
+from schoolmarksapi.services.attendance_summary import update_attendance_summaries
+from schoolmarksapi.services.checkin_cache import (
+    cache_checkin_session,
+    get_checkin_session,
+)
+from drf_spectacular.utils import extend_schema
 
 
 class CheckinSessionViewSet(viewsets.ModelViewSet):
     queryset = CheckinSession.objects.all()
     serializer_class = CheckinSessionSerializer
 
+    def get_cached_checkin_session(self, pk):
+        # Fenêtre de l'appel et liste des élèves lues dans Redis (un seul
+        # aller-retour) : la base n'est interrogée que si le cache a expiré
+        # ou a été invalidé
+        try:
+            checkin_session = get_checkin_session(UUID(str(pk)), self.request.user.id)
+        except ValueError:
+            checkin_session = None
+
+        if checkin_session is None:
+            raise Http404
+
+        return checkin_session
+
     @action(detail=True, methods=["get"])
     def totp(self, request, pk=None):
-        session = self.get_object()
+        # Le secret est créé avec l'appel : cette lecture n'écrit jamais en base
+        secret = self.get_cached_checkin_session(pk)["secret"]
 
-        if not session.secret:
-            totp = TOTP()
-            session.secret = totp.generate_secret()
-            session.save()
+        if not secret:
+            return self.missing_secret_response()
 
-        current_token = TOTP().generate_token(session.secret)
-        return Response({"totp": current_token})
+        # Le code ne change qu'à la fin de l'intervalle : la réponse peut être
+        # mise en cache jusque-là et revalidée avec son ETag
+        totp = TOTP()
+        counter = totp.get_counter()
+        expires_at = totp.get_expiry(counter)
+        etag = quote_etag(f"{pk}-{counter}")
 
-    @extend_schema(
-        request=inline_serializer(
-            name="CheckinSessionRegisterSerializer",
-            fields={
-                "totp_code": serializers.CharField(min_length=6, max_length=6),
-            },
-        )
-    )
+        headers = {
+            "ETag": etag,
+            "Expires": http_date(expires_at),
+            "Cache-Control": (
+                f"private, max-age={max(math.ceil(expires_at - time.time()), 0)}"
+            ),
+        }
+
+        if etag in parse_etags(request.headers.get("If-None-Match", "")):
+            return HttpResponseNotModified(headers=headers)
+
+        return Response({"totp": totp.generate_token(secret, counter)}, headers=headers)
+
+    @extend_schema(request=CheckinSessionRegisterSerializer)
     @action(detail=True, methods=["post"], url_path="register")
     def register(self, request, pk=None):
-        checkin_session = self.get_object()
+        checkin_session = self.get_cached_checkin_session(pk)
+
         totp_code = request.data.get("totp_code")
 
         # Verify TOTP code presence in the request
@@ -56,8 +92,16 @@ class CheckinSessionViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
+        # Appel créé avant l'ajout du secret : aucun code ne peut être valide
+        if not checkin_session["secret"]:
+            return self.missing_secret_response()
+
+        serializer = CheckinSessionRegisterSerializer(data=request.data)
         totp = TOTP()
-        if not totp.verify_token(checkin_session.secret, totp_code):
+
+        if not serializer.is_valid() or not totp.verify_token(
+            checkin_session["secret"], serializer.validated_data["totp_code"]
+        ):
             return Response(
                 {"status": "error", "message": "Invalid or expired TOTP code"},
                 status=status.HTTP_400_BAD_REQUEST,
@@ -72,30 +116,8 @@ class CheckinSessionViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # Check if student is already registered for this check-in session
-        existing_record = Attendance.objects.filter(
-            class_session=checkin_session.class_session, student=self.request.user
-        ).exists()
-
-        if existing_record:
-            return Response(
-                {
-                    "status": "error",
-                    "message": "You have already registered for this check-in session.",
-                },
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
-        class_session = checkin_session.class_session
-        course = class_session.course
-        class_group = class_session.class_group
-
         # Check if student is in class
-        is_in_class = ClassStudent.objects.filter(
-            student=self.request.user, class_group=class_group
-        ).exists()
-
-        if not is_in_class:
+        if not checkin_session["is_in_class"]:
             return Response(
                 {
                     "status": "error",
@@ -105,11 +127,7 @@ class CheckinSessionViewSet(viewsets.ModelViewSet):
             )
 
         # Check if the class is enrolled in the course
-        is_class_enrolled = CourseClassEnrollment.objects.filter(
-            course=course, class_group=class_group
-        ).exists()
-
-        if not is_class_enrolled:
+        if not checkin_session["is_class_enrolled"]:
             return Response(
                 {
                     "status": "error",
@@ -119,10 +137,10 @@ class CheckinSessionViewSet(viewsets.ModelViewSet):
             )
 
         checked_in_at = timezone.now()
-        late_at = checkin_session.started_at
+        late_at = checkin_session["started_at"]
         is_session_closed = (
-            checkin_session.status == "closed"
-            or checked_in_at > checkin_session.closed_at
+            checkin_session["status"] == "closed"
+            or checked_in_at > checkin_session["closed_at"]
         )
 
         if is_session_closed:
@@ -137,22 +155,69 @@ class CheckinSessionViewSet(viewsets.ModelViewSet):
             presence_status = "late"
             # Calculate minutes late
             time_diff = checked_in_at - late_at
-            minutes_late = time_diff.seconds // 60
+            minutes_late = int(time_diff.total_seconds() // 60)
         else:
             presence_status = "present"
             minutes_late = 0
 
-        attendance_record = Attendance.objects.create(
+        attendance_record = Attendance(
             student=self.request.user,
-            class_session=class_session,
+            class_session_id=checkin_session["class_session_id"],
             status=presence_status,
             minutes_late=minutes_late,
             checked_in_at=checked_in_at,
         )
 
+        # Mode tampon : l'enregistrement est écrit en base plus tard par
+        # flush_attendance_buffers
+        if settings.CHECKIN_WRITE_BEHIND:
+            if not buffer_attendance(attendance_record, checkin_session["closed_at"]):
+                return self.already_registered_response()
+
+            return self.registered_response(attendance_record)
+
+        # Un élève déjà enregistré est détecté par la contrainte unique
+        # (student, class_session), y compris pour deux requêtes simultanées.
+        # Les totaux de l'élève sont mis à jour dans la même transaction
+        try:
+            with transaction.atomic():
+                attendance_record.save(force_insert=True)
+                update_attendance_summaries(
+                    [attendance_record],
+                    {checkin_session["class_session_id"]: checkin_session["course_id"]}
+                    if checkin_session["course_id"]
+                    else None,
+                )
+        except IntegrityError:
+            return self.already_registered_response()
+
+        return self.registered_response(attendance_record)
+
+    def registered_response(self, attendance_record):
         serializer = AttendanceSerializer(attendance_record)
+        # Écran de l'appel du professeur (flux /attendances/stream/)
+        publish_attendance(attendance_record.class_session_id, serializer.data)
+
         return Response(serializer.data)
 
+    def missing_secret_response(self):
+        return Response(
+            {
+                "status": "error",
+                "message": "This check-in session has no TOTP secret.",
+            },
+            status=status.HTTP_409_CONFLICT,
+        )
+
+    def already_registered_response(self):
+        return Response(
+            {
+                "status": "error",
+                "message": "You have already registered for this check-in session.",
+            },
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
     @extend_schema(request=CheckinSessionInputSerializer)
     def create(self, request, *args, **kwargs):
         user_role = get_user_role(self.request.user)
@@ -178,9 +243,6 @@ class CheckinSessionViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        totp = TOTP()
-        request.data["secret"] = totp.generate_secret()
-
         # Un professeur peut lancer une session d'appel uniquement pour les cours qu'il enseigne
         if (
             user_role == "teacher"
@@ -197,12 +259,10 @@ class CheckinSessionViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        checkin_session = serializer.save(status="active", created_by=request.user)
-
-        # Crée la tâche Celery
-        close_time = request.data["closed_at"]
-        close_checkin_session.apply_async(
-            args=[str(checkin_session.id)], eta=close_time
+        checkin_session = serializer.save(
+            status="active", created_by=request.user, secret=TOTP().generate_secret()
         )
+        # L'appel est fermé à closed_at par close_expired_checkin_sessions
+        cache_checkin_session(checkin_session.id)
 
         return Response(serializer.data)
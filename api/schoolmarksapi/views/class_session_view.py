@@ -1,14 +1,21 @@
+import uuid
 from django.forms import ValidationError
 from django.shortcuts import get_object_or_404
-from rest_framework import viewsets
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
 from rest_framework.response import Response
 from datetime import datetime
+from common.permissions import IsAdmin
 from common.users import get_user_role
 from schoolmarksapi.models import ClassSession, Class
 from schoolmarksapi.serializers import (
     ClassSessionSerializer,
     ClassSessionInputSerializer,
+    GenerateClassSessionsSerializer,
 )
+from schoolmarksapi.serializers.import_serializer import CreateImportResponse
+from schoolmarksapi.services.import_storage import ImportPayloadWriter
+from schoolmarksapi.tasks.generate_class_sessions import process_class_sessions
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiTypes
 
 
@@ -19,6 +26,8 @@ class ClassSessionViewSet(viewsets.ModelViewSet):
     def get_serializer_class(self):
         if self.action == "create" or self.action == "update":
             return ClassSessionInputSerializer
+        if self.action == "generate":
+            return GenerateClassSessionsSerializer
         return ClassSessionSerializer
 
     @extend_schema(
@@ -41,6 +50,40 @@ class ClassSessionViewSet(viewsets.ModelViewSet):
 
         return super().list(request, *args, **kwargs)
 
+    @extend_schema(
+        request=GenerateClassSessionsSerializer,
+        responses=CreateImportResponse,
+        description="Generates the sessions of a timetable from weekly recurrence rules. Progress is available at import/<import_id>/",
+    )
+    @action(detail=False, methods=["post"], permission_classes=[IsAdmin])
+    def generate(self, request):
+        """Génère les séances d'un emploi du temps en tâche de fond."""
+        serializer = GenerateClassSessionsSerializer(data=request.data)
+
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        import_id = str(uuid.uuid4())
+        data = serializer.data
+        writer = ImportPayloadWriter(import_id)
+
+        for rule in data["rules"]:
+            writer.append(
+                {
+                    **rule,
+                    "exclusions": sorted({*rule["exclusions"], *data["exclusions"]}),
+                }
+            )
+
+        process_class_sessions.delay(
+            import_id,
+            writer.close(),
+            f"{request.user.first_name} {request.user.last_name}",
+            dry_run=data["dry_run"],
+        )
+
+        return Response({"import_id": import_id, "status": "processing"})
+
     def get_queryset(self):
         queryset = self._get_role_based_queryset()
 
@@ -28,6 +28,7 @@ from schoolmarksapi.serializers import (
     CourseSerializer,
     UpdateClassCoursesSerializer,
 )
+from schoolmarksapi.services.checkin_cache import invalidate_class_checkin_sessions
 
 
 class ClassViewSet(viewsets.ModelViewSet):
@@ -234,6 +235,7 @@ class ClassViewSet(viewsets.ModelViewSet):
                     ]
 
                     ClassStudent.objects.bulk_create(new_enrollments)
+                    invalidate_class_checkin_sessions([class_instance.id])
 
                 serializer = ClassSerializer(class_instance)
                 return Response(serializer.data)
@@ -290,6 +292,7 @@ class ClassViewSet(viewsets.ModelViewSet):
                     ]
 
                     CourseClassEnrollment.objects.bulk_create(new_enrollments)
+                    invalidate_class_checkin_sessions([class_instance.id])
 
                 serializer = ClassSerializer(class_instance)
                 return Response(serializer.data)
@@ -0,0 +1,62 @@
+from rest_framework import viewsets
+from rest_framework.response import Response
+from common.users import get_user_role
+from schoolmarksapi.models import GradeSummary
+from schoolmarksapi.serializers import GradeSummarySerializer
+from schoolmarksapi.services.grade_summary import add_course_ranks
+from drf_spectacular.utils import extend_schema, OpenApiParameter
+from drf_spectacular.types import OpenApiTypes
+
+
+class GradeSummaryViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Moyenne sur 20, nombre de notes, notes minimale et maximale et rang de
+    chaque élève par cours, lus dans la table GradeSummary. Le rang est
+    calculé parmi tous les élèves du cours (``add_course_ranks``), même quand
+    seules les lignes d'un élève sont retournées.
+    """
+
+    queryset = GradeSummary.objects.all()
+    serializer_class = GradeSummarySerializer
+
+    def get_queryset(self):
+        queryset = self._get_role_based_queryset().select_related("student")
+
+        course_id = self.request.query_params.get("course_id", None)
+        student_id = self.request.query_params.get("student_id", None)
+
+        if course_id:
+            queryset = queryset.filter(course_id=course_id)
+
+        if student_id:
+            queryset = queryset.filter(student_id=student_id)
+
+        return queryset.order_by("course_id", "-average")
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter("course_id", OpenApiTypes.UUID, OpenApiParameter.QUERY),
+            OpenApiParameter("student_id", OpenApiTypes.INT, OpenApiParameter.QUERY),
+        ]
+    )
+    def list(self, request, *args, **kwargs):
+        summaries = add_course_ranks(list(self.filter_queryset(self.get_queryset())))
+        serializer = self.get_serializer(summaries, many=True)
+        return Response(serializer.data)
+
+    def retrieve(self, request, *args, **kwargs):
+        (summary,) = add_course_ranks([self.get_object()])
+        serializer = self.get_serializer(summary)
+        return Response(serializer.data)
+
+    def _get_role_based_queryset(self):
+        user_role = get_user_role(self.request.user)
+
+        if user_role == "admin":
+            return GradeSummary.objects.all()
+
+        if user_role == "teacher":
+            return GradeSummary.objects.filter(course__professor=self.request.user)
+
+        if user_role == "student":
+            return GradeSummary.objects.filter(student=self.request.user)
@@ -1,120 +1,89 @@
+import json
 import math
+from django.conf import settings
+from django.http import StreamingHttpResponse
 from rest_framework import status, views
 from rest_framework.response import Response
 import csv
-import os
 from io import TextIOWrapper
 import uuid
-import redis
-import json
 from typing import Dict, List, Literal, Optional, Tuple
 from common.permissions import IsAdmin
+from schoolmarksapi.services.import_state import (
+    iter_import_results,
+    list_import_states,
+    read_import_state,
+    results_expired,
+)
+from schoolmarksapi.services.import_storage import ImportPayloadWriter
+from schoolmarksapi.serializers.csv_row_validator import CompiledRowValidator
 from schoolmarksapi.serializers.import_serializer import (
-    CourseCSVRowSerializer,
+    CLASS_STUDENT_CSV_ROW_VALIDATOR,
+    COURSE_CSV_ROW_VALIDATOR,
+    ClassStudentsImportSerializer,
+    RESULTS_OUTPUT_CHOICES,
     CreateImportResponse,
     ImportStatusSerializer,
 )
 from schoolmarksapi.serializers.import_serializer import (
-    UserCSVRowSerializer,
-    ClassCSVRowSerializer,
+    USER_CSV_ROW_VALIDATOR,
+    CLASS_CSV_ROW_VALIDATOR,
     ImportSerializer,
 )
 from schoolmarksapi.tasks.import_courses import process_courses
 from schoolmarksapi.tasks.import_users import process_users
 from schoolmarksapi.tasks.import_classes import process_classes
-from drf_spectacular.utils import extend_schema_view, extend_schema
+from schoolmarksapi.tasks.import_class_students import process_class_students
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema_view, extend_schema
 
 
 class ImportStatusService:
-    def __init__(self):
-        self.redis_client = redis.Redis(
-            host=os.environ.get("TASK_REDIS_HOST"),  # Configure based on your settings
-            port=int(os.environ.get("TASK_REDIS_PORT")),
-            decode_responses=True,
-        )
-
-    def get_all_import_keys(self) -> List[str]:
-        """Get all import IDs by scanning for status keys"""
-        import_keys = []
-        cursor = 0
-
-        while True:
-            cursor, keys = self.redis_client.scan(cursor, match="import_*")
-            import_keys.extend(keys)
-
-            if cursor == 0:
-                break
-
-        # Extract import IDs from keys
-        return [key.split("_")[1] for key in import_keys]
-
     def get_import_status(self, import_id: str) -> Optional[Dict]:
-        data = self.redis_client.get(f"import_{import_id}")
-        if not data:
-            return None
-
-        import_data = json.loads(data)
-
-        if import_data.get("results") and isinstance(import_data["results"], str):
-            import_data["results"] = json.loads(import_data["results"])
-
-        return import_data
+        return read_import_state(import_id)
 
     def get_imports(
         self,
-        type: Literal["users", "classes", "courses"],
+        type: Literal[
+            "users", "classes", "courses", "class_students", "class_sessions"
+        ],
         page: Optional[int] = None,
         per_page: Optional[int] = None,
     ) -> Tuple[List[Dict], int]:
-        # Get all import keys
-        cursor = 0
-        import_keys: List[str] = []
-
-        while True:
-            cursor, key = self.redis_client.scan(cursor, "import_*")
-            import_keys.extend(key)
-
-            if cursor == 0:
-                break
-
-        # Get all imports
-        processing: List[Dict] = []
-        completed: List[Dict] = []
-
-        for key in import_keys:
-            import_id = key.split("_")[1]
-            import_data = self.get_import_status(import_id)
-
-            if not import_data:
-                continue
-
-            if import_data["type"] != type:
-                continue
-
-            data = {**import_data, "import_id": import_id}
-
-            if import_data["status"] == "processing":
-                processing.append(data)
-            else:
-                if not data.get("finished_at"):
-                    data["finished_at"] = data.get("started_at", 0)
-                completed.append(data)
-
-        # Sort by finished_at descending
-        processing.sort(key=lambda x: x.get("started_at", ""), reverse=True)
-        completed.sort(key=lambda x: x.get("finished_at", 0), reverse=True)
-
-        imports: List[Dict] = processing + completed
-
-        total = len(imports)
-
-        # Handle pagination
-        if page is not None and per_page is not None:
-            start = (page - 1) * per_page
-            end = start + per_page
-            imports[start:end]
-
-        return imports, total
+        return list_import_states(type, page=page, per_page=per_page)
+
+
+def spool_csv(
+    uploaded_file,
+    row_validator: CompiledRowValidator,
+    import_id: str,
+    chunk_size: Optional[int] = None,
+):
+    """
+    Valide chaque ligne du CSV et stocke les lignes valides pour la tâche
+    Celery. Retourne le nombre de lignes et la liste des erreurs ; en cas
+    d'erreur rien n'est conservé.
+    """
+    csv_file = TextIOWrapper(uploaded_file.file, encoding="utf-8")
+    csv_reader = csv.DictReader(csv_file)
+    writer = ImportPayloadWriter(import_id, chunk_size)
+    errors = []
+
+    for row_number, row in enumerate(
+        csv_reader, start=2
+    ):  # start=2 car la première ligne correspond aux headers
+        validated_data, row_errors = row_validator.validate(row)
+
+        if row_errors:
+            errors.append({"row": row_number, "errors": row_errors})
+        elif not errors:
+            writer.append(validated_data)
+
+    if errors:
+        writer.discard()
+        return 0, errors
+
+    return writer.close(), errors
 
 
 @extend_schema_view(
@@ -128,6 +97,18 @@ class ImportStatusService:
                 "type": "object",
                 "properties": {
                     "file": {"type": "string", "format": "binary"},
+                    "commit_mode": {
+                        "type": "string",
+                        "enum": ["atomic", "chunked"],
+                        "default": "atomic",
+                    },
+                    "chunk_size": {"type": "integer", "minimum": 1},
+                    "write_mode": {
+                        "type": "string",
+                        "enum": ["insert", "upsert"],
+                        "default": "insert",
+                    },
+                    "dry_run": {"type": "boolean", "default": False},
                 },
             }
         },
@@ -175,24 +156,18 @@ class UserBulkImportView(views.APIView):
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-        csv_file = TextIOWrapper(
-            serializer.validated_data["file"].file, encoding="utf-8"
-        )
-
-        csv_reader = csv.DictReader(csv_file)
-        users_to_create = []
-        errors = []
-
-        # Valide chaque lignes avant de créer les utilisateurs
-        for row_number, row in enumerate(
-            csv_reader, start=2
-        ):  # start=2 car la première ligne correspond aux headers
-            row_serializer = UserCSVRowSerializer(data=row)
+        import_id = str(uuid.uuid4())
 
-            if not row_serializer.is_valid():
-                errors.append({"row": row_number, "errors": row_serializer.errors})
-            else:
-                users_to_create.append(row_serializer.validated_data)
+        # Valide chaque lignes avant de les transmettre à la tâche
+        chunk_size = serializer.validated_data.get(
+            "chunk_size", settings.IMPORT_CHUNK_SIZE
+        )
+        total_rows, errors = spool_csv(
+            serializer.validated_data["file"],
+            USER_CSV_ROW_VALIDATOR,
+            import_id,
+            chunk_size,
+        )
 
         if errors:
             return Response(
@@ -204,12 +179,15 @@ class UserBulkImportView(views.APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        import_id = str(uuid.uuid4())
-
+        # Seule la référence de l'import transite par le broker
         process_users.delay(
             import_id,
-            users_to_create,
+            total_rows,
             f"{self.request.user.first_name} {self.request.user.last_name}",
+            commit_mode=serializer.validated_data["commit_mode"],
+            chunk_size=chunk_size,
+            write_mode=serializer.validated_data["write_mode"],
+            dry_run=serializer.validated_data["dry_run"],
         )
 
         return Response({"import_id": import_id, "status": "processing"})
@@ -226,6 +204,18 @@ class UserBulkImportView(views.APIView):
                 "type": "object",
                 "properties": {
                     "file": {"type": "string", "format": "binary"},
+                    "commit_mode": {
+                        "type": "string",
+                        "enum": ["atomic", "chunked"],
+                        "default": "atomic",
+                    },
+                    "chunk_size": {"type": "integer", "minimum": 1},
+                    "write_mode": {
+                        "type": "string",
+                        "enum": ["insert", "upsert"],
+                        "default": "insert",
+                    },
+                    "dry_run": {"type": "boolean", "default": False},
                 },
             }
         },
@@ -275,24 +265,18 @@ class ClassBulkImportView(views.APIView):
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-        csv_file = TextIOWrapper(
-            serializer.validated_data["file"].file, encoding="utf-8"
-        )
-
-        csv_reader = csv.DictReader(csv_file)
-        classes_to_create = []
-        errors = []
-
-        # Valide chaque lignes avant de créer les classes
-        for row_number, row in enumerate(
-            csv_reader, start=2
-        ):  # start=2 car la première ligne correspond aux headers
-            row_serializer = ClassCSVRowSerializer(data=row)
+        import_id = str(uuid.uuid4())
 
-            if not row_serializer.is_valid():
-                errors.append({"row": row_number, "errors": row_serializer.errors})
-            else:
-                classes_to_create.append(row_serializer.validated_data)
+        # Valide chaque lignes avant de les transmettre à la tâche
+        chunk_size = serializer.validated_data.get(
+            "chunk_size", settings.IMPORT_CHUNK_SIZE
+        )
+        total_rows, errors = spool_csv(
+            serializer.validated_data["file"],
+            CLASS_CSV_ROW_VALIDATOR,
+            import_id,
+            chunk_size,
+        )
 
         if errors:
             return Response(
@@ -304,12 +288,15 @@ class ClassBulkImportView(views.APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        import_id = str(uuid.uuid4())
-
+        # Seule la référence de l'import transite par le broker
         process_classes.delay(
             import_id,
-            classes_to_create,
+            total_rows,
             f"{self.request.user.first_name} {self.request.user.last_name}",
+            commit_mode=serializer.validated_data["commit_mode"],
+            chunk_size=chunk_size,
+            write_mode=serializer.validated_data["write_mode"],
+            dry_run=serializer.validated_data["dry_run"],
         )
 
         return Response({"import_id": import_id, "status": "processing"})
@@ -326,6 +313,18 @@ class ClassBulkImportView(views.APIView):
                 "type": "object",
                 "properties": {
                     "file": {"type": "string", "format": "binary"},
+                    "commit_mode": {
+                        "type": "string",
+                        "enum": ["atomic", "chunked"],
+                        "default": "atomic",
+                    },
+                    "chunk_size": {"type": "integer", "minimum": 1},
+                    "write_mode": {
+                        "type": "string",
+                        "enum": ["insert", "upsert"],
+                        "default": "insert",
+                    },
+                    "dry_run": {"type": "boolean", "default": False},
                 },
             }
         },
@@ -375,21 +374,117 @@ class CourseBulkImportView(views.APIView):
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-        csv_file = TextIOWrapper(
-            serializer.validated_data["file"].file, encoding="utf-8"
+        import_id = str(uuid.uuid4())
+
+        # Valide chaque lignes avant de les transmettre à la tâche
+        chunk_size = serializer.validated_data.get(
+            "chunk_size", settings.IMPORT_CHUNK_SIZE
+        )
+        total_rows, errors = spool_csv(
+            serializer.validated_data["file"],
+            COURSE_CSV_ROW_VALIDATOR,
+            import_id,
+            chunk_size,
         )
 
-        csv_reader = csv.DictReader(csv_file)
-        courses_to_create = []
-        errors = []
+        if errors:
+            return Response(
+                {
+                    "status": "error",
+                    "message": "CSV validation failed",
+                    "errors": errors,
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # Seule la référence de l'import transite par le broker
+        process_courses.delay(
+            import_id,
+            total_rows,
+            f"{self.request.user.first_name} {self.request.user.last_name}",
+            commit_mode=serializer.validated_data["commit_mode"],
+            chunk_size=chunk_size,
+            write_mode=serializer.validated_data["write_mode"],
+            dry_run=serializer.validated_data["dry_run"],
+        )
 
-        for row_number, row in enumerate(csv_reader, start=2):
-            row_serializer = CourseCSVRowSerializer(data=row)
+        return Response({"import_id": import_id, "status": "processing"})
 
-            if not row_serializer.is_valid():
-                errors.append({"row": row_number, "errors": row_serializer.errors})
-            else:
-                courses_to_create.append(row_serializer.validated_data)
+
+@extend_schema_view(
+    get=extend_schema(
+        responses=ImportStatusSerializer,
+        description="Retrieves class membership import information",
+    ),
+    post=extend_schema(
+        request={
+            "multipart/form-data": {
+                "type": "object",
+                "properties": {
+                    "file": {"type": "string", "format": "binary"},
+                    "chunk_size": {"type": "integer", "minimum": 1},
+                    "dry_run": {"type": "boolean", "default": False},
+                },
+            }
+        },
+        description="Creates a new class membership import (class_code, student_email). Each class found in the file gets exactly the students listed for it.",
+        responses=CreateImportResponse,
+    ),
+)
+class ClassStudentBulkImportView(views.APIView):
+    http_method_names = ["get", "post"]
+    permission_classes = [IsAdmin]
+
+    def get(self, request):
+        service = ImportStatusService()
+
+        per_page = request.query_params.get("per_page")
+        page = request.query_params.get("page")
+
+        if per_page:
+            per_page = int(per_page)
+            page = int(page) if page else 1
+        else:
+            per_page = None
+            page = None
+
+        imports, total = service.get_imports(
+            type="class_students", page=page, per_page=per_page
+        )
+
+        serializer = ImportStatusSerializer(imports, many=True)
+
+        response = {"results": serializer.data, "total": total}
+
+        if per_page:
+            response.update(
+                {
+                    "page": page,
+                    "per_page": per_page,
+                    "total_page": math.ceil(total / per_page),
+                }
+            )
+
+        return Response(response)
+
+    def post(self, request):
+        serializer = ClassStudentsImportSerializer(data=request.data)
+
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        import_id = str(uuid.uuid4())
+
+        # Valide chaque lignes avant de les transmettre à la tâche
+        chunk_size = serializer.validated_data.get(
+            "chunk_size", settings.IMPORT_CHUNK_SIZE
+        )
+        total_rows, errors = spool_csv(
+            serializer.validated_data["file"],
+            CLASS_STUDENT_CSV_ROW_VALIDATOR,
+            import_id,
+            chunk_size,
+        )
 
         if errors:
             return Response(
@@ -401,12 +496,13 @@ class CourseBulkImportView(views.APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        import_id = str(uuid.uuid4())
-
-        process_courses.delay(
+        # Seule la référence de l'import transite par le broker
+        process_class_students.delay(
             import_id,
-            courses_to_create,
+            total_rows,
             f"{self.request.user.first_name} {self.request.user.last_name}",
+            chunk_size=chunk_size,
+            dry_run=serializer.validated_data["dry_run"],
         )
 
         return Response({"import_id": import_id, "status": "processing"})
@@ -420,5 +516,98 @@ class ImportDetailView(views.APIView):
         service = ImportStatusService()
         import_status = service.get_import_status(import_id)
 
+        if import_status is None:
+            return Response(
+                {"detail": "Import introuvable"}, status=status.HTTP_404_NOT_FOUND
+            )
+
         serializer = ImportStatusSerializer({**import_status, "import_id": import_id})
         return Response(serializer.data)
+
+
+class _Echo:
+    """Pseudo-fichier pour csv.writer : retourne la ligne au lieu de l'écrire."""
+
+    def write(self, value):
+        return value
+
+
+def stream_results_csv(rows):
+    writer = None
+    echo = _Echo()
+
+    for row in rows:
+        if writer is None:
+            writer = csv.DictWriter(echo, fieldnames=list(row), extrasaction="ignore")
+            yield writer.writeheader()
+
+        yield writer.writerow(row)
+
+
+def stream_results_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row) + "\n"
+
+
+RESULTS_OUTPUTS = {
+    "csv": ("text/csv; charset=utf-8", stream_results_csv),
+    "ndjson": ("application/x-ndjson", stream_results_ndjson),
+}
+
+
+@extend_schema(
+    parameters=[
+        OpenApiParameter(
+            "output",
+            OpenApiTypes.STR,
+            enum=RESULTS_OUTPUT_CHOICES,
+            default="csv",
+            description="Format du fichier : csv ou ndjson (une ligne JSON par résultat)",
+        )
+    ],
+    responses={
+        (200, "text/csv"): OpenApiTypes.STR,
+        (200, "application/x-ndjson"): OpenApiTypes.STR,
+    },
+    description="Downloads the results of an import (created rows, temporary passwords...)",
+)
+class ImportResultsView(views.APIView):
+    """
+    Télécharge les résultats d'un import. Les paquets de résultats écrits par
+    la tâche sont relus un par un et envoyés au fil de l'eau : la réponse
+    n'est jamais construite entièrement en mémoire.
+    """
+
+    permission_classes = [IsAdmin]
+
+    def get(self, request, import_id):
+        output = request.query_params.get("output", "csv")
+
+        if output not in RESULTS_OUTPUTS:
+            return Response(
+                {"output": [f"Choisir parmi : {', '.join(RESULTS_OUTPUT_CHOICES)}"]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        import_status = ImportStatusService().get_import_status(import_id)
+
+        if import_status is None:
+            return Response(
+                {"detail": "Import introuvable"}, status=status.HTTP_404_NOT_FOUND
+            )
+
+        if results_expired(import_id, import_status):
+            return Response(
+                {"detail": "Les résultats de cet import ont expiré"},
+                status=status.HTTP_410_GONE,
+            )
+
+        content_type, stream = RESULTS_OUTPUTS[output]
+        response = StreamingHttpResponse(
+            stream(iter_import_results(import_id)), content_type=content_type
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="import-{import_id}.{output}"'
+        )
+
+        return response
@@ -1,9 +1,23 @@
-from rest_framework import viewsets
+from datetime import date
+from rest_framework import viewsets, status, serializers
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from common.users import get_user_role
+from common.utils import is_valid_uuid
 from schoolmarksapi.models import StudentGrade
 from schoolmarksapi.serializers import (
     StudentGradeSerializer,
 )
+from schoolmarksapi.services.grade_averages import (
+    get_class_averages,
+    get_student_averages,
+)
+from drf_spectacular.utils import (
+    extend_schema,
+    inline_serializer,
+    OpenApiParameter,
+    OpenApiTypes,
+)
 
 
 class StudentGradeViewSet(viewsets.ModelViewSet):
@@ -17,6 +31,113 @@ class StudentGradeViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         return self._get_role_based_queryset()
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter("course_id", OpenApiTypes.UUID, OpenApiParameter.QUERY),
+            OpenApiParameter("class_id", OpenApiTypes.UUID, OpenApiParameter.QUERY),
+            OpenApiParameter("student_id", OpenApiTypes.INT, OpenApiParameter.QUERY),
+            OpenApiParameter(
+                "start_date",
+                OpenApiTypes.DATE,
+                OpenApiParameter.QUERY,
+                description="Évaluations créées à partir de cette date",
+            ),
+            OpenApiParameter(
+                "end_date",
+                OpenApiTypes.DATE,
+                OpenApiParameter.QUERY,
+                description="Évaluations créées jusqu'à cette date (incluse)",
+            ),
+        ],
+        responses=inline_serializer(
+            name="GradeAveragesSerializer",
+            fields={
+                "students": inline_serializer(
+                    name="StudentGradeAverageSerializer",
+                    many=True,
+                    fields={
+                        "student_id": serializers.IntegerField(),
+                        "course_id": serializers.UUIDField(),
+                        "class_id": serializers.UUIDField(),
+                        "average": serializers.FloatField(),
+                        "grades_count": serializers.IntegerField(),
+                    },
+                ),
+                "classes": inline_serializer(
+                    name="ClassGradeAverageSerializer",
+                    many=True,
+                    fields={
+                        "course_id": serializers.UUIDField(),
+                        "class_id": serializers.UUIDField(),
+                        "average": serializers.FloatField(),
+                        "students_count": serializers.IntegerField(),
+                    },
+                ),
+            },
+        ),
+    )
+    @action(detail=False, methods=["get"])
+    def averages(self, request):
+        """
+        Moyennes pondérées sur 20 par élève, cours et classe, et moyenne de
+        chaque classe par cours, calculées sur les notes visibles par
+        l'utilisateur.
+        """
+        queryset = self.get_queryset()
+
+        course_id = self.request.query_params.get("course_id", None)
+        class_id = self.request.query_params.get("class_id", None)
+        student_id = self.request.query_params.get("student_id", None)
+
+        if (course_id and not is_valid_uuid(course_id)) or (
+            class_id and not is_valid_uuid(class_id)
+        ):
+            return Response(
+                {"error": "course_id and class_id must be valid UUIDs"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if student_id and not student_id.isdigit():
+            return Response(
+                {"error": "student_id must be an integer"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if course_id:
+            queryset = queryset.filter(assessment__course_id=course_id)
+
+        if class_id:
+            queryset = queryset.filter(assessment__class_group_id=class_id)
+
+        if student_id:
+            queryset = queryset.filter(student_id=student_id)
+
+        try:
+            start_date = self.request.query_params.get("start_date", None)
+            end_date = self.request.query_params.get("end_date", None)
+
+            if start_date:
+                queryset = queryset.filter(
+                    assessment__created_at__date__gte=date.fromisoformat(start_date)
+                )
+
+            if end_date:
+                queryset = queryset.filter(
+                    assessment__created_at__date__lte=date.fromisoformat(end_date)
+                )
+        except ValueError:
+            return Response(
+                {"error": "start_date and end_date must be valid dates (YYYY-MM-DD)"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        return Response(
+            {
+                "students": get_student_averages(queryset),
+                "classes": get_class_averages(queryset),
+            }
+        )
+
     def _get_role_based_queryset(self):
         user_role = get_user_role(self.request.user)
 
@@ -802,11 +802,11 @@ export interface ImportStatus {
      */
     'imported_by': string;
     /**
-     * 
-     * @type {Array<object>}
+     * Nombre de lignes dans les résultats (import/<id>/results/)
+     * @type {number}
      * @memberof ImportStatus
      */
-    'results': Array<object>;
+    'results_count': number;
     /**
      * 
      * @type {string}
@@ -0,0 +1,33 @@
+import { Attendance } from '@apiClient'
+
+import { API_BASE_URL } from './axios'
+
+interface AttendanceStreamHandlers {
+	onSnapshot: (attendances: Attendance[]) => void
+	onAttendance: (attendance: Attendance) => void
+	onDisconnect: () => void
+}
+
+/**
+ * Ouvre le flux Server-Sent Events des enregistrements d'une séance
+ * (`attendances/stream/<id>/`). `onSnapshot` reçoit les enregistrements déjà
+ * reçus à chaque connexion (y compris après une reconnexion automatique),
+ * `onAttendance` chaque nouvel enregistrement, `onDisconnect` chaque coupure
+ * (le navigateur se reconnecte seul). Retourne la fonction qui ferme le flux.
+ */
+export function subscribeToAttendances(
+	classSessionId: string,
+	{ onSnapshot, onAttendance, onDisconnect }: AttendanceStreamHandlers,
+): () => void {
+	const source = new EventSource(`${API_BASE_URL}/attendances/stream/${classSessionId}/`, {
+		withCredentials: true,
+	})
+
+	source.addEventListener('snapshot', (event) => onSnapshot(JSON.parse(event.data) as Attendance[]))
+	source.addEventListener('attendance', (event) =>
+		onAttendance(JSON.parse(event.data) as Attendance),
+	)
+	source.addEventListener('error', () => onDisconnect())
+
+	return () => source.close()
+}
@@ -0,0 +1,21 @@
+import axios from 'axios'
+
+import { AXIOS_DEFAULT_CONFIG } from './axios'
+
+/**
+ * Les résultats d'un import ne sont plus renvoyés par son statut : ils sont
+ * téléchargés depuis `import/<id>/results/` au format NDJSON (un objet JSON
+ * par ligne).
+ */
+export async function fetchImportResults<Result>(importId: string): Promise<Result[]> {
+	const { data } = await axios.get<string>(`/import/${importId}/results/`, {
+		...AXIOS_DEFAULT_CONFIG,
+		params: { output: 'ndjson' },
+		responseType: 'text',
+	})
+
+	return data
+		.split('\n')
+		.filter((line) => line.trim() !== '')
+		.map((line) => JSON.parse(line) as Result)
+}
@@ -9,11 +9,10 @@ import { ImportStatus } from '@apiClient'
 
 import { ImportCSVError, ImportCSVSuccess, ImportType } from '../../types'
 
-// eslint-disable-next-line @typescript-eslint/no-explicit-any
-interface ImportListProps<DataType extends Record<string, any>> {
+interface ImportListProps {
 	importType: ImportType
 	initialData?: ImportStatus
-	renderItem: (importItem: ImportCSVSuccess<DataType> | ImportCSVError) => ReactNode
+	renderItem: (importItem: ImportCSVSuccess | ImportCSVError) => ReactNode
 }
 
 interface ImportListItemProps {
@@ -44,8 +43,7 @@ function getListItemIcon(status: ImportStatus['status']) {
 			)
 	}
 }
-// eslint-disable-next-line @typescript-eslint/no-explicit-any
-function ImportList<DataType extends Record<string, any>>(props: ImportListProps<DataType>) {
+function ImportList(props: ImportListProps) {
 	const { importType, initialData, renderItem } = props
 
 	const { data: imports, isPending } = useQuery({
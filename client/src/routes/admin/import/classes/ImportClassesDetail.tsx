@@ -4,6 +4,7 @@ import { useState } from 'react'
 import { useParams } from 'react-router-dom'
 
 import { importApi } from '@api/axios'
+import { fetchImportResults } from '@api/imports'
 
 import { LoadingScreen } from '@components'
 
@@ -36,11 +37,16 @@ export function ImportClassesDetail() {
 
 			return data
 		},
-		select: (data) => ({ ...data, results: data.results as ClassImportResult[] }),
 		refetchInterval: status === 'processing' ? 1000 : undefined,
 		enabled: !!importId,
 	})
 
+	const { data: results } = useQuery({
+		queryKey: ['import-results', importId],
+		queryFn: () => fetchImportResults<ClassImportResult>(importId!),
+		enabled: !!importId && status === 'completed',
+	})
+
 	if (isLoading && isPending) {
 		return <LoadingScreen />
 	}
@@ -52,8 +58,8 @@ export function ImportClassesDetail() {
 			)}
 			{importProgress?.status === 'completed' && (
 				<Table
-					title={() => `${importProgress?.results.length} classes importés`}
-					dataSource={importProgress?.results}
+					title={() => `${importProgress?.results_count} classes importés`}
+					dataSource={results}
 					rowKey={({ id }) => id}
 					columns={[
 						{ dataIndex: 'name', title: 'Nom' },
@@ -7,13 +7,6 @@ import { downloadFromURL } from '@utils/downloadPublicFile'
 
 import { ImportList } from '../_components/ImportList/ImportList'
 
-interface ClassImportResult {
-	id: string
-	name: string
-	code: string
-	year_of_graduation: string
-}
-
 export function ImportClassesList() {
 	const navigate = useNavigate()
 
@@ -36,7 +29,7 @@ export function ImportClassesList() {
 					Télécharger le modèle CSV
 				</Button>
 			</Space>
-			<ImportList<ClassImportResult>
+			<ImportList
 				importType="classes"
 				renderItem={(item) => {
 					const duration = item.finished_at
@@ -55,7 +48,7 @@ export function ImportClassesList() {
 							title={
 								<Link to={`/app/admin/import/classes/view/${item.import_id}`}>
 									{item.status === 'completed'
-										? `${item.results?.length} classes importées`
+										? `${item.results_count} classes importées`
 										: `Erreur : ${item.error}`}
 								</Link>
 							}
@@ -7,6 +7,7 @@ import { useParams } from 'react-router-dom'
 import { AssignTeacherModal } from '@routes/admin/courses/AssignTeacherModal'
 
 import { importApi } from '@api/axios'
+import { fetchImportResults } from '@api/imports'
 
 import { LoadingScreen } from '@components'
 
@@ -30,7 +31,6 @@ export function ImportCoursesDetail() {
 
 	const { importId } = params
 
-	// Narrow down the type of importProgress.results using `select`
 	const {
 		data: importProgress,
 		isLoading,
@@ -44,13 +44,16 @@ export function ImportCoursesDetail() {
 
 			return data
 		},
-		// Les types générés par l'API sont trop vagues. On cast les résultats pour
-		// avoir un type plus précis.
-		select: (data) => ({ ...data, results: data.results as CourseImportResult[] }),
 		refetchInterval: status === 'processing' ? 1000 : undefined,
 		enabled: !!importId,
 	})
 
+	const { data: results } = useQuery({
+		queryKey: ['import-results', importId],
+		queryFn: () => fetchImportResults<CourseImportResult>(importId!),
+		enabled: !!importId && status === 'completed',
+	})
+
 	if (isLoading && isPending) {
 		return <LoadingScreen />
 	}
@@ -79,7 +82,7 @@ export function ImportCoursesDetail() {
 					<Table
 						title={() => (
 							<Space direction="vertical">
-								<Typography.Text>{importProgress?.results.length} cours importés</Typography.Text>
+								<Typography.Text>{importProgress?.results_count} cours importés</Typography.Text>
 								{(importProgress.warnings ?? []).map((warn) => (
 									<div
 										style={{ display: 'flex', alignItems: 'center', gap: 'var(--ant-margin-xs)' }}
@@ -90,7 +93,7 @@ export function ImportCoursesDetail() {
 								))}
 							</Space>
 						)}
-						dataSource={importProgress?.results}
+						dataSource={results}
 						rowKey={({ id }) => id}
 						columns={[
 							{ dataIndex: 'name', title: 'Nom' },
@@ -7,13 +7,6 @@ import { downloadFromURL } from '@utils/downloadPublicFile'
 
 import { ImportList } from '../_components/ImportList/ImportList'
 
-interface CourseImportResult {
-	id: string
-	name: string
-	code: string
-	professor: string
-}
-
 export function ImportCoursesList() {
 	const navigate = useNavigate()
 
@@ -36,7 +29,7 @@ export function ImportCoursesList() {
 					Télécharger le modèle CSV
 				</Button>
 			</Space>
-			<ImportList<CourseImportResult>
+			<ImportList
 				importType="courses"
 				renderItem={(item) => {
 					const duration = item.finished_at
@@ -55,7 +48,7 @@ export function ImportCoursesList() {
 							title={
 								<Link to={`/app/admin/import/courses/view/${item.import_id}`}>
 									{item.status === 'completed'
-										? `${item.results?.length} cours importés`
+										? `${item.results_count} cours importés`
 										: `Erreur : ${item.error}`}
 								</Link>
 							}
@@ -2,9 +2,8 @@ export type ImportStatus = 'completed' | 'failed' | 'processing'
 
 export type ImportType = 'users' | 'classes' | 'courses'
 
-// eslint-disable-next-line @typescript-eslint/no-explicit-any
-export interface ImportCSV<Result extends Record<string, any>> {
-	results: (ImportCSVSuccess<Result> | ImportCSVError)[]
+export interface ImportCSV {
+	results: (ImportCSVSuccess | ImportCSVError)[]
 	total: number
 }
 
@@ -17,12 +16,13 @@ interface ImportCSVCommon {
 	finished_at: string | null
 }
 
-export interface ImportCSVSuccess<Result> extends ImportCSVCommon {
-	results: Result[]
+// Les lignes importées sont téléchargées séparément, voir fetchImportResults
+export interface ImportCSVSuccess extends ImportCSVCommon {
+	results_count: number
 	error: null
 }
 
 export interface ImportCSVError extends ImportCSVCommon {
-	results: null
+	results_count: number
 	error: string
 }
@@ -4,6 +4,7 @@ import { useState } from 'react'
 import { useParams } from 'react-router-dom'
 
 import { importApi } from '@api/axios'
+import { fetchImportResults } from '@api/imports'
 
 import { LoadingScreen } from '@components'
 
@@ -36,11 +37,16 @@ export function ImportUsersDetail() {
 
 			return data
 		},
-		select: (data) => ({ ...data, results: data.results as UserImportResult[] }),
 		refetchInterval: status === 'processing' ? 1000 : undefined,
 		enabled: !!importId,
 	})
 
+	const { data: results } = useQuery({
+		queryKey: ['import-results', importId],
+		queryFn: () => fetchImportResults<UserImportResult>(importId!),
+		enabled: !!importId && status === 'completed',
+	})
+
 	if (isLoading && isPending) {
 		return <LoadingScreen />
 	}
@@ -52,8 +58,8 @@ export function ImportUsersDetail() {
 			)}
 			{importProgress?.status === 'completed' && (
 				<Table
-					title={() => `${importProgress?.results.length} utilisateurs importés`}
-					dataSource={importProgress?.results}
+					title={() => `${importProgress?.results_count} utilisateurs importés`}
+					dataSource={results}
 					rowKey={({ email }) => email}
 					columns={[
 						{ dataIndex: 'first_name', title: 'Prénom' },
@@ -10,13 +10,6 @@ import { ImportList } from '../_components/ImportList/ImportList'
 
 dayjs.extend(durationPlugin)
 
-interface UserImportResult {
-	first_name: string
-	last_name: string
-	email: string
-	password: string
-}
-
 export function ImportUsersList() {
 	const navigate = useNavigate()
 
@@ -39,7 +32,7 @@ export function ImportUsersList() {
 					Télécharger le modèle CSV
 				</Button>
 			</Space>
-			<ImportList<UserImportResult>
+			<ImportList
 				importType="users"
 				renderItem={(item) => {
 					const duration = item.finished_at
@@ -58,7 +51,7 @@ export function ImportUsersList() {
 							title={
 								<Link to={`/app/admin/import/users/view/${item.import_id}`}>
 									{item.status === 'completed'
-										? `${item.results?.length} utilisateurs importés`
+										? `${item.results_count} utilisateurs importés`
 										: `Erreur : ${item.error}`}
 								</Link>
 							}
@@ -1,8 +1,12 @@
-import { useQuery } from '@tanstack/react-query'
+import { useQuery, useQueryClient } from '@tanstack/react-query'
 import { Space, Table, Tag, Typography } from 'antd'
 import dayjs from 'dayjs'
 import { CircleCheckBigIcon, CircleOffIcon, ClockAlertIcon } from 'lucide-react'
+import { useEffect, useState } from 'react'
 
+import { Attendance as AttendanceRecord } from '@apiClient'
+
+import { subscribeToAttendances } from '@api/attendances'
 import { attendanceApi } from '@api/axios'
 
 import './StudentList-styles.less'
@@ -18,6 +22,14 @@ type Attendance = {
 	presence: string
 }
 
+function toAttendance(attendance: AttendanceRecord): Attendance {
+	return {
+		fullname: `${attendance.student.first_name} ${attendance.student.last_name}`,
+		arrivedAt: dayjs(attendance.checked_in_at).format('HH:mm'),
+		presence: attendance.status,
+	}
+}
+
 function renderTitle(attendances: readonly Attendance[]) {
 	const [presentCount, lateCount, absentCount] = [
 		attendances.filter((a) => a.presence === 'present').length,
@@ -36,31 +48,48 @@ function renderTitle(attendances: readonly Attendance[]) {
 
 export function StudentList(props: StudentListProps) {
 	const { classSessionId, isSessionClosed } = props
+	const queryClient = useQueryClient()
+	const [isStreaming, setIsStreaming] = useState(false)
 
+	// Rechargée à la fermeture de l'appel, qui ajoute les absents. Tant que le
+	// flux n'est pas connecté, la liste est rechargée toutes les 2 secondes
 	const { data: studentAttendances, isPending } = useQuery({
-		queryKey: ['students', classSessionId],
+		queryKey: ['students', classSessionId, isSessionClosed],
 		queryFn: async () => {
 			const { data } = await attendanceApi.attendancesList({
 				params: { class_session_id: classSessionId },
 			})
 
-			const finalData: {
-				fullname: string
-				arrivedAt: string
-				presence: string
-			}[] = data.map((attendance) => ({
-				fullname: `${attendance.student.first_name} ${attendance.student.last_name}`,
-				arrivedAt: dayjs(attendance.checked_in_at).format('HH:mm'),
-				presence: attendance.status,
-			}))
-
-			return finalData
+			return data.map(toAttendance)
 		},
-		refetchInterval: !isSessionClosed ? 2000 : undefined,
+		refetchInterval: !isSessionClosed && !isStreaming ? 2000 : undefined,
 		enabled: classSessionId !== undefined,
 		initialData: [],
 	})
 
+	// Pendant l'appel, les enregistrements arrivent par le flux du serveur
+	useEffect(() => {
+		if (classSessionId === undefined || isSessionClosed) {
+			return
+		}
+
+		const queryKey = ['students', classSessionId, isSessionClosed]
+
+		return subscribeToAttendances(classSessionId, {
+			onSnapshot: (attendances) => {
+				setIsStreaming(true)
+				queryClient.setQueryData(queryKey, attendances.map(toAttendance))
+			},
+			onAttendance: (attendance) => {
+				queryClient.setQueryData(queryKey, (previous: Attendance[] = []) => [
+					...previous,
+					toAttendance(attendance),
+				])
+			},
+			onDisconnect: () => setIsStreaming(false),
+		})
+	}, [classSessionId, isSessionClosed, queryClient])
+
 	return (
 		<Table
 			className="student-checkin-list"